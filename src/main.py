@@ -221,13 +221,13 @@ def main(page: ft.Page):
             account_data = account_manager.get_account(email)
             if not account_data:
                 show_snackbar(page, f"Account {email} not found.", ft.Colors.RED)
-                return
+                return False
             
             token_data = account_data.get("token_data")
             if not token_data:
                 show_snackbar(page, f"No credentials for {email}", ft.Colors.ORANGE)
                 show_login(switching_to_email=email)
-                return
+                return True
             
             try:
                 show_snackbar(page, f"Switching to {email}...", ft.Colors.BLUE, duration=1)
@@ -262,6 +262,7 @@ def main(page: ft.Page):
                 print(f"Error switching to {email}: {e}")
                 show_snackbar(page, f"Session expired for {email}. Please login again.", ft.Colors.ORANGE)
                 show_login(switching_to_email=email)
+            return True
         
         def show_login(is_adding_account=False, switching_to_email=None):
             page.controls.clear()
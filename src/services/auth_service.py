@@ -1,16 +1,24 @@
 import os
 import pickle
 import json
+import threading
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from services.http_transport import PooledHttp, get_discovery_document
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
 
 class GoogleAuth:
-    def __init__(self, credentials_file=None):
+    def __init__(self, credentials_file=None, pooled_transport=True, pool_size=10):
         self.creds = None
+        self.pooled_transport = pooled_transport
+        self.pool_size = pool_size
+        self._http = None
+        self._services = {}
+        self._services_creds = None
+        self._services_lock = threading.Lock()
         self.credentials_file = credentials_file or os.path.join(
             os.path.dirname(__file__), 
             "web.json"
@@ -162,6 +170,7 @@ class GoogleAuth:
     def logout(self):
         print("Logging out...")
         self.creds = None
+        self._reset_services()
         if os.path.exists(self.token_file):
             try:
                 os.remove(self.token_file)
@@ -169,15 +178,43 @@ class GoogleAuth:
             except Exception as e:
                 print(f"Error removing token file: {e}")
 
+    def _reset_services(self):
+        with self._services_lock:
+            self._services = {}
+            self._services_creds = None
+            if self._http:
+                self._http.close()
+                self._http = None
+    
+    def _build_service(self):
+        if self.pooled_transport:
+            if self._http is None:
+                self._http = PooledHttp(self.creds, pool_size=self.pool_size)
+            document = get_discovery_document('drive', 'v3')
+            if document:
+                return build_from_document(document, http=self._http)
+            return build('drive', 'v3', http=self._http, static_discovery=True, cache_discovery=False)
+        
+        return build('drive', 'v3', credentials=self.creds, static_discovery=True, cache_discovery=False)
+    
     def get_service(self):
         if not self.is_authenticated():
             print("Cannot get service - not authenticated")
             return None
         
+        if self._services_creds is not self.creds:
+            self._reset_services()
+        
         try:
-            service = build('drive', 'v3', credentials=self.creds)
-            print("Google Drive service created")
-            return service
+            with self._services_lock:
+                self._services_creds = self.creds
+                thread_id = threading.get_ident()
+                service = self._services.get(thread_id)
+                if service is None:
+                    service = self._build_service()
+                    self._services[thread_id] = service
+                    print("Google Drive service created")
+                return service
         except Exception as e:
             print(f"Error creating service: {e}")
             return None
@@ -0,0 +1,132 @@
+import threading
+from services.drive_service import FILE_INFO_FIELDS
+from services.rate_limiter import is_connection_error
+
+CHANGE_FIELDS = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_INFO_FIELDS}, trashed))"
+PAGE_TOKEN_KEY = "changes_page_token"
+
+
+class ChangeTracker:
+
+    def __init__(self, drive, poll_interval=30, on_reconnect=None):
+        self.drive = drive
+        self.poll_interval = poll_interval
+        self.on_reconnect = on_reconnect
+        self.page_token = None
+        self._offline = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error polling Drive changes: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def _load_page_token(self):
+        store = self.drive.metadata_store
+        if store:
+            token = store.get_meta(PAGE_TOKEN_KEY)
+            if token:
+                return token, True
+
+        result, error = self._request(
+            lambda: self.drive.service.changes().getStartPageToken().execute(),
+            "changes_start_token"
+        )
+        if result is None:
+            self._on_poll_error(error)
+        return (result.get('startPageToken') if result else None), False
+
+    def _request(self, request_func, operation_name):
+        errors = []
+
+        def call():
+            try:
+                return request_func()
+            except Exception as e:
+                errors.append(e)
+                raise
+
+        result = self.drive._retry_request(call, operation_name)
+        return result, (errors[-1] if errors else None)
+
+    def _on_poll_error(self, error):
+        if error is not None and is_connection_error(error):
+            self._mark_offline()
+
+    def _save_page_token(self, token):
+        self.page_token = token
+        if self.drive.metadata_store:
+            self.drive.metadata_store.set_meta(PAGE_TOKEN_KEY, token)
+
+    def _mark_offline(self):
+        self._offline = True
+        if self.drive.mutation_queue is not None:
+            self.drive.mutation_queue.set_offline(True)
+
+    def _mark_online(self):
+        queue = self.drive.mutation_queue
+        if self._offline or (queue is not None and (queue.offline or len(queue))):
+            self._offline = False
+            if queue is not None:
+                queue.set_offline(False)
+            if self.on_reconnect:
+                self.on_reconnect()
+
+    def poll(self):
+        if self.page_token is None:
+            token, resumed = self._load_page_token()
+            if not token:
+                return 0
+            self.page_token = token
+            if not resumed:
+                self._save_page_token(token)
+                return 0
+
+        applied = 0
+        token = self.page_token
+        while token:
+            def make_request(page_token=token):
+                return self.drive.service.changes().list(
+                    pageToken=page_token,
+                    pageSize=1000,
+                    includeRemoved=True,
+                    spaces='drive',
+                    fields=CHANGE_FIELDS
+                ).execute()
+
+            result, error = self._request(make_request, "changes_list")
+            if result is None:
+                self._on_poll_error(error)
+                break
+
+            self._mark_online()
+
+            changes = result.get('changes', [])
+            self.drive.apply_changes(changes)
+            applied += len(changes)
+
+            if result.get('newStartPageToken'):
+                self._save_page_token(result['newStartPageToken'])
+                break
+
+            token = result.get('nextPageToken')
+            if token:
+                self._save_page_token(token)
+
+        if applied:
+            print(f"Applied {applied} Drive change(s) to cache")
+        return applied
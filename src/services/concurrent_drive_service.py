@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.drive_service import DriveService
+
+
+class ConcurrentDriveService:
+
+    def __init__(self, service_factory, max_workers=4, drive=None):
+        self.service_factory = service_factory
+        self.max_workers = max_workers
+        self.drive = drive
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="drive-worker")
+
+    def _worker_drive(self):
+        worker = getattr(self._local, 'drive', None)
+        if worker is None:
+            if self.drive:
+                worker = DriveService(
+                    self.service_factory(),
+                    max_retries=self.drive.max_retries,
+                    metadata_store=self.drive.metadata_store,
+                    cache=self.drive._cache,
+                    single_flight=self.drive._single_flight,
+                    upload_journal=self.drive.upload_journal,
+                    mutation_queue=self.drive.mutation_queue,
+                    folder_index=self.drive.folder_index,
+                    search_index=self.drive.search_index,
+                    metrics=self.drive.metrics,
+                    id_pool=self.drive.id_pool
+                )
+            else:
+                worker = DriveService(self.service_factory())
+            self._local.drive = worker
+        return worker
+
+    def _call(self, method_name, args, kwargs):
+        return getattr(self._worker_drive(), method_name)(*args, **kwargs)
+
+    def submit(self, method_name, *args, **kwargs):
+        return self._executor.submit(self._call, method_name, args, kwargs)
+
+    def submit_task(self, func, *args, **kwargs):
+        return self._executor.submit(lambda: func(self._worker_drive(), *args, **kwargs))
+
+    def map(self, method_name, items):
+        return [self.submit(method_name, *(item if isinstance(item, tuple) else (item,))) for item in items]
+
+    def list_files(self, folder_id='root', page_size=100, page_token=None, use_cache=True, profile='listing'):
+        return self.submit('list_files', folder_id, page_size, page_token, use_cache, profile)
+
+    def get_file_info(self, file_id, use_cache=True, profile='full'):
+        return self.submit('get_file_info', file_id, use_cache, profile)
+
+    def download_file_content(self, file_id):
+        return self.submit('download_file_content', file_id)
+
+    def upload_file(self, file_path, parent_id='root', file_name=None, progress_callback=None):
+        return self.submit('upload_file', file_path, parent_id, file_name, progress_callback)
+
+    def shutdown(self, wait=False, cancel_pending=True):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
@@ -0,0 +1,108 @@
+import time
+from services.rate_limiter import is_rate_limited, is_retryable, backoff_delay
+
+
+class DriveBatch:
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self, drive, max_retries=None):
+        self.drive = drive
+        self.max_retries = max_retries if max_retries is not None else drive.max_retries
+        self._pending = []
+        self.results = {}
+        self.errors = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.execute()
+        return False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self._pending) + len(self.results) + len(self.errors))
+        self._pending.append((request_id, request, callback))
+        return request_id
+
+    def execute(self):
+        pending = self._pending
+        self._pending = []
+
+        for attempt in range(self.max_retries):
+            failed = []
+            for start in range(0, len(pending), self.MAX_BATCH_SIZE):
+                failed.extend(self._execute_chunk(pending[start:start + self.MAX_BATCH_SIZE]))
+
+            if not failed:
+                break
+
+            if attempt < self.max_retries - 1:
+                delay = max(
+                    backoff_delay(attempt, self.drive.retry_delay, self.errors.get(request_id))
+                    for request_id, _, _ in failed
+                )
+                self.drive.metrics.inc('drive_retries_total', len(failed), operation='batch')
+                time.sleep(delay)
+                pending = failed
+            else:
+                self.drive.metrics.inc('drive_requests_total', len(failed), operation='batch', outcome='error')
+                for request_id, _, callback in failed:
+                    error = self.errors.get(request_id)
+                    print(f"Final error on batch request {request_id}: {error}")
+                    if callback:
+                        callback(request_id, None, error)
+
+        return self.results
+
+    def _execute_chunk(self, chunk):
+        entries = {request_id: (request, callback) for request_id, request, callback in chunk}
+        failed = []
+        answered = set()
+        throttled = [False]
+
+        def on_response(request_id, response, exception):
+            request, callback = entries[request_id]
+            answered.add(request_id)
+            if exception is None:
+                self.drive.metrics.inc('drive_requests_total', operation='batch', outcome='ok')
+                self.results[request_id] = response
+                self.errors.pop(request_id, None)
+                if callback:
+                    callback(request_id, response, None)
+            elif is_retryable(exception):
+                if is_rate_limited(exception):
+                    throttled[0] = True
+                self.errors[request_id] = exception
+                failed.append((request_id, request, callback))
+            else:
+                self.drive.metrics.inc('drive_requests_total', operation='batch', outcome='error')
+                self.errors[request_id] = exception
+                if callback:
+                    callback(request_id, None, exception)
+
+        batch = self.drive.service.new_batch_http_request(callback=on_response)
+        for request_id, request, _ in chunk:
+            batch.add(request, request_id=request_id)
+
+        limiter = self.drive.rate_limiter
+        limiter.acquire(len(chunk))
+        try:
+            with self.drive.metrics.timer('drive_request_seconds', operation='batch'):
+                batch.execute()
+            if throttled[0]:
+                self.drive.metrics.inc('drive_throttled_total', operation='batch')
+                limiter.on_throttle()
+            else:
+                limiter.on_success()
+        except Exception as error:
+            print(f"Error executing batch of {len(chunk)} request(s): {error}")
+            for request_id, request, callback in chunk:
+                if request_id not in answered:
+                    self.errors[request_id] = error
+                    failed.append((request_id, request, callback))
+
+        return failed
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from services.drive_fields import profile_satisfies
+
+
+class DriveCache:
+
+    def __init__(self, ttl=300, max_entries=2000, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._folder_index = {}
+        self._member_index = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def _estimate_size(self, value):
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return 1024
+
+    def _member_ids(self, value):
+        if not isinstance(value, dict) or not isinstance(value.get('files'), list):
+            return ()
+        return tuple({f['id'] for f in value['files'] if isinstance(f, dict) and f.get('id')})
+
+    def get(self, key, count=True, profile=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not profile_satisfies(entry[4], profile):
+                if count:
+                    self.misses += 1
+                return None
+
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                if count:
+                    self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def profile_of(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[4] if entry else None
+
+    def set(self, key, value, folder_ids=(), profile=None):
+        size = self._estimate_size(value)
+        folder_ids = tuple(f for f in folder_ids if f)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+
+            member_ids = self._member_ids(value)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size, folder_ids, profile, member_ids)
+            self._bytes += size
+            for folder_id in folder_ids:
+                self._folder_index.setdefault(folder_id, set()).add(key)
+            for file_id in member_ids:
+                self._member_index.setdefault(file_id, set()).add(key)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size, folder_ids, _, member_ids = self._entries.pop(key)
+        self._bytes -= size
+        self._unindex(self._folder_index, folder_ids, key)
+        self._unindex(self._member_index, member_ids, key)
+
+    def _unindex(self, index, ids, key):
+        for item_id in ids:
+            keys = index.get(item_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[item_id]
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_folder(self, folder_id):
+        with self._lock:
+            for key in list(self._folder_index.get(folder_id, ())):
+                self._remove(key)
+
+    def invalidate_where(self, predicate):
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if predicate(k, entry[0])]:
+                self._remove(key)
+
+    def keys_containing(self, file_id):
+        with self._lock:
+            return list(self._member_index.get(file_id, ()))
+
+    def folders_containing(self, file_id):
+        with self._lock:
+            return {f for key in self._member_index.get(file_id, ()) for f in self._entries[key][3]}
+
+    def invalidate_containing(self, file_id):
+        with self._lock:
+            for key in list(self._member_index.get(file_id, ())):
+                self._remove(key)
+
+    def keys_for_folder(self, folder_id):
+        with self._lock:
+            return list(self._folder_index.get(folder_id, ()))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._folder_index.clear()
+            self._member_index.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from googleapiclient.http import MediaIoBaseDownload
+
+PARALLEL_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+PARALLEL_DOWNLOAD_WORKERS = 4
+
+
+class _CallbackWriter:
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, data):
+        self.callback(data)
+        return len(data)
+
+
+class DriveDownloader:
+
+    def __init__(self, drive, chunk_size=None, workers=PARALLEL_DOWNLOAD_WORKERS,
+                 parallel_threshold=PARALLEL_DOWNLOAD_THRESHOLD):
+        self.drive = drive
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+
+    def _chunk_size(self):
+        return self.chunk_size or self.drive.transfer_policy.chunk_size()
+
+    def supports_parallel_ranges(self):
+        http = getattr(self.drive.service, '_http', None)
+        return bool(getattr(http, 'thread_safe', False))
+
+    def stream(self, file_id, sink, progress_callback=None, cancel_event=None, priority='transfer'):
+        writer = sink if hasattr(sink, 'write') else _CallbackWriter(sink)
+        policy = self.drive.transfer_policy
+
+        try:
+            request = self.drive.service.files().get_media(fileId=file_id)
+            chunk_size = self._chunk_size()
+            downloader = MediaIoBaseDownload(writer, request, chunksize=chunk_size)
+            received = 0
+            done = False
+            while not done:
+                if cancel_event and cancel_event.is_set():
+                    print(f"Download of {file_id} cancelled")
+                    return False
+                self.drive.rate_limiter.acquire()
+                with policy.transfer(chunk_size, priority), \
+                        self.drive.metrics.timer('drive_chunk_seconds', direction='download'):
+                    status, done = downloader.next_chunk(num_retries=self.drive.max_retries)
+                if status:
+                    self.drive.metrics.inc('drive_bytes_total', status.resumable_progress - received,
+                                           direction='download', priority=priority)
+                    received = status.resumable_progress
+                if status and progress_callback:
+                    progress_callback(status.resumable_progress, status.total_size)
+            return True
+        except Exception as error:
+            print(f"Error streaming file {file_id}: {error}")
+            return False
+
+    def download(self, file_id, destination, progress_callback=None, cancel_event=None, size=None, priority='transfer'):
+        destination = str(destination)
+        partial = destination + ".part"
+
+        if size is None:
+            info = self.drive.get_file_info(file_id, profile='listing')
+            size = int(info['size']) if info and info.get('size') else 0
+
+        try:
+            if self.workers > 1 and size >= self.parallel_threshold and self.supports_parallel_ranges():
+                ok = self._download_ranges(file_id, partial, size, progress_callback, cancel_event, priority)
+            else:
+                with open(partial, 'wb') as fh:
+                    ok = self.stream(file_id, fh, progress_callback, cancel_event, priority)
+        except OSError as error:
+            print(f"Error writing download for {file_id}: {error}")
+            ok = False
+
+        if not ok:
+            if os.path.exists(partial):
+                os.remove(partial)
+            return None
+
+        os.replace(partial, destination)
+        return destination
+
+    def _split_ranges(self, size):
+        part_size = -(-size // self.workers)
+        return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    def _fetch_range(self, file_id, start, end, priority):
+        def make_request():
+            request = self.drive.service.files().get_media(fileId=file_id)
+            request.headers['Range'] = f"bytes={start}-{end}"
+            with self.drive.transfer_policy.transfer(end - start + 1, priority):
+                return request.execute()
+
+        return self.drive._retry_request(make_request, f"download_range({file_id}, {start}-{end})", interactive=False)
+
+    def _download_ranges(self, file_id, path, size, progress_callback, cancel_event, priority):
+        with open(path, 'wb') as fh:
+            fh.truncate(size)
+
+        lock = threading.Lock()
+        failed = threading.Event()
+        received = [0]
+
+        def fetch_part(part):
+            start, end = part
+            with open(path, 'r+b') as fh:
+                fh.seek(start)
+                offset = start
+                while offset <= end:
+                    if failed.is_set() or (cancel_event and cancel_event.is_set()):
+                        return False
+
+                    last = min(offset + self._chunk_size() - 1, end)
+                    data = self._fetch_range(file_id, offset, last, priority)
+                    if data is None or len(data) != last - offset + 1:
+                        failed.set()
+                        return False
+
+                    fh.write(data)
+                    offset = last + 1
+                    self.drive.metrics.inc('drive_bytes_total', len(data), direction='download', priority=priority)
+
+                    with lock:
+                        received[0] += len(data)
+                        if progress_callback:
+                            progress_callback(received[0], size)
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="drive-range") as pool:
+            results = list(pool.map(fetch_part, self._split_ranges(size)))
+
+        if cancel_event and cancel_event.is_set():
+            print(f"Download of {file_id} cancelled")
+        return all(results)
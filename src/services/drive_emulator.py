@@ -0,0 +1,757 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from email.parser import BytesParser
+from http.client import responses
+from urllib.parse import parse_qs, urlencode, urlparse
+import httplib2
+from googleapiclient.discovery import build_from_document
+from services.http_transport import get_discovery_document
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+ROOT_ID = "0AEmulatorRootFolder"
+EMULATOR_HOST = "https://www.googleapis.com"
+THUMBNAIL_HOST = "https://drive-emulator.local"
+THUMBNAIL_BYTES = 4096
+DEFAULT_LIST_FIELDS = "kind, incompleteSearch, files(kind, id, name, mimeType)"
+DEFAULT_FILE_FIELDS = "kind, id, name, mimeType"
+UPDATABLE_FIELDS = ('name', 'mimeType', 'description', 'starred', 'trashed')
+
+QUERY_TOKEN = re.compile(r"\s*(?:(\()|(\))|'((?:[^'\\]|\\.)*)'|(!=|<=|>=|=|<|>)|([A-Za-z_][\w.]*))")
+
+
+class EmulatorError(Exception):
+
+    def __init__(self, status, message, reason=None, domain='global', headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.reason = reason or {400: 'badRequest', 404: 'notFound', 409: 'conflict'}.get(status, 'backendError')
+        self.domain = domain
+        self.headers = headers or {}
+
+    def body(self):
+        return {'error': {
+            'code': self.status,
+            'message': self.message,
+            'errors': [{'domain': self.domain, 'reason': self.reason, 'message': self.message}],
+        }}
+
+
+def parse_fields(spec):
+    tree = {}
+    stack = [tree]
+    name = ""
+    for char in (spec or "") + ",":
+        if char in ",()":
+            name = name.strip()
+            if name:
+                stack[-1][name] = {} if char == "(" else None
+                if char == "(":
+                    stack.append(stack[-1][name])
+            elif char == "(":
+                raise EmulatorError(400, f"Invalid field selection {spec}")
+            if char == ")":
+                if len(stack) == 1:
+                    raise EmulatorError(400, f"Invalid field selection {spec}")
+                stack.pop()
+            name = ""
+        else:
+            name += char
+    if len(stack) != 1:
+        raise EmulatorError(400, f"Invalid field selection {spec}")
+    return tree
+
+
+def select_fields(value, tree):
+    if not tree or '*' in tree:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: select_fields(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+class _QueryParser:
+
+    def __init__(self, text, emulator):
+        self.text = text
+        self.emulator = emulator
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    def _tokenize(self, text):
+        tokens = []
+        pos = 0
+        while pos < len(text):
+            match = QUERY_TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                if text[pos:].strip():
+                    raise EmulatorError(400, f"Invalid Value: q ({text})", reason='invalid')
+                break
+            pos = match.end()
+            lparen, rparen, string, op, word = match.groups()
+            if lparen:
+                tokens.append(('(', lparen))
+            elif rparen:
+                tokens.append((')', rparen))
+            elif string is not None:
+                tokens.append(('str', re.sub(r"\\(.)", r"\1", string)))
+            elif op:
+                tokens.append(('op', op))
+            else:
+                lowered = word.lower()
+                if lowered in ('and', 'or', 'not', 'in', 'contains', 'true', 'false'):
+                    tokens.append((lowered, lowered))
+                else:
+                    tokens.append(('field', word))
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _take(self, *kinds):
+        if self._peek() not in kinds:
+            raise EmulatorError(400, f"Invalid Value: q ({self.text})", reason='invalid')
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def parse(self):
+        if not self.tokens:
+            return lambda file: True
+        predicate = self._or()
+        if self._peek() is not None:
+            raise EmulatorError(400, f"Invalid Value: q ({self.text})", reason='invalid')
+        return predicate
+
+    def _or(self):
+        terms = [self._and()]
+        while self._peek() == 'or':
+            self._take('or')
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else (lambda file: any(term(file) for term in terms))
+
+    def _and(self):
+        terms = [self._unary()]
+        while self._peek() == 'and':
+            self._take('and')
+            terms.append(self._unary())
+        return terms[0] if len(terms) == 1 else (lambda file: all(term(file) for term in terms))
+
+    def _unary(self):
+        if self._peek() == 'not':
+            self._take('not')
+            inner = self._unary()
+            return lambda file: not inner(file)
+        if self._peek() == '(':
+            self._take('(')
+            inner = self._or()
+            self._take(')')
+            return inner
+        return self._term()
+
+    def _value(self):
+        kind = self._peek()
+        value = self._take('str', 'true', 'false')
+        return value == 'true' if kind in ('true', 'false') else value
+
+    def _term(self):
+        if self._peek() == 'str':
+            value = self._take('str')
+            self._take('in')
+            field = self._take('field')
+            if field == 'parents':
+                parent_id = self.emulator._resolve_id(value)
+                return lambda file: parent_id in file.get('parents', [])
+            if field == 'owners':
+                return lambda file: any(value in (o['emailAddress'], o['permissionId']) for o in file['owners'])
+            raise EmulatorError(400, f"Invalid Value: q ({self.text})", reason='invalid')
+
+        field = self._take('field')
+        if self._peek() == 'contains':
+            self._take('contains')
+            needle = self._take('str').lower()
+            if field == 'fullText':
+                return lambda file: needle in file['name'].lower() or \
+                    needle.encode() in self.emulator._content.get(file['id'], b'').lower()
+            if field not in ('name', 'mimeType'):
+                raise EmulatorError(400, f"Invalid Value: q ({self.text})", reason='invalid')
+            return lambda file: needle in str(file.get(field, '')).lower()
+
+        op = self._take('op')
+        value = self._value()
+        if field not in ('name', 'mimeType', 'trashed', 'starred', 'modifiedTime', 'createdTime'):
+            raise EmulatorError(400, f"Invalid Value: q ({self.text})", reason='invalid')
+
+        def compare(file):
+            actual = file.get(field, False if isinstance(value, bool) else '')
+            if op == '=':
+                return actual == value
+            if op == '!=':
+                return actual != value
+            actual, expected = str(actual)[:19], str(value)[:19]
+            return {'<': actual < expected, '<=': actual <= expected,
+                    '>': actual > expected, '>=': actual >= expected}[op]
+        return compare
+
+
+class EmulatedHttp:
+    thread_safe = True
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        status, response_headers, content = self.emulator.handle(method, uri, headers or {}, body)
+        info = {key.lower(): value for key, value in response_headers.items()}
+        info["status"] = str(status)
+        info["reason"] = responses.get(status, "")
+        info["content-length"] = str(len(content))
+        return httplib2.Response(info), content
+
+    def close(self):
+        pass
+
+
+class DriveEmulator:
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, quota_per_second=None,
+                 quota_status=403, bytes_per_second=None, seed=None, user_email="emulator@example.com"):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.quota_per_second = quota_per_second
+        self.quota_status = quota_status
+        self.bytes_per_second = bytes_per_second
+        self.offline = False
+        self.owner = {'displayName': user_email.split('@')[0], 'emailAddress': user_email,
+                      'permissionId': "emulator-user", 'me': True}
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._files = {}
+        self._content = {}
+        self._changes = []
+        self._sessions = {}
+        self._generated_ids = set()
+        self._failures = []
+        self._quota_window = (0, 0)
+        self._last_time = 0.0
+        self.calls = Counter()
+        self.injected = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._files[ROOT_ID] = self._new_record(ROOT_ID, "My Drive", FOLDER_MIME_TYPE, [])
+
+    def build_service(self):
+        return build_from_document(get_discovery_document(), http=EmulatedHttp(self))
+
+    def set_offline(self, offline):
+        self.offline = offline
+
+    def fail_next(self, status=503, count=1, reason=None, operation=None):
+        with self._lock:
+            self._failures.append({'status': status, 'count': count, 'reason': reason, 'operation': operation})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'requests': sum(self.calls.values()),
+                'injected': dict(self.injected),
+                'files': len(self._files) - 1,
+                'changes': len(self._changes),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+            self.injected.clear()
+            self.bytes_sent = self.bytes_received = 0
+
+    def _now(self):
+        with self._lock:
+            self._last_time = max(time.time(), self._last_time + 0.001)
+            stamp = self._last_time
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(stamp)) + f".{int(stamp * 1000) % 1000:03d}Z"
+
+    def _new_id(self):
+        return uuid.uuid4().hex[:28]
+
+    def _new_record(self, file_id, name, mime_type, parents):
+        now = self._now()
+        return {
+            'kind': 'drive#file', 'id': file_id, 'name': name, 'mimeType': mime_type,
+            'parents': list(parents), 'createdTime': now, 'modifiedTime': now,
+            'trashed': False, 'starred': False, 'version': 1, 'owners': [self.owner],
+        }
+
+    def _resolve_id(self, file_id):
+        return ROOT_ID if file_id == 'root' else file_id
+
+    def _file(self, file_id):
+        file = self._files.get(self._resolve_id(file_id))
+        if file is None:
+            raise EmulatorError(404, f"File not found: {file_id}.")
+        return file
+
+    def _resource(self, file):
+        resource = dict(file, parents=list(file['parents']), owners=[dict(o) for o in file['owners']])
+        resource['webViewLink'] = f"https://drive.google.com/file/d/{file['id']}/view"
+        if file['mimeType'] != FOLDER_MIME_TYPE:
+            content = self._content.get(file['id'], b'')
+            resource['size'] = str(len(content))
+            resource['md5Checksum'] = hashlib.md5(content).hexdigest()
+            if file['mimeType'].startswith(('image/', 'video/')):
+                resource['thumbnailLink'] = f"{THUMBNAIL_HOST}/thumbnails/{file['id']}=s220"
+        if not file['parents']:
+            resource.pop('parents')
+        return resource
+
+    def _record_change(self, file_id):
+        self._changes.append({'fileId': file_id, 'time': self._now()})
+
+    def _check_parents(self, parents):
+        resolved = []
+        for parent_id in parents:
+            parent = self._file(parent_id)
+            if parent['mimeType'] != FOLDER_MIME_TYPE:
+                raise EmulatorError(400, f"The parent {parent_id} is not a folder.", reason='invalidParent')
+            resolved.append(parent['id'])
+        return resolved
+
+    def _touch(self, file):
+        file['modifiedTime'] = self._now()
+        file['version'] += 1
+        self._record_change(file['id'])
+
+    def add_folder(self, name, parent_id='root'):
+        return self._create({'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]})
+
+    def add_file(self, name, content=b'', parent_id='root', mime_type='application/octet-stream'):
+        return self._create({'name': name, 'mimeType': mime_type, 'parents': [parent_id]}, content)
+
+    def _create(self, metadata, content=None):
+        with self._lock:
+            file_id = metadata.get('id')
+            if file_id and (file_id in self._files or file_id not in self._generated_ids):
+                raise EmulatorError(409 if file_id in self._files else 400,
+                                    f"The provided file ID is not usable: {file_id}.", reason='fileIdNotUsable')
+            file_id = file_id or self._new_id()
+            self._generated_ids.discard(file_id)
+            parents = self._check_parents(metadata.get('parents') or ['root'])
+            mime_type = metadata.get('mimeType') or 'application/octet-stream'
+            file = self._new_record(file_id, metadata.get('name', 'Untitled'), mime_type, parents)
+            for key in ('description', 'starred'):
+                if key in metadata:
+                    file[key] = metadata[key]
+            self._files[file_id] = file
+            if mime_type != FOLDER_MIME_TYPE:
+                self._content[file_id] = bytes(content or b'')
+            self._record_change(file_id)
+            return self._resource(file)
+
+    def _update(self, file_id, metadata, add_parents=None, remove_parents=None, content=None):
+        with self._lock:
+            file = self._file(file_id)
+            if file['id'] == ROOT_ID:
+                raise EmulatorError(403, "The root folder cannot be modified.", reason='insufficientFilePermissions')
+            if 'parents' in metadata:
+                raise EmulatorError(403, "The parents field is not directly writable in update requests. "
+                                         "Use the addParents and removeParents parameters instead.",
+                                    reason='fieldNotWritable')
+            added = self._check_parents([p for p in (add_parents or '').split(',') if p])
+            removed = {self._file(p)['id'] for p in (remove_parents or '').split(',') if p}
+            for parent_id in added:
+                if parent_id == file['id'] or file['id'] in self._ancestors(parent_id):
+                    raise EmulatorError(400, "A folder cannot be moved into itself.", reason='invalidParent')
+
+            for key in UPDATABLE_FIELDS:
+                if key in metadata:
+                    file[key] = metadata[key]
+            file['parents'] = [p for p in file['parents'] if p not in removed]
+            for parent_id in added:
+                if parent_id not in file['parents']:
+                    file['parents'].append(parent_id)
+            if content is not None:
+                self._content[file['id']] = bytes(content)
+            self._touch(file)
+            return self._resource(file)
+
+    def _ancestors(self, folder_id):
+        seen = []
+        pending = list(self._files.get(folder_id, {}).get('parents', []))
+        while pending:
+            parent_id = pending.pop()
+            if parent_id not in seen:
+                seen.append(parent_id)
+                pending.extend(self._files.get(parent_id, {}).get('parents', []))
+        return seen
+
+    def _delete(self, file_id):
+        with self._lock:
+            file = self._file(file_id)
+            if file['id'] == ROOT_ID:
+                raise EmulatorError(403, "The root folder cannot be deleted.", reason='insufficientFilePermissions')
+            pending = [file['id']]
+            while pending:
+                current = pending.pop()
+                pending.extend(f['id'] for f in self._files.values() if current in f['parents'])
+                if self._files.pop(current, None) is not None:
+                    self._content.pop(current, None)
+                    self._record_change(current)
+
+    def _copy(self, file_id, metadata):
+        with self._lock:
+            source = self._file(file_id)
+            if source['mimeType'] == FOLDER_MIME_TYPE:
+                raise EmulatorError(403, "Folders cannot be copied.", reason='cannotCopyFile')
+            return self._create({
+                'name': metadata.get('name') or f"Copy of {source['name']}",
+                'mimeType': source['mimeType'],
+                'parents': metadata.get('parents') or source['parents'],
+            }, self._content.get(source['id'], b''))
+
+    def _list(self, params):
+        with self._lock:
+            predicate = _QueryParser(params.get('q', ''), self).parse()
+            files = [f for f in self._files.values() if f['id'] != ROOT_ID and predicate(f)]
+            files = [self._resource(f) for f in self._order(files, params.get('orderBy', ''))]
+
+        page_size = min(int(params.get('pageSize', 100)), 1000)
+        try:
+            start = int(params.get('pageToken') or 0)
+        except ValueError:
+            raise EmulatorError(400, "Invalid Value: pageToken", reason='invalid')
+        result = {'kind': 'drive#fileList', 'incompleteSearch': False, 'files': files[start:start + page_size]}
+        if start + page_size < len(files):
+            result['nextPageToken'] = str(start + page_size)
+        return result
+
+    def _order(self, files, order_by):
+        keys = {
+            'folder': lambda f: f['mimeType'] != FOLDER_MIME_TYPE,
+            'name': lambda f: f['name'].lower(),
+            'name_natural': lambda f: [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', f['name'].lower())],
+            'modifiedTime': lambda f: f['modifiedTime'],
+            'createdTime': lambda f: f['createdTime'],
+            'quotaBytesUsed': lambda f: len(self._content.get(f['id'], b'')),
+            'starred': lambda f: not f['starred'],
+        }
+        for clause in reversed([c.split() for c in order_by.split(',') if c.strip()]):
+            if clause[0] not in keys:
+                raise EmulatorError(400, f"Invalid Value: orderBy ({order_by})", reason='invalid')
+            files = sorted(files, key=keys[clause[0]], reverse=len(clause) > 1 and clause[1] == 'desc')
+        return files
+
+    def _list_changes(self, params):
+        try:
+            start = int(params.get('pageToken', ''))
+        except ValueError:
+            raise EmulatorError(400, "Invalid Value: pageToken", reason='invalid')
+        page_size = min(int(params.get('pageSize', 100)), 1000)
+        include_removed = params.get('includeRemoved', 'true') == 'true'
+
+        with self._lock:
+            window = self._changes[max(0, start - 1):max(0, start - 1) + page_size]
+            changes = []
+            for change in window:
+                file = self._files.get(change['fileId'])
+                if file is None and not include_removed:
+                    continue
+                entry = {'kind': 'drive#change', 'changeType': 'file', 'fileId': change['fileId'],
+                         'time': change['time'], 'removed': file is None}
+                if file is not None:
+                    entry['file'] = self._resource(file)
+                changes.append(entry)
+            next_token = start + len(window) if start > 0 else 1 + len(window)
+
+            result = {'kind': 'drive#changeList', 'changes': changes}
+            if next_token <= len(self._changes):
+                result['nextPageToken'] = str(next_token)
+            else:
+                result['newStartPageToken'] = str(len(self._changes) + 1)
+        return result
+
+    def _inject(self, operation, batched=False):
+        if not batched:
+            if self.offline:
+                self.injected['offline'] += 1
+                raise ConnectionError("Drive emulator is offline")
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                time.sleep(delay)
+
+        with self._lock:
+            for rule in self._failures:
+                if rule['operation'] in (None, operation):
+                    rule['count'] -= 1
+                    if rule['count'] <= 0:
+                        self._failures.remove(rule)
+                    self.injected[f"http_{rule['status']}"] += 1
+                    raise EmulatorError(rule['status'], "Injected failure", reason=rule['reason'])
+
+            if self.quota_per_second:
+                second = int(time.time())
+                window, used = self._quota_window
+                used = used + 1 if window == second else 1
+                self._quota_window = (second, used)
+                if used > self.quota_per_second:
+                    self.injected['quota'] += 1
+                    raise EmulatorError(self.quota_status, "User rate limit exceeded.",
+                                        reason='userRateLimitExceeded', domain='usageLimits',
+                                        headers={'Retry-After': '1'})
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.injected[f"http_{self.error_status}"] += 1
+                raise EmulatorError(self.error_status, "Backend Error")
+
+    def _throttle_transfer(self, nbytes):
+        if self.bytes_per_second and nbytes:
+            time.sleep(nbytes / self.bytes_per_second)
+
+    def handle(self, method, uri, headers, body, batched=False):
+        parsed = urlparse(uri)
+        path = parsed.path
+        params = {key: values[-1] for key, values in parse_qs(parsed.query, keep_blank_values=True).items()}
+        headers = {key.lower(): value for key, value in headers.items()}
+        if hasattr(body, 'read'):
+            body = body.read()
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        body = body or b''
+
+        try:
+            operation = self._operation(method, path, params)
+            self._inject(operation, batched)
+            with self._lock:
+                self.calls[operation] += 1
+                self.bytes_received += len(body)
+            if operation == 'batch':
+                return self._handle_batch(headers, body)
+            status, response_headers, content = self._dispatch(operation, method, path, params, headers, body)
+        except EmulatorError as e:
+            status, response_headers, content = e.status, dict(e.headers), json.dumps(e.body()).encode()
+            response_headers['content-type'] = 'application/json; charset=UTF-8'
+
+        with self._lock:
+            self.bytes_sent += len(content)
+        return status, response_headers, content
+
+    def _operation(self, method, path, params):
+        parts = [p for p in path.split('/') if p]
+        if parts in (['batch'], ['batch', 'drive', 'v3']) and method == 'POST':
+            return 'batch'
+        if parts[:1] == ['thumbnails']:
+            return 'thumbnail'
+        if parts[:3] == ['upload', 'drive', 'v3']:
+            if method == 'PUT' or params.get('upload_id'):
+                return 'upload.chunk'
+            return 'files.update' if len(parts) > 4 else 'files.create'
+        if parts[:2] != ['drive', 'v3'] or len(parts) < 3:
+            raise EmulatorError(404, f"Not Found: {path}")
+
+        resource, rest = parts[2], parts[3:]
+        if resource == 'changes':
+            if rest == ['startPageToken'] and method == 'GET':
+                return 'changes.getStartPageToken'
+            if not rest and method == 'GET':
+                return 'changes.list'
+        elif resource == 'files':
+            if not rest:
+                return {'GET': 'files.list', 'POST': 'files.create'}.get(method, 'unsupported')
+            if rest == ['generateIds']:
+                return 'files.generateIds'
+            if len(rest) == 2 and rest[1] == 'copy' and method == 'POST':
+                return 'files.copy'
+            if len(rest) == 1:
+                if method == 'GET':
+                    return 'files.get_media' if params.get('alt') == 'media' else 'files.get'
+                return {'PATCH': 'files.update', 'DELETE': 'files.delete'}.get(method, 'unsupported')
+        raise EmulatorError(404, f"Not Found: {method} {path}")
+
+    def _json_response(self, result, fields=None, status=200):
+        content = json.dumps(select_fields(result, parse_fields(fields))).encode()
+        return status, {'content-type': 'application/json; charset=UTF-8'}, content
+
+    def _dispatch(self, operation, method, path, params, headers, body):
+        parts = [p for p in path.split('/') if p]
+        metadata = json.loads(body) if body and operation != 'upload.chunk' and \
+            headers.get('content-type', '').startswith('application/json') else {}
+
+        if operation == 'files.list':
+            return self._json_response(self._list(params), params.get('fields') or DEFAULT_LIST_FIELDS)
+        if operation == 'files.get':
+            with self._lock:
+                file = self._resource(self._file(parts[3]))
+            return self._json_response(file, params.get('fields') or DEFAULT_FILE_FIELDS)
+        if operation == 'files.get_media':
+            return self._media(parts[3], headers)
+        if operation == 'files.create' and parts[0] != 'upload':
+            return self._json_response(self._create(metadata), params.get('fields') or DEFAULT_FILE_FIELDS)
+        if operation in ('files.create', 'files.update') and parts[0] == 'upload':
+            return self._start_upload(operation, parts, params, headers, body)
+        if operation == 'files.update':
+            file = self._update(parts[3], metadata, params.get('addParents'), params.get('removeParents'))
+            return self._json_response(file, params.get('fields') or DEFAULT_FILE_FIELDS)
+        if operation == 'files.delete':
+            self._delete(parts[3])
+            return 204, {}, b''
+        if operation == 'files.copy':
+            return self._json_response(self._copy(parts[3], metadata), params.get('fields') or DEFAULT_FILE_FIELDS)
+        if operation == 'files.generateIds':
+            count = min(int(params.get('count', 10)), 1000)
+            with self._lock:
+                ids = [self._new_id() for _ in range(count)]
+                self._generated_ids.update(ids)
+            return self._json_response({'kind': 'drive#generatedIds', 'space': params.get('space', 'drive'),
+                                        'ids': ids}, params.get('fields'))
+        if operation == 'changes.getStartPageToken':
+            with self._lock:
+                token = str(len(self._changes) + 1)
+            return self._json_response({'kind': 'drive#startPageToken', 'startPageToken': token},
+                                       params.get('fields'))
+        if operation == 'changes.list':
+            return self._json_response(self._list_changes(params), params.get('fields'))
+        if operation == 'upload.chunk':
+            return self._upload_chunk(params, headers, body)
+        if operation == 'thumbnail':
+            file_id = parts[1].split('=')[0]
+            with self._lock:
+                self._file(file_id)
+                content = self._content.get(file_id, b'')[:THUMBNAIL_BYTES]
+            return 200, {'content-type': 'image/jpeg'}, content
+        raise EmulatorError(405, f"Method not allowed: {method} {path}", reason='methodNotAllowed')
+
+    def _media(self, file_id, headers):
+        with self._lock:
+            file = self._file(file_id)
+            if file['mimeType'] == FOLDER_MIME_TYPE or file['mimeType'].startswith('application/vnd.google-apps.'):
+                raise EmulatorError(403, "Only files with binary content can be downloaded.",
+                                    reason='fileNotDownloadable')
+            content = self._content.get(file['id'], b'')
+            mime_type = file['mimeType']
+
+        match = re.match(r'bytes=(\d+)-(\d*)', headers.get('range', ''))
+        if not match:
+            self._throttle_transfer(len(content))
+            return 200, {'content-type': mime_type}, content
+
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else len(content) - 1, len(content) - 1)
+        if start >= len(content) and content:
+            raise EmulatorError(416, "Request range not satisfiable", reason='requestedRangeNotSatisfiable')
+        chunk = content[start:end + 1]
+        self._throttle_transfer(len(chunk))
+        return 206, {'content-type': mime_type, 'content-range': f"bytes {start}-{end}/{len(content)}"}, chunk
+
+    def _start_upload(self, operation, parts, params, headers, body):
+        upload_type = params.get('uploadType', 'media')
+        file_id = parts[4] if operation == 'files.update' else None
+        fields = params.get('fields') or DEFAULT_FILE_FIELDS
+
+        if upload_type == 'resumable':
+            metadata = json.loads(body) if body else {}
+            if file_id:
+                with self._lock:
+                    self._file(file_id)
+            upload_id = uuid.uuid4().hex
+            total = headers.get('x-upload-content-length')
+            with self._lock:
+                self._sessions[upload_id] = {
+                    'file_id': file_id, 'metadata': metadata, 'fields': fields,
+                    'add_parents': params.get('addParents'), 'remove_parents': params.get('removeParents'),
+                    'total': int(total) if total else None, 'data': bytearray(),
+                    'mime_type': headers.get('x-upload-content-type'),
+                }
+            query = urlencode({'uploadType': 'resumable', 'upload_id': upload_id})
+            location = f"{EMULATOR_HOST}/{'/'.join(parts)}?{query}"
+            return 200, {'location': location}, b''
+
+        if upload_type == 'multipart':
+            message = BytesParser().parsebytes(
+                f"Content-Type: {headers.get('content-type', '')}\r\n\r\n".encode() + body)
+            payloads = message.get_payload()
+            metadata = json.loads(payloads[0].get_payload(decode=True) or b'{}')
+            metadata.setdefault('mimeType', payloads[1].get_content_type())
+            content = payloads[1].get_payload(decode=True) or b''
+        else:
+            metadata = {'mimeType': headers.get('content-type')}
+            content = body
+
+        self._throttle_transfer(len(content))
+        if file_id:
+            file = self._update(file_id, metadata, params.get('addParents'), params.get('removeParents'), content)
+        else:
+            file = self._create(metadata, content)
+        return self._json_response(file, fields)
+
+    def _upload_chunk(self, params, headers, body):
+        with self._lock:
+            session = self._sessions.get(params.get('upload_id'))
+        if session is None:
+            raise EmulatorError(404, "Upload session not found or expired.", reason='notFound')
+
+        match = re.match(r'bytes (\*|(\d+)-(\d+))/(\*|\d+)', headers.get('content-range', ''))
+        if match:
+            if match.group(4) != '*':
+                session['total'] = int(match.group(4))
+            if match.group(1) != '*':
+                start = int(match.group(2))
+                if start > len(session['data']):
+                    raise EmulatorError(400, "Chunk does not continue the upload.", reason='badContent')
+                del session['data'][start:]
+                session['data'].extend(body)
+                self._throttle_transfer(len(body))
+        else:
+            session['data'].extend(body)
+            session['total'] = len(session['data'])
+
+        received = len(session['data'])
+        if session['total'] is None or received < session['total']:
+            return 308, ({'range': f"bytes=0-{received - 1}"} if received else {}), b''
+
+        with self._lock:
+            self._sessions.pop(params['upload_id'], None)
+        metadata = dict(session['metadata'])
+        if session['mime_type'] and not session['file_id']:
+            metadata.setdefault('mimeType', session['mime_type'])
+        if session['file_id']:
+            file = self._update(session['file_id'], metadata, session['add_parents'],
+                                session['remove_parents'], bytes(session['data']))
+        else:
+            file = self._create(metadata, bytes(session['data']))
+        return self._json_response(file, session['fields'])
+
+    def _handle_batch(self, headers, body):
+        message = BytesParser().parsebytes(
+            f"Content-Type: {headers.get('content-type', '')}\r\n\r\n".encode() + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in message.get_payload() or []:
+            request = part.get_payload(decode=True) or b''
+            head, request_body = (re.split(rb'\r?\n\r?\n', request, maxsplit=1) + [b''])[:2]
+            lines = head.decode('utf-8').splitlines()
+            method, target = lines[0].split(' ')[:2]
+            request_headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+            status, response_headers, content = self.handle(method, EMULATOR_HOST + target, request_headers,
+                                                            request_body, batched=True)
+            header_lines = "".join(f"{key}: {value}\r\n" for key, value in response_headers.items())
+            content_id = " ".join(part.get('Content-ID', '< + 0>').split())
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {responses.get(status, '')}\r\n{header_lines}"
+                f"Content-Length: {len(content)}\r\n\r\n".encode() + content + b"\r\n"
+            )
+        content = b"".join(parts) + f"--{boundary}--\r\n".encode()
+        return 200, {'content-type': f'multipart/mixed; boundary={boundary}'}, content
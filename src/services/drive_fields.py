@@ -0,0 +1,35 @@
+FIELD_PROFILES = {
+    'minimal': ('id', 'name', 'mimeType'),
+    'parents': ('id', 'parents'),
+    'folder': ('id', 'name', 'mimeType', 'parents'),
+    'listing': ('id', 'name', 'mimeType', 'modifiedTime', 'size'),
+    'search': ('id', 'name', 'mimeType', 'modifiedTime', 'size', 'owners', 'parents'),
+    'mirror': ('id', 'name', 'mimeType', 'md5Checksum', 'size', 'modifiedTime', 'parents'),
+    'upload': ('id', 'name', 'mimeType', 'size', 'md5Checksum', 'webViewLink', 'parents', 'modifiedTime'),
+    'mutation': ('id', 'name', 'mimeType', 'modifiedTime', 'size', 'parents', 'thumbnailLink'),
+    'thumbnail': ('id', 'name', 'mimeType', 'modifiedTime', 'size', 'thumbnailLink'),
+    'preview': ('id', 'name', 'mimeType', 'size', 'modifiedTime', 'webViewLink'),
+    'full': ('id', 'name', 'mimeType', 'size', 'createdTime', 'modifiedTime', 'owners', 'parents', 'webViewLink'),
+}
+
+
+def profile_fields(profile):
+    if profile not in FIELD_PROFILES:
+        raise ValueError(f"Unknown field profile: {profile}")
+    return FIELD_PROFILES[profile]
+
+
+def file_fields(profile):
+    return ", ".join(profile_fields(profile))
+
+
+def list_fields(profile):
+    return f"nextPageToken, files({file_fields(profile)})"
+
+
+def profile_satisfies(cached_profile, requested_profile):
+    if cached_profile is None or requested_profile is None:
+        return True
+    if cached_profile == requested_profile:
+        return True
+    return set(profile_fields(requested_profile)) <= set(profile_fields(cached_profile))
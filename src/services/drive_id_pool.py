@@ -0,0 +1,101 @@
+import threading
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from services.concurrent_drive_service import ConcurrentDriveService
+
+ID_POOL_SIZE = 50
+ID_POOL_LOW_WATER = 10
+PENDING_WAIT_SECONDS = 60
+
+
+class DriveIdPool:
+
+    def __init__(self, drive, service_factory, size=ID_POOL_SIZE, low_water=ID_POOL_LOW_WATER):
+        self.drive = drive
+        self.size = size
+        self.low_water = low_water
+        self._lock = threading.Lock()
+        self._ids = deque()
+        self._refilling = False
+        self._pending = {}
+        self._local = threading.local()
+        self._workers = ConcurrentDriveService(service_factory, max_workers=1, drive=drive)
+
+    def start(self):
+        self.refill()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+    def take(self):
+        with self._lock:
+            file_id = self._ids.popleft() if self._ids else None
+            low = len(self._ids) < self.low_water
+        if low:
+            self.refill()
+        return file_id
+
+    def refill(self):
+        with self._lock:
+            if self._refilling or len(self._ids) >= self.low_water:
+                return
+            self._refilling = True
+        if self.drive.is_offline():
+            with self._lock:
+                self._refilling = False
+            return
+        self._workers.submit_task(self._refill)
+
+    def _refill(self, drive):
+        try:
+            with self._lock:
+                count = self.size - len(self._ids)
+            ids = drive.generate_ids(count) if count > 0 else []
+            with self._lock:
+                self._ids.extend(ids)
+            return len(ids)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def is_pending(self, file_id):
+        with self._lock:
+            return file_id in self._pending
+
+    def submit(self, file_id, method_name, *args, **kwargs):
+        future = self._workers.submit_task(self._run, method_name, args, kwargs)
+        with self._lock:
+            self._pending[file_id] = future
+        future.add_done_callback(lambda f: self._done(file_id, f))
+        return future
+
+    def _run(self, drive, method_name, args, kwargs):
+        self._local.confirming = True
+        try:
+            return getattr(drive, method_name)(*args, **kwargs)
+        finally:
+            self._local.confirming = False
+
+    def _done(self, file_id, future):
+        with self._lock:
+            if self._pending.get(file_id) is future:
+                del self._pending[file_id]
+
+    def wait(self, file_id, timeout=PENDING_WAIT_SECONDS):
+        # Confirmations run in order on one worker, so a parent is created before its children.
+        if getattr(self._local, 'confirming', False):
+            return
+        with self._lock:
+            future = self._pending.get(file_id)
+        if future is None:
+            return
+        try:
+            future.result(timeout)
+        except FutureTimeoutError:
+            print(f"Still waiting for {file_id} to be created on Drive")
+        except Exception as e:
+            print(f"Create of {file_id} failed: {e}")
+
+    def shutdown(self):
+        self._workers.shutdown(cancel_pending=False)
@@ -1,163 +1,439 @@
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from datetime import datetime, timedelta
-from functools import lru_cache
 import time
 import io
-from utils.common import extract_drive_id, format_file_size
+import json
+import mimetypes
+import os
+from contextlib import nullcontext
+from utils.common import extract_drive_id
+from services.drive_batch import DriveBatch
+from services.drive_download import DriveDownloader
+from services.drive_cache import DriveCache
+from services.single_flight import SingleFlight
+from services.rate_limiter import get_shared_limiter, is_rate_limited, is_retryable, is_connection_error, backoff_delay
+from services.drive_fields import file_fields, list_fields, profile_satisfies
+from services.transfer_policy import AdaptiveMediaFileUpload, get_shared_policy
+from services.upload_dedupe import get_shared_deduper
+from services.metrics import get_shared_metrics, operation_label
+from services.search_index import escape_drive_query
+from services.mutation_queue import new_temp_id
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+FILE_INFO_FIELDS = file_fields('full')
+
+
+class IncompleteListingError(Exception):
+    pass
 
 
 class DriveService:
     
-    def __init__(self, service, cache_ttl=300, max_retries=3):
+    def __init__(self, service, cache_ttl=300, max_retries=3, metadata_store=None, cache=None, single_flight=None, rate_limiter=None, upload_journal=None, transfer_policy=None, folder_index=None, search_index=None, deduper=None, metrics=None, mutation_queue=None, id_pool=None):
         self.service = service
-        self._cache = {}
-        self._cache_ttl = cache_ttl
+        self.metadata_store = metadata_store
+        self.upload_journal = upload_journal
+        self.mutation_queue = mutation_queue
+        self.folder_index = folder_index
+        self.id_pool = id_pool
+        self.search_index = search_index
+        self._cache = cache or DriveCache(ttl=cache_ttl)
+        self._single_flight = single_flight or SingleFlight()
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.transfer_policy = transfer_policy or get_shared_policy()
+        self.deduper = deduper or get_shared_deduper()
+        self.metrics = metrics or get_shared_metrics()
         self.max_retries = max_retries
         self.retry_delay = 1
-        self._setup_lru_caches()
-    
-    def _setup_lru_caches(self):
-        @lru_cache(maxsize=128)
-        def cached_get_file_info(file_id):
-            return self.get_file_info(file_id, use_cache=False)
-        self._cached_get_file_info = cached_get_file_info
-    
-    def _get_cached(self, key):
-        if key in self._cache:
-            data, timestamp = self._cache[key]
-            if datetime.now() - timestamp < timedelta(seconds=self._cache_ttl):
-                return data
-            del self._cache[key]
-        return None
+        self.downloader = DriveDownloader(self)
+    
+    def _get_cached(self, key, profile=None):
+        value = self._cache.get(key, profile=profile)
+        self.metrics.inc('drive_cache_lookups_total', layer='memory', kind=key.split('_', 1)[0],
+                         result='hit' if value else 'miss')
+        return value
     
-    def _set_cache(self, key, data):
-        self._cache[key] = (data, datetime.now())
+    def _record_store_lookup(self, kind, value):
+        self.metrics.inc('drive_cache_lookups_total', layer='disk', kind=kind,
+                         result='miss' if value is None else 'hit')
+    
+    def _set_cache(self, key, data, folder_ids=(), profile=None):
+        self._cache.set(key, data, folder_ids, profile)
     
     def _invalidate_cache(self, folder_id=None):
+        if self.metadata_store:
+            if folder_id:
+                self.metadata_store.invalidate_folder(folder_id)
+            else:
+                self.metadata_store.clear()
+        
         if folder_id:
-            keys_to_remove = [k for k in self._cache.keys() if folder_id in k]
-            for key in keys_to_remove:
-                del self._cache[key]
-            if hasattr(self, '_cached_get_file_info'):
-                try:
-                    self._cached_get_file_info.cache_clear()
-                except:
-                    pass
+            self._cache.invalidate_folder(folder_id)
         else:
             self._cache.clear()
-            if hasattr(self, '_cached_get_file_info'):
-                self._cached_get_file_info.cache_clear()
-    
-    def _retry_request(self, request_func, operation_name="operation"):
-        for attempt in range(self.max_retries):
-            try:
-                return request_func()
-            except (TimeoutError, HttpError, Exception) as error:
-                should_retry = (
-                    isinstance(error, TimeoutError) or
-                    (isinstance(error, HttpError) and error.resp.status in [429, 500, 503]) or
-                    (not isinstance(error, HttpError) and attempt < self.max_retries - 1)
-                )
-                
-                if should_retry and attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"Error on {operation_name} (attempt {attempt + 1}/{self.max_retries}), retrying in {delay}s...")
-                    time.sleep(delay)
-                else:
-                    print(f"Final error on {operation_name}: {error}")
-                    return None
+    
+    def _index_files(self, files):
+        if self.search_index and files:
+            self.search_index.add_files(files)
+    
+    def cache_stats(self):
+        return self._cache.stats()
+    
+    def apply_changes(self, changes):
+        for change in changes:
+            self._apply_change(change)
+    
+    def _apply_change(self, change):
+        file_id = change.get('fileId')
+        if not file_id:
+            return
+        
+        file = dict(change.get('file') or {})
+        removed = change.get('removed') or file.pop('trashed', False)
+        
+        current = not removed and self._matches_cached(file)
+        if not current:
+            self._evict_listings_containing(file_id)
+        
+        if self.folder_index:
+            self.folder_index.apply_change(change)
+        if self.search_index:
+            self.search_index.apply_change(change)
+        
+        if removed:
+            self._cache.invalidate(f"fileinfo_{file_id}")
+            if self.metadata_store:
+                self.metadata_store.invalidate_file(file_id)
+            return
+        
+        if file.get('id'):
+            self._store_file_info(file)
+        
+        if current:
+            return
+        
+        for parent in file.get('parents', []):
+            self._evict_folder_listings(parent)
+    
+    def _matches_cached(self, file):
+        if not file.get('id'):
+            return False
+        cached = self._cache.get(f"fileinfo_{file['id']}", count=False)
+        if not cached and self.metadata_store:
+            cached = self.metadata_store.get_file_info(file['id'])
+        return bool(cached) and all(cached.get(k) == file.get(k) for k in ('name', 'parents', 'modifiedTime'))
+    
+    def _listing_folders(self, file_id):
+        folders = self._cache.folders_containing(file_id)
+        if self.metadata_store:
+            folders.update(self.metadata_store.folders_containing(file_id))
+        return list(folders)
+    
+    def _listing_entry(self, file_id):
+        for key in self._cache.keys_containing(file_id):
+            data = self._cache.get(key, count=False)
+            entry = next((f for f in (data or {}).get('files', []) if f.get('id') == file_id), None)
+            if entry:
+                return entry
+        if self.metadata_store:
+            return self.metadata_store.find_listing_entry(file_id) or {}
+        return {}
+    
+    def _evict_listings_containing(self, file_id):
+        self._cache.invalidate_containing(file_id)
+        if self.metadata_store:
+            self.metadata_store.invalidate_listings_containing(file_id)
+    
+    def _evict_folder_listings(self, folder_id):
+        for key in self._cache.keys_for_folder(folder_id):
+            if key.startswith("files_"):
+                self._cache.invalidate(key)
+        
+        if self.metadata_store:
+            self.metadata_store.invalidate_listings(folder_id)
+    
+    def _retry_request(self, request_func, operation_name="operation", interactive=True, mutation=False):
+        operation = operation_label(operation_name)
+        with self.metrics.timer('drive_request_seconds', operation=operation):
+            for attempt in range(self.max_retries):
+                self.rate_limiter.acquire()
+                try:
+                    with self.transfer_policy.interactive() if interactive else nullcontext():
+                        result = request_func()
+                    self.rate_limiter.on_success()
+                    self.metrics.inc('drive_requests_total', operation=operation, outcome='ok')
+                    return result
+                except Exception as error:
+                    if is_rate_limited(error):
+                        self.rate_limiter.on_throttle()
+                        self.metrics.inc('drive_throttled_total', operation=operation)
+                    
+                    if mutation and self.mutation_queue is not None and is_connection_error(error):
+                        self.mutation_queue.set_offline(True)
+                        self.metrics.inc('drive_requests_total', operation=operation, outcome='offline')
+                        print(f"{operation_name} failed, Drive unreachable: {error}")
+                        return None
+                    
+                    if is_retryable(error) and attempt < self.max_retries - 1:
+                        self.metrics.inc('drive_retries_total', operation=operation)
+                        time.sleep(backoff_delay(attempt, self.retry_delay, error))
+                    else:
+                        self.metrics.inc('drive_requests_total', operation=operation, outcome='error')
+                        print(f"Final error on {operation_name}: {error}")
+                        return None
         return None
     
-    def _execute_file_list_query(self, query, page_size=100, page_token=None, fields="nextPageToken, files(id, name, mimeType, modifiedTime, size, owners)", order_by="folder,name"):
+    def batch(self):
+        return DriveBatch(self)
+    
+    def _execute_file_list_query(self, query, page_size=100, page_token=None, fields=None, order_by="folder,name", interactive=True):
         def make_request():
             return self.service.files().list(
                 q=query,
                 pageSize=page_size,
                 pageToken=page_token,
-                fields=fields,
+                fields=fields or list_fields('listing'),
                 orderBy=order_by
             ).execute()
         
-        return self._retry_request(make_request, f"list_query({query[:50]})")
+        return self._retry_request(make_request, f"list_query({query[:50]})", interactive)
     
-    def list_files(self, folder_id='root', page_size=100, page_token=None, use_cache=True):
+    def list_files(self, folder_id='root', page_size=100, page_token=None, use_cache=True, profile='listing'):
         cache_key = f"files_{folder_id}_{page_size}_{page_token}"
         
         if use_cache:
-            cached = self._get_cached(cache_key)
+            cached = self._get_cached_listing(cache_key, folder_id, profile)
             if cached:
-                print(f"Cache hit for {cache_key}")
                 return cached
         
+        return self._single_flight.do(
+            f"{cache_key}:{profile}",
+            lambda: self._fetch_listing(cache_key, folder_id, page_size, page_token, use_cache, profile)
+        )
+    
+    def _get_cached_listing(self, cache_key, folder_id, profile):
+        cached = self._get_cached(cache_key, profile)
+        if cached:
+            return cached
+        
+        if self.metadata_store:
+            stored = self.metadata_store.get_listing(cache_key, profile)
+            self._record_store_lookup('files', stored)
+            if stored is not None:
+                self._set_cache(cache_key, stored, [folder_id], profile)
+                return stored
+        
+        return None
+    
+    def _fetch_listing(self, cache_key, folder_id, page_size, page_token, use_cache, profile, interactive=True):
+        if use_cache:
+            cached = self._cache.get(cache_key, count=False, profile=profile)
+            if cached:
+                return cached
+        
+        self._await_pending(folder_id)
         query = f"'{folder_id}' in parents and trashed=false"
-        result = self._execute_file_list_query(query, page_size, page_token)
+        result = self._execute_file_list_query(query, page_size, page_token, fields=list_fields(profile),
+                                               interactive=interactive)
         
         if result is not None:
             formatted_result = {
                 'files': result.get('files', []),
                 'nextPageToken': result.get('nextPageToken', None)
             }
-            self._set_cache(cache_key, formatted_result)
+            self._set_cache(cache_key, formatted_result, [folder_id], profile)
+            self._index_files(formatted_result['files'])
+            if self.metadata_store:
+                self.metadata_store.put_listing(cache_key, folder_id, formatted_result, profile)
             return formatted_result
         
         return None
     
-    def search_files(self, query_text, folder_id=None, use_cache=False):
-        cache_key = f"search_{query_text}_{folder_id}"
+    def has_cached_listing(self, folder_id, page_size=100, profile='listing'):
+        cache_key = f"files_{folder_id}_{page_size}_None"
+        if self._cache.get(cache_key, count=False, profile=profile):
+            return True
+        return bool(self.metadata_store) and self.metadata_store.get_listing(cache_key, profile) is not None
+    
+    def prefetch_listing(self, folder_id, page_size=100, profile='listing'):
+        cache_key = f"files_{folder_id}_{page_size}_None"
+        result = self._single_flight.do(
+            f"{cache_key}:{profile}",
+            lambda: self._fetch_listing(cache_key, folder_id, page_size, None, True, profile, interactive=False)
+        )
+        return result is not None
+    
+    def iter_pages(self, folder_id='root', query=None, page_size=100, order_by="folder,name", profile='listing', use_cache=False):
+        if use_cache and folder_id and not query and order_by == "folder,name":
+            page_token = None
+            while True:
+                result = self.list_files(folder_id, page_size, page_token, profile=profile)
+                if result is None:
+                    raise IncompleteListingError(f"Listing of {folder_id} failed")
+                yield result.get('files', [])
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    return
+        
+        clauses = []
+        if folder_id:
+            clauses.append(f"'{folder_id}' in parents")
+        if query:
+            clauses.append(f"({query})")
+        clauses.append("trashed=false")
+        full_query = " and ".join(clauses)
+        
+        page_token = None
+        while True:
+            result = self._execute_file_list_query(
+                full_query, page_size, page_token, fields=list_fields(profile), order_by=order_by
+            )
+            if result is None:
+                raise IncompleteListingError(f"Listing failed for query: {full_query}")
+            
+            self._index_files(result.get('files', []))
+            yield result.get('files', [])
+            
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return
+    
+    def iter_files(self, folder_id='root', query=None, page_size=100, order_by="folder,name", profile='listing'):
+        for files in self.iter_pages(folder_id, query, page_size, order_by, profile):
+            yield from files
+    
+    def iter_search_files(self, query_text, folder_id=None, page_size=100, profile='listing'):
+        return self.iter_files(folder_id, f"name contains '{escape_drive_query(query_text)}'", page_size, profile=profile)
+    
+    def search_files(self, query_text, folder_id=None, use_cache=False, max_results=50, profile='listing'):
+        cache_key = f"search_{query_text}_{folder_id}_{max_results}"
         
         if use_cache:
-            cached = self._get_cached(cache_key)
+            cached = self._get_cached(cache_key, profile)
             if cached:
                 return cached
         
-        query = f"name contains '{query_text}' and trashed=false"
-        if folder_id:
-            query += f" and '{folder_id}' in parents"
+        if self.search_index and folder_id is None and self.search_index.is_complete():
+            local = self.search_index.search(query_text, limit=max_results)
+            if local:
+                return local
         
-        result = self._execute_file_list_query(query, page_size=50, fields="files(id, name, mimeType, modifiedTime, parents)")
-        files = result.get('files', []) if result else []
+        files = []
+        try:
+            for file in self.iter_search_files(query_text, folder_id, page_size=min(max_results, 100), profile=profile):
+                files.append(file)
+                if len(files) >= max_results:
+                    break
+        except IncompleteListingError as e:
+            print(f"Search results incomplete: {e}")
+            return files
         
         if use_cache and files:
-            self._set_cache(cache_key, files)
+            self._set_cache(cache_key, files, [folder_id], profile)
         
         return files
     
-    def get_file_info(self, file_id, use_cache=True):
-        if use_cache and hasattr(self, '_cached_get_file_info'):
-            try:
-                return self._cached_get_file_info(file_id)
-            except:
-                pass
+    def get_file_info(self, file_id, use_cache=True, profile='full'):
+        flight_key = f"fileinfo_{file_id}:{profile}"
         
-        cache_key = f"fileinfo_{file_id}"
+        if not use_cache:
+            return self._single_flight.do(flight_key, lambda: self._fetch_file_info(file_id, profile))
         
-        if use_cache:
-            cached = self._get_cached(cache_key)
-            if cached:
-                return cached
+        cached = self._get_cached(f"fileinfo_{file_id}", profile)
+        if cached:
+            return cached
+        
+        return self._single_flight.do(flight_key, lambda: self._load_file_info(file_id, profile))
+    
+    def _load_file_info(self, file_id, profile='full'):
+        cached = self._cache.get(f"fileinfo_{file_id}", count=False, profile=profile)
+        if cached:
+            return cached
+        
+        if self.metadata_store:
+            stored = self.metadata_store.get_file_info(file_id, profile)
+            self._record_store_lookup('fileinfo', stored)
+            if stored is not None:
+                self._set_cache(f"fileinfo_{file_id}", stored, [file_id], profile)
+                return stored
+        
+        return self._fetch_file_info(file_id, profile)
+    
+    def _fetch_file_info(self, file_id, profile='full'):
+        self._await_pending(file_id)
         
         def make_request():
             return self.service.files().get(
                 fileId=file_id,
-                fields="id, name, mimeType, size, createdTime, modifiedTime, owners, parents, webViewLink"
+                fields=file_fields(profile)
             ).execute()
         
         file = self._retry_request(make_request, f"get_file_info({file_id})")
         
         if file is not None:
-            self._set_cache(cache_key, file)
+            self._store_file_info(file, profile)
         
         return file
+    
+    def _store_file_info(self, file, profile='full'):
+        key = f"fileinfo_{file['id']}"
+        cached_profile = self._cache.profile_of(key)
+        if cached_profile and cached_profile != profile and profile_satisfies(cached_profile, profile):
+            cached = self._cache.get(key, count=False)
+            if cached:
+                file = {**cached, **file}
+                profile = cached_profile
+        
+        self._set_cache(key, file, [file['id']], profile)
+        self._index_files([file])
+        if self.metadata_store:
+            self.metadata_store.put_file_info(file, profile)
+    
+    def get_file_info_many(self, file_ids, use_cache=True, profile='full'):
+        results = {}
+        missing = []
+        
+        for file_id in dict.fromkeys(file_ids):
+            cached = None
+            if use_cache:
+                cached = self._get_cached(f"fileinfo_{file_id}", profile)
+                if not cached and self.metadata_store:
+                    cached = self.metadata_store.get_file_info(file_id, profile)
+            if cached:
+                results[file_id] = cached
+            else:
+                missing.append(file_id)
+        
+        if not missing:
+            return results
+        
+        def on_response(file_id, file, error):
+            if error is None and file is not None:
+                self._store_file_info(file, profile)
+                results[file_id] = file
+            else:
+                results[file_id] = None
+        
+        with self.batch() as batch:
+            for file_id in missing:
+                batch.add(
+                    self.service.files().get(
+                        fileId=file_id,
+                        fields=file_fields(profile)
+                    ),
+                    callback=on_response,
+                    request_id=file_id
+                )
+        
+        return results
 
-    def resolve_drive_link(self, link):
+    def resolve_drive_link(self, link, profile='preview'):
         file_id = extract_drive_id(link)
         
         if not file_id:
             print(f"Could not extract file ID from link: {link}")
             return None, None
         
-        info = self.get_file_info(file_id)
+        info = self.get_file_info(file_id, profile=profile)
         
         if not info:
             print(f"Could not retrieve file info for ID: {file_id}")
@@ -165,113 +441,446 @@ class DriveService:
         
         return file_id, info
     
-    def _execute_file_mutation(self, operation_name, request_func, parent_id=None):
-        result = self._retry_request(request_func, operation_name)
+    def is_offline(self):
+        return self.mutation_queue is not None and self.mutation_queue.offline
+    
+    def _should_queue(self):
+        return self.mutation_queue is not None and self.mutation_queue.should_queue()
+    
+    def _queue_mutation(self, kind, file_id, **args):
+        self.mutation_queue.enqueue(kind, file_id, **args)
+        self.metrics.inc('mutations_queued_total', kind=kind)
+    
+    def _known_file(self, file_id):
+        file = dict(self._cache.get(f"fileinfo_{file_id}", count=False) or {})
+        if 'parents' not in file and self.metadata_store:
+            file = {**(self.metadata_store.get_file_info(file_id) or {}), **file}
+        if 'parents' not in file and self.search_index:
+            file = {**(self.search_index.get(file_id) or {}), **file}
+        if 'parents' not in file and self.folder_index:
+            file = {**(self.folder_index.get(file_id) or {}), **file}
+        return file or {'id': file_id}
+    
+    def _patch_listings(self, folder_id, file_id, entry=None):
+        def patch(data, first_page):
+            files = list(data.get('files', []))
+            index = next((i for i, f in enumerate(files) if f.get('id') == file_id), None)
+            if index is not None:
+                if entry:
+                    files[index] = {**files[index], **entry}
+                else:
+                    del files[index]
+            elif entry and first_page:
+                if entry.get('mimeType') == FOLDER_MIME_TYPE:
+                    files.insert(0, entry)
+                else:
+                    files.append(entry)
+            else:
+                return None
+            return {**data, 'files': files}
+        
+        root_id = self.folder_index.root_id if self.folder_index else None
+        folder_ids = [root_id, 'root'] if root_id and folder_id in (root_id, 'root') else [folder_id]
+        
+        for listing_folder in folder_ids:
+            for key in self._cache.keys_for_folder(listing_folder):
+                if not key.startswith("files_"):
+                    continue
+                data = self._cache.get(key, count=False)
+                if data is None:
+                    continue
+                patched = patch(data, key.endswith("_None"))
+                if patched is not None:
+                    self._set_cache(key, patched, [listing_folder], self._cache.profile_of(key))
+            
+            if self.metadata_store:
+                self.metadata_store.patch_listings(listing_folder, patch)
+    
+    def _apply_local_patch(self, file, old_parents=(), removed=False):
+        file_id = file['id']
+        new_parents = [] if removed else file.get('parents', [])
+        
+        for parent in old_parents:
+            if parent not in new_parents:
+                self._patch_listings(parent, file_id)
+        for parent in new_parents:
+            self._patch_listings(parent, file_id, file)
         
-        if result and parent_id:
-            self._invalidate_cache(parent_id)
+        key = f"fileinfo_{file_id}"
+        if removed:
+            self._cache.invalidate(key)
+            if self.metadata_store:
+                self.metadata_store.invalidate_file(file_id)
+            if self.folder_index:
+                self.folder_index.remove(file_id)
+            if self.search_index:
+                self.search_index.remove(file_id)
+            return
+        
+        cached = self._cache.get(key, count=False)
+        if cached:
+            self._cache.set(key, {**cached, **file}, [file_id], self._cache.profile_of(key))
+        if self.folder_index and (file.get('mimeType') == FOLDER_MIME_TYPE or self.folder_index.get(file_id)):
+            self.folder_index.upsert({k: file[k] for k in ('id', 'name', 'mimeType', 'parents') if k in file})
+        self._index_files([file])
+    
+    def _write_through(self, file, old_parents=(), profile='mutation', parent_id=None):
+        self._apply_local_patch(file, old_parents)
+        if parent_id and parent_id not in file.get('parents', [parent_id]):
+            self._patch_listings(parent_id, file['id'], file)
+        key = f"fileinfo_{file['id']}"
+        cached = self._cache.get(key, count=False)
+        if cached:
+            if self.metadata_store:
+                self.metadata_store.put_file_info(cached, self._cache.profile_of(key))
+        else:
+            self._set_cache(key, file, [file['id']], profile)
+            if self.metadata_store:
+                self.metadata_store.put_file_info(file, profile)
+    
+    def _write_through_removal(self, file_id, known):
+        parents = known.get('parents') or self._listing_folders(file_id)
+        self._apply_local_patch({**known, 'id': file_id}, parents, removed=True)
+        self._invalidate_cache(file_id)
+    
+    def _discard_temp_entry(self, temp_id, parents):
+        self._apply_local_patch({'id': temp_id}, parents, removed=True)
+    
+    def _queue_create(self, kind, name, parent_id, mime_type, file_id=None, **args):
+        # A pre-allocated Drive id keeps the id callers save valid after replay.
+        temp_id = file_id or (self.id_pool.take() if self.id_pool else None) or new_temp_id()
+        self._queue_mutation(kind, temp_id, name=name, parent_id=parent_id, **args)
+        entry = {'id': temp_id, 'name': name, 'mimeType': mime_type, 'parents': [parent_id], 'pending': True}
+        if kind == 'upload':
+            entry['size'] = str(os.path.getsize(args['file_path']))
+        self._apply_local_patch(entry)
+        return entry
+    
+    def _queue_update(self, kind, file_id, **args):
+        known = self._known_file(file_id)
+        old_parents = known.get('parents') or self._listing_folders(file_id)
+        if 'modifiedTime' not in known:
+            known = {**self._listing_entry(file_id), **known}
+        known['parents'] = old_parents
+        self._queue_mutation(kind, file_id, base_modified=known.get('modifiedTime'), **args)
+        
+        if kind == 'delete':
+            self._apply_local_patch(known, old_parents, removed=True)
+            return True
+        
+        if kind == 'rename':
+            file = {**known, 'name': args['name']}
+        else:
+            file = {**known, 'parents': [args['new_parent_id']]}
+        self._apply_local_patch(file, old_parents)
+        return {'id': file_id, 'name': file.get('name'), 'parents': file.get('parents', []), 'pending': True}
+    
+    def _execute_file_mutation(self, operation_name, request_func, parent_id=None, profile='mutation'):
+        result = self._retry_request(request_func, operation_name, mutation=True)
+        
+        if result:
+            self._write_through(result, profile=profile, parent_id=parent_id)
         
         return result
     
-    def create_folder(self, folder_name, parent_id='root'):
+    def _await_pending(self, *file_ids):
+        if self.id_pool:
+            for file_id in file_ids:
+                self.id_pool.wait(file_id)
+    
+    def generate_ids(self, count=10):
+        def make_request():
+            return self.service.files().generateIds(count=count, space='drive').execute()
+        
+        result = self._retry_request(make_request, f"generate_ids({count})", interactive=False)
+        return result.get('ids', []) if result else []
+    
+    def create_folder(self, folder_name, parent_id='root', file_id=None):
+        self._await_pending(parent_id)
+        if self._should_queue():
+            return self._queue_create('create_folder', folder_name, parent_id, FOLDER_MIME_TYPE, file_id)
+        
         def make_request():
             file_metadata = {
                 'name': folder_name,
                 'mimeType': 'application/vnd.google-apps.folder',
                 'parents': [parent_id]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             return self.service.files().create(
                 body=file_metadata,
-                fields='id, name'
+                fields=file_fields('mutation')
             ).execute()
         
-        return self._execute_file_mutation(f"create_folder({folder_name})", make_request, parent_id)
+        folder = self._execute_file_mutation(f"create_folder({folder_name})", make_request, parent_id)
+        if folder is None and self._should_queue():
+            return self._queue_create('create_folder', folder_name, parent_id, FOLDER_MIME_TYPE, file_id)
+        
+        return folder
+    
+    def create_folder_optimistic(self, folder_name, parent_id='root', on_confirmed=None):
+        file_id = self.id_pool.take() if self.id_pool and not self._should_queue() else None
+        if file_id is None:
+            folder = self.create_folder(folder_name, parent_id)
+            if on_confirmed:
+                on_confirmed(folder)
+            return folder
+        
+        folder = {'id': file_id, 'name': folder_name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]}
+        self._write_through(folder)
+        self.id_pool.submit(file_id, 'confirm_folder', folder, on_confirmed)
+        return {**folder, 'pending': True}
+    
+    def confirm_folder(self, folder, on_confirmed=None):
+        parent_id = folder['parents'][0]
+        confirmed = self.create_folder(folder['name'], parent_id, file_id=folder['id'])
+        if confirmed is None:
+            # The create may have landed even though its response was lost; IDs make it safe to check.
+            confirmed = self.get_file_info(folder['id'], use_cache=False, profile='mutation')
+        
+        if confirmed is None:
+            self._discard_temp_entry(folder['id'], [parent_id])
+            result = 'failed'
+        else:
+            result = 'queued' if confirmed.get('pending') else 'confirmed'
+        self.metrics.inc('optimistic_creates_total', result=result)
+        
+        if on_confirmed:
+            on_confirmed(confirmed)
+        return confirmed
+    
+    def _cached_folder_files(self, folder_id, page_size=100):
+        cache_key = f"files_{folder_id}_{page_size}_None"
+        cached = self._cache.get(cache_key, count=False, profile='listing')
+        if not cached and self.metadata_store:
+            cached = self.metadata_store.get_listing(cache_key, 'listing')
+        return (cached or {}).get('files', [])
+    
+    def find_duplicate(self, file_path, parent_id='root', file_name=None):
+        size = os.path.getsize(file_path)
+        file_name = file_name or os.path.basename(file_path)
+        candidates = {}
+        try:
+            for f in self.iter_files(
+                parent_id,
+                f"name = '{escape_drive_query(file_name)}' and mimeType != '{FOLDER_MIME_TYPE}'",
+                order_by="name",
+                profile='upload'
+            ):
+                candidates[f['id']] = f
+        except IncompleteListingError as e:
+            print(f"Duplicate check incomplete: {e}")
+        
+        # Same content under another name is only looked for in a listing we already have.
+        others = [f['id'] for f in self._cached_folder_files(parent_id)
+                  if f['id'] not in candidates and f.get('mimeType') != FOLDER_MIME_TYPE
+                  and f.get('size') is not None and int(f['size']) == size]
+        if others:
+            candidates.update(self.get_file_info_many(others, profile='upload'))
+        
+        candidates = [f for f in candidates.values()
+                      if f and f.get('md5Checksum') and f.get('size') is not None and int(f['size']) == size]
+        if not candidates:
+            return None
+        
+        digest = self.deduper.md5(file_path)
+        return next((f for f in candidates if f['md5Checksum'] == digest), None)
+    
+    def copy_file(self, file_id, parent_id='root', new_name=None):
+        self._await_pending(file_id, parent_id)
+        
+        def make_request():
+            body = {'parents': [parent_id]}
+            if new_name:
+                body['name'] = new_name
+            return self.service.files().copy(
+                fileId=file_id,
+                body=body,
+                fields=file_fields('upload')
+            ).execute()
+        
+        return self._execute_file_mutation(f"copy_file({file_id})", make_request, parent_id, profile='upload')
+    
+    def _upload_duplicate(self, file_path, parent_id, file_name):
+        existing = self.find_duplicate(file_path, parent_id, file_name)
+        if not existing:
+            self.deduper.record(False)
+            self.metrics.inc('upload_dedupe_total', result='miss')
+            return None
+        
+        size = int(existing['size'])
+        if existing['name'] == file_name:
+            self.deduper.record(True, size)
+            self.metrics.inc('upload_dedupe_total', result='hit')
+            self.metrics.inc('upload_dedupe_bytes_saved_total', size)
+            return existing
+        
+        copied = self.copy_file(existing['id'], parent_id, file_name)
+        if copied:
+            self.deduper.record(True, size, copied=True)
+            self.metrics.inc('upload_dedupe_total', result='copy')
+            self.metrics.inc('upload_dedupe_bytes_saved_total', size)
+        return copied
     
-    def upload_file(self, file_path, parent_id='root', file_name=None, progress_callback=None):
+    def upload_file(self, file_path, parent_id='root', file_name=None, progress_callback=None, priority='transfer', dedupe=False, file_id=None):
+        entry_id = None
         try:
             if not file_name:
-                import os
                 file_name = os.path.basename(file_path)
+            
+            self._await_pending(parent_id)
+            if self._should_queue():
+                mime_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+                return self._queue_create('upload', file_name, parent_id, mime_type, file_id,
+                                          file_path=os.path.abspath(file_path), dedupe=dedupe)
+            
+            if dedupe and not file_id:
+                duplicate = self._upload_duplicate(file_path, parent_id, file_name)
+                if duplicate:
+                    return duplicate
                 
             file_metadata = {
                 'name': file_name,
                 'parents': [parent_id]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             
-            media = MediaFileUpload(file_path, resumable=True)
+            media = AdaptiveMediaFileUpload(file_path, self.transfer_policy)
             
             request = self.service.files().create(
                 body=file_metadata,
                 media_body=media,
-                fields='id, name, mimeType, size, webViewLink, parents'
+                fields=file_fields('upload')
             )
             
             response = None
+            if self.upload_journal:
+                entry_id, entry = self.upload_journal.begin(file_path, parent_id, file_name)
+                if entry['session_uri'] and file_id:
+                    # That session would create the file under a different id.
+                    self.upload_journal.reset(entry_id)
+                elif entry['session_uri']:
+                    response = self._resume_upload_session(request, entry_id, entry, media.size())
+            
             while response is None:
-                status, response = request.next_chunk()
+                nbytes = media.plan_chunk(request.resumable_progress)
+                with self.transfer_policy.transfer(nbytes, priority), \
+                        self.metrics.timer('drive_chunk_seconds', direction='upload'):
+                    status, response = request.next_chunk(num_retries=self.max_retries)
+                self.metrics.inc('drive_bytes_total', nbytes, direction='upload', priority=priority)
+                if entry_id and response is None:
+                    self.upload_journal.update(entry_id, request.resumable_uri, request.resumable_progress)
                 if status and progress_callback:
                     progress_callback(status.resumable_progress, status.total_size)
             
-            self._invalidate_cache(parent_id)
+            if entry_id:
+                self.upload_journal.complete(entry_id)
+            
+            self._write_through(response, profile='upload', parent_id=parent_id)
             
             return response
             
         except Exception as error:
+            if self.mutation_queue is not None and is_connection_error(error):
+                self.mutation_queue.set_offline(True)
             print(f"Error uploading file: {error}")
             return None
     
+    def _resume_upload_session(self, request, entry_id, entry, size):
+        status = self._query_upload_session(entry['session_uri'], size)
+        if status is None:
+            print(f"Upload session for {entry['file_name']} expired, starting over")
+            self.upload_journal.reset(entry_id)
+            return None
+        
+        offset, response = status
+        if response is None:
+            print(f"Resuming upload of {entry['file_name']} at byte {offset}/{size}")
+            request.resumable_uri = entry['session_uri']
+            request.resumable_progress = offset
+        return response
+    
+    def _query_upload_session(self, session_uri, size):
+        resp, content = self.service._http.request(
+            session_uri,
+            method='PUT',
+            body=b'',
+            headers={'Content-Range': f'bytes */{size}', 'Content-Length': '0'}
+        )
+        
+        if resp.status in (200, 201):
+            return size, json.loads(content)
+        if resp.status == 308:
+            committed = resp.get('range')
+            return (int(committed.split('-')[-1]) + 1 if committed else 0), None
+        return None
+    
+    def resume_pending_uploads(self, progress_callback=None):
+        if not self.upload_journal:
+            return []
+        
+        results = []
+        for entry in self.upload_journal.pending():
+            if not os.path.exists(entry['file_path']):
+                self.upload_journal.complete(entry['id'])
+                continue
+            # Offline changes replay first; the queued upload resumes this session itself.
+            if self._should_queue() or (self.mutation_queue is not None
+                                        and self.mutation_queue.has_queued_upload(entry['file_path'])):
+                continue
+            
+            result = self.upload_file(entry['file_path'], entry['parent_id'], entry['file_name'], progress_callback, priority='bulk')
+            if result and not result.get('pending'):
+                print(f"Finished interrupted upload: {entry['file_name']}")
+            results.append(result)
+        
+        return results
+    
     def update_file(self, file_id, file_path, new_name=None):
         try:
             file_metadata = {}
             if new_name:
                 file_metadata['name'] = new_name
             
-            media = MediaFileUpload(file_path, resumable=True)
+            media = AdaptiveMediaFileUpload(file_path, self.transfer_policy)
             
             updated_file = self.service.files().update(
                 fileId=file_id,
                 body=file_metadata,
                 media_body=media,
-                fields='id, name, mimeType, modifiedTime'
+                fields=file_fields('mutation')
             ).execute()
             
-            self._invalidate_cache(file_id)
+            self._write_through(updated_file)
             return updated_file
         except Exception as error:
             print(f"Error updating file: {error}")
             return None
 
+    def stream_file(self, file_id, sink, progress_callback=None, cancel_event=None, priority='transfer'):
+        return self.downloader.stream(file_id, sink, progress_callback, cancel_event, priority)
+    
+    def download_to_file(self, file_id, destination, progress_callback=None, cancel_event=None, size=None, priority='transfer'):
+        return self.downloader.download(file_id, destination, progress_callback, cancel_event, size, priority)
+
     def read_file_content(self, file_id):
+        file = io.BytesIO()
+        if not self.stream_file(file_id, file):
+            return None
+        
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            file = io.BytesIO()
-            downloader = MediaIoBaseDownload(file, request)
-            done = False
-            while done is False:
-                done = downloader.next_chunk()
-            
             return file.getvalue().decode('utf-8')
-        except Exception as error:
+        except UnicodeDecodeError as error:
             print(f"Error reading file content: {error}")
             return None
 
     def download_file_content(self, file_id):
-        try:
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            fh.seek(0)
-            content = fh.read().decode('utf-8')
-            return content
-        except Exception as e:
-            print(f"Error downloading file content: {e}")
-            return None
+        return self.read_file_content(file_id)
 
     def find_file(self, name, parent_id):
-        query = f"name = '{name}' and '{parent_id}' in parents and trashed=false"
+        query = f"name = '{escape_drive_query(name)}' and '{parent_id}' in parents and trashed=false"
         results = self.service.files().list(
             q=query,
             pageSize=1,
@@ -281,71 +890,126 @@ class DriveService:
         return files[0] if files else None
 
     def move_file(self, file_id, new_parent_id):
+        self._await_pending(file_id, new_parent_id)
+        if self._should_queue():
+            return self._queue_update('move', file_id, new_parent_id=new_parent_id)
+        
+        known_parents = self._known_file(file_id).get('parents') or self._listing_folders(file_id)
+        
         def make_request():
-            file = self.service.files().get(
-                fileId=file_id,
-                fields='parents'
-            ).execute()
-            
-            previous_parents = ",".join(file.get('parents', []))
+            previous_parents = known_parents
+            if not previous_parents:
+                previous_parents = self.service.files().get(
+                    fileId=file_id,
+                    fields=file_fields('parents')
+                ).execute().get('parents', [])
             
             return self.service.files().update(
                 fileId=file_id,
                 addParents=new_parent_id,
-                removeParents=previous_parents,
-                fields='id, parents'
+                removeParents=",".join(p for p in previous_parents if p != new_parent_id),
+                fields=file_fields('mutation')
             ).execute()
         
-        updated_file = self._retry_request(make_request, f"move_file({file_id})")
+        updated_file = self._retry_request(make_request, f"move_file({file_id})", mutation=True)
+        if updated_file is None and self._should_queue():
+            return self._queue_update('move', file_id, new_parent_id=new_parent_id)
         
-        if updated_file:
-            file = self.service.files().get(fileId=file_id, fields='parents').execute()
-            for parent in file.get('parents', []):
-                self._invalidate_cache(parent)
-            self._invalidate_cache(new_parent_id)
+        if updated_file is None:
+            return None
+        
+        stale_parents = [p for p in updated_file.get('parents', []) if p != new_parent_id]
+        if stale_parents:
+            self.metrics.inc('drive_cache_drift_total', operation='move_file')
+            
+            def remove_stale():
+                return self.service.files().update(
+                    fileId=file_id,
+                    removeParents=",".join(stale_parents),
+                    fields=file_fields('mutation')
+                ).execute()
+            
+            updated_file = self._retry_request(remove_stale, f"move_file({file_id})", mutation=True) or updated_file
         
+        self._write_through(updated_file, known_parents + stale_parents)
         return updated_file
     
     def rename_file(self, file_id, new_name):
+        self._await_pending(file_id)
+        if self._should_queue():
+            return self._queue_update('rename', file_id, name=new_name)
+        
+        known_parents = self._known_file(file_id).get('parents', [])
+        
         def make_request():
             file_metadata = {'name': new_name}
             return self.service.files().update(
                 fileId=file_id,
                 body=file_metadata,
-                fields='id, name, parents'
+                fields=file_fields('mutation')
             ).execute()
         
-        updated_file = self._retry_request(make_request, f"rename_file({file_id})")
+        updated_file = self._retry_request(make_request, f"rename_file({file_id})", mutation=True)
+        if updated_file is None and self._should_queue():
+            return self._queue_update('rename', file_id, name=new_name)
         
         if updated_file:
-            for parent in updated_file.get('parents', []):
-                self._invalidate_cache(parent)
-            self._invalidate_cache(file_id)
+            self._write_through(updated_file, known_parents)
         
         return updated_file
     
     def delete_file(self, file_id):
-        file_info = self.get_file_info(file_id, use_cache=False)
+        self._await_pending(file_id)
+        if self._should_queue():
+            return self._queue_update('delete', file_id)
+        
+        known = self._known_file(file_id)
         
         def make_request():
             self.service.files().delete(fileId=file_id).execute()
             return True
         
-        success = self._retry_request(make_request, f"delete_file({file_id})")
+        success = self._retry_request(make_request, f"delete_file({file_id})", mutation=True)
+        if success is None and self._should_queue():
+            return self._queue_update('delete', file_id)
         
         if success:
-            if file_info and 'parents' in file_info:
-                for parent in file_info['parents']:
-                    self._invalidate_cache(parent)
-            self._invalidate_cache(file_id)
+            self._write_through_removal(file_id, known)
             return True
         
         return False
     
+    def delete_files(self, file_ids):
+        file_ids = list(dict.fromkeys(file_ids))
+        self._await_pending(*file_ids)
+        if self._should_queue():
+            return {file_id: self._queue_update('delete', file_id) for file_id in file_ids}
+        
+        known = {file_id: self._known_file(file_id) for file_id in file_ids}
+        results = {}
+        
+        def on_response(file_id, response, error):
+            results[file_id] = error is None
+            if error is None:
+                self._write_through_removal(file_id, known[file_id])
+        
+        with self.batch() as batch:
+            for file_id in file_ids:
+                batch.add(
+                    self.service.files().delete(fileId=file_id),
+                    callback=on_response,
+                    request_id=file_id
+                )
+        
+        return results
+    
     def get_folder_tree(self, folder_id='root', max_depth=2, current_depth=0):
         if current_depth >= max_depth:
             return None
         
+        if self.folder_index and self.folder_index.ensure():
+            return self.folder_index.subtree(folder_id, max_depth - current_depth)
+        
         query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
         result = self._execute_file_list_query(query, page_size=100, fields="files(id, name)", order_by="name")
         folders = result.get('files', []) if result else []
@@ -2,9 +2,14 @@ import flet as ft
 import base64
 import mimetypes
 import io
-from googleapiclient.http import MediaIoBaseDownload
+import os
+import shutil
+import threading
+from pathlib import Path
 from utils.common import show_snackbar
 
+INLINE_PREVIEW_MAX_BYTES = 10 * 1024 * 1024
+
 
 class FilePreviewService:
 
@@ -12,6 +17,9 @@ class FilePreviewService:
         self.page = page
         self.drive_service = drive_service
         self.current_overlay = None
+        self._download_status = None
+        self._download_progress = None
+        self._download_cancel = None
     
     def show_preview(self, file_id=None, file_path=None, file_name="File"):
         content_container = ft.Container(
@@ -80,23 +88,23 @@ class FilePreviewService:
         
         try:
             
-            file_info = self.drive_service.get_file_info(file_id)
+            file_info = self.drive_service.get_file_info(file_id, profile='preview')
             mime_type = file_info.get('mimeType', '')
+            size = int(file_info.get('size') or 0)
             
+            file_data = None
+            if self._is_inline(mime_type) and size <= INLINE_PREVIEW_MAX_BYTES:
+                file_buffer = io.BytesIO()
+                if not self.drive_service.stream_file(file_id, file_buffer):
+                    raise IOError("download failed")
+                file_data = file_buffer.getvalue()
+                size = len(file_data)
             
-            request = self.drive_service.service.files().get_media(fileId=file_id)
-            file_buffer = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_buffer, request)
-            
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            
-            file_buffer.seek(0)
-            file_data = file_buffer.read()
-            
-            
-            self._render_preview(file_data, mime_type, file_name, container, file_id, close_callback)
+            self._render_preview(
+                file_data, mime_type, file_name, container, file_id, close_callback,
+                size=size,
+                on_download=lambda: self._download_from_drive(file_id, file_name, size)
+            )
             
         except Exception as e:
             container.content = self._create_error_view(
@@ -109,31 +117,42 @@ class FilePreviewService:
         
         try:
             mime_type, _ = mimetypes.guess_type(file_path)
+            size = os.path.getsize(file_path)
             
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            file_data = None
+            if self._is_inline(mime_type) and size <= INLINE_PREVIEW_MAX_BYTES:
+                with open(file_path, 'rb') as f:
+                    file_data = f.read()
             
-            self._render_preview(file_data, mime_type, file_name, container, None, close_callback)
+            self._render_preview(
+                file_data, mime_type, file_name, container, None, close_callback,
+                size=size,
+                on_download=lambda: self._copy_to_downloads(file_path, file_name)
+            )
             
         except Exception as e:
             container.content = self._create_error_view(f"Error loading file: {str(e)}")
             self.page.update()
     
-    def _render_preview(self, file_data, mime_type, file_name, container, file_id=None, close_callback=None):
+    def _is_inline(self, mime_type):
+        return bool(mime_type) and (mime_type.startswith('image/') or mime_type.startswith('text/'))
+    
+    def _render_preview(self, file_data, mime_type, file_name, container, file_id=None, close_callback=None,
+                        size=None, on_download=None):
         
         preview_widget = None
-        size_mb = len(file_data) / (1024 * 1024)
+        size_mb = (len(file_data) if file_data is not None else size or 0) / (1024 * 1024)
         
         
-        if mime_type and mime_type.startswith('image/'):
+        if file_data is not None and mime_type.startswith('image/'):
             preview_widget = self._create_image_preview(file_data, size_mb)
         
         
         elif mime_type == 'application/pdf':
-            preview_widget = self._create_pdf_preview(file_data, file_name, size_mb, file_id)
+            preview_widget = self._create_pdf_preview(on_download, file_name, size_mb, file_id)
         
         
-        elif mime_type and mime_type.startswith('text/'):
+        elif file_data is not None and mime_type.startswith('text/'):
             preview_widget = self._create_text_preview(file_data, size_mb)
         
         
@@ -141,26 +160,32 @@ class FilePreviewService:
             'application/msword',
             'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
         ]:
-            preview_widget = self._create_word_preview(file_data, file_name, size_mb, file_id)
+            preview_widget = self._create_word_preview(on_download, file_name, size_mb, file_id)
         
         
         elif mime_type in [
             'application/vnd.ms-excel',
             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         ]:
-            preview_widget = self._create_excel_preview(file_data, file_name, size_mb, file_id)
+            preview_widget = self._create_excel_preview(on_download, file_name, size_mb, file_id)
         
         elif mime_type in [
             'application/vnd.ms-powerpoint',
             'application/vnd.openxmlformats-officedocument.presentationml.presentation'
         ]:
-            preview_widget = self._create_powerpoint_preview(file_data, file_name, size_mb, file_id)
+            preview_widget = self._create_powerpoint_preview(on_download, file_name, size_mb, file_id)
         
         else:
-            preview_widget = self._create_default_preview(file_data, file_name, mime_type, size_mb, file_id)
+            preview_widget = self._create_default_preview(on_download, file_name, mime_type, size_mb, file_id)
+        
+        self._download_progress = ft.ProgressBar(width=400, value=0)
+        self._download_status = ft.Row([
+            self._download_progress,
+            ft.TextButton("Cancel", on_click=lambda e: self._cancel_download())
+        ], alignment=ft.MainAxisAlignment.CENTER, visible=False)
         
         container.content = ft.Column(
-            [preview_widget],
+            [preview_widget, self._download_status],
             scroll="auto",
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             alignment=ft.MainAxisAlignment.CENTER
@@ -181,7 +206,7 @@ class FilePreviewService:
             ft.Text(f"Size: {size_mb:.2f} MB", size=12, color=ft.Colors.GREY_600)
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
     
-    def _create_pdf_preview(self, file_data, file_name, size_mb, file_id):
+    def _create_pdf_preview(self, on_download, file_name, size_mb, file_id):
         return ft.Column([
             ft.Icon(ft.Icons.PICTURE_AS_PDF, size=100, color=ft.Colors.RED),
             ft.Text("PDF Document", size=20, weight=ft.FontWeight.BOLD),
@@ -192,7 +217,7 @@ class FilePreviewService:
                 ft.ElevatedButton(
                     "Download PDF",
                     icon=ft.Icons.DOWNLOAD,
-                    on_click=lambda e: self._download_file(file_data, file_name)
+                    on_click=lambda e: on_download()
                 ),
                 ft.ElevatedButton(
                     "Open in Browser",
@@ -228,7 +253,7 @@ class FilePreviewService:
                 ft.Text("File may be binary or use unsupported encoding", size=12, italic=True)
             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
     
-    def _create_word_preview(self, file_data, file_name, size_mb, file_id):
+    def _create_word_preview(self, on_download, file_name, size_mb, file_id):
         return ft.Column([
             ft.Icon(ft.Icons.DESCRIPTION, size=100, color=ft.Colors.BLUE),
             ft.Text("Word Document", size=20, weight=ft.FontWeight.BOLD),
@@ -240,7 +265,7 @@ class FilePreviewService:
                 ft.ElevatedButton(
                     "Download Document",
                     icon=ft.Icons.DOWNLOAD,
-                    on_click=lambda e: self._download_file(file_data, file_name)
+                    on_click=lambda e: on_download()
                 ),
                 ft.ElevatedButton(
                     "Open in Browser",
@@ -251,7 +276,7 @@ class FilePreviewService:
             ], spacing=10)
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10)
     
-    def _create_excel_preview(self, file_data, file_name, size_mb, file_id):
+    def _create_excel_preview(self, on_download, file_name, size_mb, file_id):
         return ft.Column([
             ft.Icon(ft.Icons.TABLE_CHART, size=100, color=ft.Colors.GREEN),
             ft.Text("Spreadsheet Document", size=20, weight=ft.FontWeight.BOLD),
@@ -262,7 +287,7 @@ class FilePreviewService:
                 ft.ElevatedButton(
                     "Download Spreadsheet",
                     icon=ft.Icons.DOWNLOAD,
-                    on_click=lambda e: self._download_file(file_data, file_name)
+                    on_click=lambda e: on_download()
                 ),
                 ft.ElevatedButton(
                     "Open in Browser",
@@ -273,7 +298,7 @@ class FilePreviewService:
             ], spacing=10)
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10)
     
-    def _create_powerpoint_preview(self, file_data, file_name, size_mb, file_id):
+    def _create_powerpoint_preview(self, on_download, file_name, size_mb, file_id):
         return ft.Column([
             ft.Icon(ft.Icons.SLIDESHOW, size=100, color=ft.Colors.ORANGE),
             ft.Text("Presentation Document", size=20, weight=ft.FontWeight.BOLD),
@@ -284,7 +309,7 @@ class FilePreviewService:
                 ft.ElevatedButton(
                     "Download Presentation",
                     icon=ft.Icons.DOWNLOAD,
-                    on_click=lambda e: self._download_file(file_data, file_name)
+                    on_click=lambda e: on_download()
                 ),
                 ft.ElevatedButton(
                     "Open in Browser",
@@ -295,7 +320,7 @@ class FilePreviewService:
             ], spacing=10)
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10)
     
-    def _create_default_preview(self, file_data, file_name, mime_type, size_mb, file_id):
+    def _create_default_preview(self, on_download, file_name, mime_type, size_mb, file_id):
         ext = file_name.split('.')[-1].lower() if '.' in file_name else ''
         
         icon_map = {
@@ -324,7 +349,7 @@ class FilePreviewService:
                 ft.ElevatedButton(
                     "Download File",
                     icon=ft.Icons.DOWNLOAD,
-                    on_click=lambda e: self._download_file(file_data, file_name)
+                    on_click=lambda e: on_download()
                 ),
                 ft.ElevatedButton(
                     "Open in Browser",
@@ -347,21 +372,64 @@ class FilePreviewService:
             ) if file_id else ft.Container()
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
     
-    def _download_file(self, file_data, file_name):
+    def _downloads_path(self, file_name):
+        downloads_path = Path.home() / "Downloads" / file_name
+        
+        counter = 1
+        original_path = downloads_path
+        while downloads_path.exists():
+            name, ext = original_path.stem, original_path.suffix
+            downloads_path = original_path.parent / f"{name} ({counter}){ext}"
+            counter += 1
+        
+        return downloads_path
+    
+    def _download_from_drive(self, file_id, file_name, size=None):
+        if self._download_cancel and not self._download_cancel.is_set():
+            show_snackbar(self.page, "A download is already in progress", ft.Colors.ORANGE)
+            return
+        
+        downloads_path = self._downloads_path(file_name)
+        cancel_event = threading.Event()
+        self._download_cancel = cancel_event
+        self._set_download_progress(0, size, visible=True)
+        
         try:
-            from pathlib import Path
-            
-            downloads_path = Path.home() / "Downloads" / file_name
-            
-            counter = 1
-            original_path = downloads_path
-            while downloads_path.exists():
-                name, ext = original_path.stem, original_path.suffix
-                downloads_path = original_path.parent / f"{name} ({counter}){ext}"
-                counter += 1
-            
-            with open(downloads_path, 'wb') as f:
-                f.write(file_data)
+            result = self.drive_service.download_to_file(
+                file_id, downloads_path,
+                progress_callback=self._set_download_progress,
+                cancel_event=cancel_event,
+                size=size or None
+            )
+        finally:
+            cancel_event.set()
+            self._set_download_progress(0, size, visible=False)
+        
+        if result:
+            show_snackbar(self.page, f"✓ Downloaded to: {downloads_path.name}", ft.Colors.GREEN)
+        else:
+            show_snackbar(self.page, "✗ Download cancelled or failed", ft.Colors.RED)
+    
+    def _set_download_progress(self, done, total, visible=None):
+        status = self._download_status
+        if status is None:
+            return
+        if visible is not None:
+            status.visible = visible
+        self._download_progress.value = done / total if total else None
+        try:
+            self.page.update()
+        except Exception:
+            pass
+    
+    def _cancel_download(self):
+        if self._download_cancel:
+            self._download_cancel.set()
+    
+    def _copy_to_downloads(self, file_path, file_name):
+        try:
+            downloads_path = self._downloads_path(file_name)
+            shutil.copyfile(file_path, downloads_path)
             
             show_snackbar(self.page, f"✓ Downloaded to: {downloads_path.name}", ft.Colors.GREEN)
         except Exception as e:
@@ -0,0 +1,149 @@
+import threading
+import time
+from services.drive_service import IncompleteListingError
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class FolderIndex:
+
+    def __init__(self, drive, max_age=None):
+        self.drive = drive
+        self.max_age = max_age
+        self.root_id = None
+        self.loaded_at = None
+        self._folders = {}
+        self._children = {}
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+    def is_warm(self):
+        if self.loaded_at is None:
+            return False
+        return self.max_age is None or time.monotonic() - self.loaded_at < self.max_age
+
+    def ensure(self):
+        if self.is_warm():
+            return True
+        return self.refresh()
+
+    def refresh(self):
+        with self._refresh_lock:
+            root = self.drive.get_file_info('root', profile='minimal')
+            if not root:
+                return self.is_warm()
+
+            folders = {}
+            pages = 0
+            try:
+                for files in self.drive.iter_pages(
+                    folder_id=None,
+                    query=f"mimeType='{FOLDER_MIME_TYPE}'",
+                    page_size=1000,
+                    order_by="name",
+                    profile='folder'
+                ):
+                    pages += 1
+                    for folder in files:
+                        folders[folder['id']] = folder
+            except IncompleteListingError:
+                print(f"Folder index crawl interrupted after {len(folders)} folder(s); keeping previous index")
+                return self.is_warm()
+
+            with self._lock:
+                self.root_id = root['id']
+                self._folders = folders
+                self._children = {}
+                for folder in folders.values():
+                    self._link(folder)
+                self.loaded_at = time.monotonic()
+
+            print(f"Folder index loaded {len(folders)} folder(s) in {pages} request(s)")
+            return True
+
+    def _resolve(self, folder_id):
+        return self.root_id if folder_id == 'root' and self.root_id else folder_id
+
+    def _link(self, folder):
+        for parent in folder.get('parents', []):
+            siblings = self._children.setdefault(parent, [])
+            if folder['id'] not in siblings:
+                siblings.append(folder['id'])
+                siblings.sort(key=lambda fid: self._folders[fid].get('name', '').lower())
+
+    def _unlink(self, folder):
+        for parent in folder.get('parents', []):
+            siblings = self._children.get(parent)
+            if siblings and folder['id'] in siblings:
+                siblings.remove(folder['id'])
+
+    def get(self, folder_id):
+        with self._lock:
+            return self._folders.get(self._resolve(folder_id))
+
+    def children(self, folder_id):
+        with self._lock:
+            return [dict(self._folders[fid]) for fid in self._children.get(self._resolve(folder_id), [])]
+
+    def child_count(self, folder_id):
+        with self._lock:
+            return len(self._children.get(self._resolve(folder_id), []))
+
+    def subtree(self, folder_id='root', max_depth=2):
+        if max_depth <= 0:
+            return None
+
+        with self._lock:
+            tree = []
+            for fid in self._children.get(self._resolve(folder_id), []):
+                folder = self._folders[fid]
+                tree.append({
+                    'id': fid,
+                    'name': folder.get('name'),
+                    'children': self.subtree(fid, max_depth - 1)
+                })
+            return tree
+
+    def path(self, folder_id):
+        with self._lock:
+            path = []
+            seen = set()
+            current = self._folders.get(self._resolve(folder_id))
+            while current and current['id'] not in seen:
+                seen.add(current['id'])
+                path.append({'id': current['id'], 'name': current.get('name')})
+                parents = current.get('parents') or []
+                current = self._folders.get(parents[0]) if parents else None
+            return list(reversed(path))
+
+    def upsert(self, folder):
+        if not folder or not folder.get('id') or self.loaded_at is None:
+            return
+        with self._lock:
+            if 'parents' in folder:
+                folder = dict(folder, parents=[self._resolve(p) for p in folder['parents']])
+            existing = self._folders.get(folder['id'])
+            if existing:
+                self._unlink(existing)
+                folder = {**existing, **folder}
+            self._folders[folder['id']] = folder
+            self._link(folder)
+
+    def remove(self, folder_id):
+        with self._lock:
+            folder = self._folders.pop(folder_id, None)
+            if folder:
+                self._unlink(folder)
+                for child_id in list(self._children.pop(folder_id, [])):
+                    self.remove(child_id)
+
+    def apply_change(self, change):
+        file_id = change.get('fileId')
+        file = change.get('file') or {}
+        if not file_id or self.loaded_at is None:
+            return
+
+        if change.get('removed') or file.get('trashed'):
+            self.remove(file_id)
+        elif file.get('mimeType') == FOLDER_MIME_TYPE:
+            self.upsert({k: file[k] for k in ('id', 'name', 'mimeType', 'parents') if k in file})
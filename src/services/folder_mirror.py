@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import threading
+from services.concurrent_drive_service import ConcurrentDriveService
+from services.drive_fields import list_fields
+from services.upload_dedupe import file_md5
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+MANIFEST_NAME = ".drive_mirror.json"
+PARENTS_PER_QUERY = 40
+CONFLICT_SUFFIX = " (Drive copy)"
+
+
+def safe_name(name):
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip() or '_'
+
+
+class FolderMirror:
+
+    def __init__(self, service_factory, drive, folder_id, local_dir, max_workers=4, propagate_deletes=False):
+        self.drive = drive
+        self.folder_id = folder_id
+        self.local_dir = os.path.abspath(local_dir)
+        self.propagate_deletes = propagate_deletes
+        self.manifest_path = os.path.join(self.local_dir, MANIFEST_NAME)
+        self._workers = ConcurrentDriveService(service_factory, max_workers=max_workers, drive=drive)
+        self._lock = threading.RLock()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('folder_id') != self.folder_id:
+            return {}
+        return manifest.get('files', {})
+
+    def _save_manifest(self, entries):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'folder_id': self.folder_id, 'files': entries}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _local_path(self, rel_path):
+        return os.path.join(self.local_dir, *rel_path.split('/'))
+
+    def _query_children(self, parent_ids):
+        query = "(" + " or ".join(f"'{fid}' in parents" for fid in parent_ids) + ") and trashed=false"
+        files = []
+        page_token = None
+        while True:
+            result = self.drive._execute_file_list_query(
+                query, 1000, page_token, fields=list_fields('mirror'), order_by="name"
+            )
+            if result is None:
+                return None
+            files.extend(result.get('files', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return files
+
+    def _list_remote(self):
+        folders = {'': self.folder_id}
+        files = {}
+        frontier = [('', self.folder_id)]
+
+        while frontier:
+            batch, frontier = frontier[:PARENTS_PER_QUERY], frontier[PARENTS_PER_QUERY:]
+            rel_by_id = {fid: rel for rel, fid in batch}
+            children = self._query_children(list(rel_by_id))
+            if children is None:
+                return None, None
+
+            for child in sorted(children, key=lambda c: c['id']):
+                parent_rel = next((rel_by_id[p] for p in child.get('parents', []) if p in rel_by_id), '')
+                rel_path = f"{parent_rel}/{safe_name(child['name'])}".lstrip('/')
+                if rel_path in folders or rel_path in files:
+                    stem, ext = os.path.splitext(rel_path)
+                    if child.get('mimeType') == FOLDER_MIME_TYPE:
+                        stem, ext = rel_path, ''
+                    unique = f"{stem} ({child['id']}){ext}"
+                    print(f"Mirror: '{rel_path}' exists more than once on Drive; saving {child['id']} as '{unique}'")
+                    rel_path = unique
+                if child.get('mimeType') == FOLDER_MIME_TYPE:
+                    folders[rel_path] = child['id']
+                    frontier.append((rel_path, child['id']))
+                else:
+                    files[rel_path] = child
+
+        return files, folders
+
+    def _scan_local(self):
+        files = {}
+        dirs = set()
+        for root, dirnames, filenames in os.walk(self.local_dir):
+            rel_root = os.path.relpath(root, self.local_dir).replace(os.sep, '/')
+            rel_root = '' if rel_root == '.' else rel_root
+            for dirname in dirnames:
+                dirs.add(f"{rel_root}/{dirname}".lstrip('/'))
+            for filename in filenames:
+                if filename in (MANIFEST_NAME, MANIFEST_NAME + ".tmp") or filename.endswith('.part'):
+                    continue
+                if os.path.splitext(filename)[0].endswith(CONFLICT_SUFFIX):
+                    continue
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                files[f"{rel_root}/{filename}".lstrip('/')] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        return files, dirs
+
+    def _remote_changed(self, remote, entry):
+        if remote.get('md5Checksum') and entry.get('md5'):
+            return remote['md5Checksum'] != entry['md5']
+        return remote.get('modifiedTime') != entry.get('modifiedTime')
+
+    def _local_changed(self, local, entry):
+        return local['size'] != entry.get('local_size') or local['mtime'] != entry.get('local_mtime')
+
+    def plan(self, remote_files, local_files, manifest):
+        actions = []
+        for rel_path in sorted(set(remote_files) | set(local_files)):
+            remote = remote_files.get(rel_path)
+            local = local_files.get(rel_path)
+            entry = manifest.get(rel_path)
+
+            if remote and 'size' not in remote:
+                actions.append(('skip', rel_path))
+            elif remote and local and entry:
+                remote_changed = self._remote_changed(remote, entry) or remote['id'] != entry.get('id')
+                local_changed = self._local_changed(local, entry)
+                if remote_changed and local_changed:
+                    actions.append(('conflict', rel_path))
+                elif remote_changed:
+                    actions.append(('download', rel_path))
+                elif local_changed:
+                    actions.append(('update', rel_path))
+                else:
+                    actions.append(('keep', rel_path))
+            elif remote and local:
+                actions.append(('compare', rel_path))
+            elif remote:
+                if entry and entry.get('id') == remote['id'] and not self._remote_changed(remote, entry):
+                    actions.append(('delete_remote' if self.propagate_deletes else 'download', rel_path))
+                else:
+                    actions.append(('download', rel_path))
+            elif local:
+                if entry and not self._local_changed(local, entry):
+                    actions.append(('delete_local', rel_path))
+                else:
+                    actions.append(('upload', rel_path))
+        return actions
+
+    def _ensure_remote_folder(self, drive, rel_dir, folders):
+        with self._lock:
+            if rel_dir in folders:
+                return folders[rel_dir]
+            parent_rel = rel_dir.rsplit('/', 1)[0] if '/' in rel_dir else ''
+            parent_id = folders.get(parent_rel) or self._ensure_remote_folder(drive, parent_rel, folders)
+            folder = drive.create_folder(rel_dir.rsplit('/', 1)[-1], parent_id)
+            if not folder:
+                return None
+            folders[rel_dir] = folder['id']
+            return folder['id']
+
+    def _manifest_entry(self, remote, path, md5=None):
+        stat = os.stat(path)
+        return {
+            'id': remote['id'],
+            'md5': md5 or remote.get('md5Checksum'),
+            'modifiedTime': remote.get('modifiedTime'),
+            'size': int(remote['size']) if remote.get('size') is not None else stat.st_size,
+            'local_size': stat.st_size,
+            'local_mtime': stat.st_mtime,
+        }
+
+    def _execute(self, drive, action, rel_path, remote_files, folders, manifest):
+        remote = remote_files.get(rel_path)
+        path = self._local_path(rel_path)
+
+        if action == 'compare':
+            if remote.get('md5Checksum') and file_md5(path) == remote['md5Checksum']:
+                return 'keep', self._manifest_entry(remote, path)
+            action = 'conflict'
+
+        if action == 'download':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not drive.download_to_file(remote['id'], path, size=int(remote['size']), priority='bulk'):
+                return 'error', manifest.get(rel_path)
+            return 'downloaded', self._manifest_entry(remote, path)
+
+        if action == 'conflict':
+            stem, ext = os.path.splitext(path)
+            copy_path = f"{stem}{CONFLICT_SUFFIX}{ext}"
+            if not drive.download_to_file(remote['id'], copy_path, size=int(remote['size']), priority='bulk'):
+                return 'error', manifest.get(rel_path)
+            # Remember the remote version we saved so it isn't downloaded again; the
+            # local edit stays marked as changed and is uploaded on the next sync.
+            previous = manifest.get(rel_path) or {}
+            return 'conflict', {
+                **self._manifest_entry(remote, copy_path),
+                'local_size': previous.get('local_size'),
+                'local_mtime': previous.get('local_mtime'),
+            }
+
+        if action in ('upload', 'update'):
+            md5 = file_md5(path)
+            if action == 'update':
+                result = drive.update_file(manifest[rel_path]['id'], path)
+            else:
+                rel_dir = rel_path.rsplit('/', 1)[0] if '/' in rel_path else ''
+                parent_id = self._ensure_remote_folder(drive, rel_dir, folders)
+                result = parent_id and drive.upload_file(path, parent_id, rel_path.rsplit('/', 1)[-1], priority='bulk')
+            if not result:
+                return 'error', manifest.get(rel_path)
+            return 'uploaded', self._manifest_entry({**result, 'md5Checksum': md5}, path, md5)
+
+        if action == 'delete_local':
+            os.remove(path)
+            return 'deleted_local', None
+
+        if action == 'delete_remote':
+            return ('deleted_remote', None) if drive.delete_file(remote['id']) else ('error', manifest.get(rel_path))
+
+        return action, manifest.get(rel_path)
+
+    def sync(self, progress_callback=None):
+        os.makedirs(self.local_dir, exist_ok=True)
+        manifest = self._load_manifest()
+
+        remote_files, folders = self._list_remote()
+        if remote_files is None:
+            print(f"Mirror of {self.folder_id} aborted: could not list Drive folder")
+            return None
+
+        local_files, local_dirs = self._scan_local()
+        for rel_dir in sorted(set(folders) - local_dirs - {''}):
+            os.makedirs(self._local_path(rel_dir), exist_ok=True)
+
+        actions = self.plan(remote_files, local_files, manifest)
+        summary = {'downloaded': 0, 'uploaded': 0, 'deleted_local': 0, 'deleted_remote': 0,
+                   'conflict': 0, 'skip': 0, 'keep': 0, 'error': 0}
+        entries = {}
+        pending = []
+
+        for action, rel_path in actions:
+            if action in ('keep', 'skip'):
+                summary[action] += 1
+                if action == 'keep':
+                    entries[rel_path] = manifest[rel_path]
+            else:
+                pending.append((rel_path, self._workers.submit_task(
+                    self._execute, action, rel_path, remote_files, folders, manifest
+                )))
+
+        for done, (rel_path, future) in enumerate(pending, 1):
+            try:
+                outcome, entry = future.result()
+            except Exception as e:
+                print(f"Mirror error on {rel_path}: {e}")
+                outcome, entry = 'error', manifest.get(rel_path)
+            summary[outcome] += 1
+            if entry:
+                entries[rel_path] = entry
+            if progress_callback:
+                progress_callback(done, len(pending))
+
+        self._save_manifest(entries)
+        print(f"Mirror of {self.folder_id} -> {self.local_dir}: {summary}")
+        return summary
+
+    def shutdown(self):
+        self._workers.shutdown()
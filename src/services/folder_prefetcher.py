@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from collections import deque
+from services.concurrent_drive_service import ConcurrentDriveService
+
+RECENT_FOLDERS_KEY = "recent_folders"
+MAX_RECENT_FOLDERS = 200
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_FOLDERS = 8
+PREFETCH_PER_MINUTE = 120
+
+
+class FolderPrefetcher:
+
+    def __init__(self, drive, service_factory, saved_ids=None, max_workers=PREFETCH_WORKERS,
+                 max_folders=PREFETCH_MAX_FOLDERS, per_minute=PREFETCH_PER_MINUTE):
+        self.drive = drive
+        self.saved_ids = saved_ids
+        self.max_folders = max_folders
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._recent_requests = deque()
+        self._visits = self._load_visits()
+        self._workers = ConcurrentDriveService(service_factory, max_workers=max_workers, drive=drive)
+
+    def _load_visits(self):
+        store = self.drive.metadata_store
+        if not store:
+            return {}
+        try:
+            return json.loads(store.get_meta(RECENT_FOLDERS_KEY) or "{}")
+        except ValueError:
+            return {}
+
+    def record_visit(self, folder_id):
+        with self._lock:
+            self._visits[folder_id] = time.time()
+            if len(self._visits) > MAX_RECENT_FOLDERS:
+                recent = sorted(self._visits.items(), key=lambda item: item[1], reverse=True)
+                self._visits = dict(recent[:MAX_RECENT_FOLDERS])
+            data = json.dumps(self._visits)
+        if self.drive.metadata_store:
+            self.drive.metadata_store.set_meta(RECENT_FOLDERS_KEY, data)
+
+    def rank(self, folders):
+        saved = set(self.saved_ids()) if self.saved_ids else set()
+        with self._lock:
+            visits = dict(self._visits)
+        order = sorted(
+            enumerate(folders),
+            key=lambda item: (item[1]['id'] not in saved, -visits.get(item[1]['id'], 0), item[0])
+        )
+        return [folder for _, folder in order]
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+
+    def prefetch(self, folders, page_size=100, profile='listing'):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        if self.drive.is_offline():
+            return 0
+
+        targets = self.rank(folders)[:self.max_folders]
+        for folder in targets:
+            self._workers.submit_task(self._prefetch_one, folder['id'], generation, page_size, profile)
+        return len(targets)
+
+    def _within_budget(self):
+        limiter = self.drive.rate_limiter.stats()
+        if limiter['queue_depth'] or limiter['rate'] < limiter['max_rate']:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_requests and now - self._recent_requests[0] > 60:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.per_minute:
+                return False
+            self._recent_requests.append(now)
+            return True
+
+    def _prefetch_one(self, drive, folder_id, generation, page_size, profile):
+        if generation != self._generation:
+            result = 'cancelled'
+        elif drive.has_cached_listing(folder_id, page_size, profile):
+            result = 'cached'
+        elif not self._within_budget():
+            result = 'over_budget'
+        else:
+            result = 'fetched' if drive.prefetch_listing(folder_id, page_size, profile) else 'error'
+        self.drive.metrics.inc('folder_prefetch_total', result=result)
+        return result
+
+    def shutdown(self):
+        self.cancel()
+        self._workers.shutdown()
@@ -0,0 +1,50 @@
+import json
+import threading
+import httplib2
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import AuthorizedSession
+
+_discovery_docs = {}
+_discovery_lock = threading.Lock()
+
+
+def get_discovery_document(service_name='drive', version='v3'):
+    key = (service_name, version)
+    with _discovery_lock:
+        if key not in _discovery_docs:
+            from googleapiclient.discovery_cache import get_static_doc
+            content = get_static_doc(service_name, version)
+            _discovery_docs[key] = json.loads(content) if content else None
+        return _discovery_docs[key]
+
+
+class PooledHttp:
+    thread_safe = True
+
+    def __init__(self, credentials, pool_size=10, timeout=(10, 120)):
+        self.credentials = credentials
+        self.timeout = timeout
+        self.session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        response = self.session.request(
+            method,
+            uri,
+            data=body,
+            headers=headers,
+            timeout=self.timeout,
+            allow_redirects=redirections > 0
+        )
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info.pop("content-encoding", None)
+        info["content-length"] = str(len(response.content))
+        info["status"] = str(response.status_code)
+        info["reason"] = response.reason
+        return httplib2.Response(info), response.content
+
+    def close(self):
+        self.session.close()
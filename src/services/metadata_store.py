@@ -0,0 +1,256 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from services.drive_fields import profile_satisfies
+
+
+class MetadataStore:
+
+    def __init__(self, db_path, ttl=86400):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        with self._write_lock:
+            conn = self._connect()
+            has_members = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listing_members'"
+            ).fetchone()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS file_info (
+                    file_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    modified_time TEXT,
+                    cached_at REAL NOT NULL,
+                    profile TEXT
+                );
+                CREATE TABLE IF NOT EXISTS listings (
+                    cache_key TEXT PRIMARY KEY,
+                    folder_id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    cached_at REAL NOT NULL,
+                    profile TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_listings_folder ON listings(folder_id);
+                CREATE TABLE IF NOT EXISTS listing_members (
+                    file_id TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    PRIMARY KEY (file_id, cache_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_listing_members_key ON listing_members(cache_key);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            for table in ("file_info", "listings"):
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                if "profile" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN profile TEXT")
+            if not has_members:
+                # Listings cached before the member table existed cannot be found by file id.
+                conn.execute("DELETE FROM listings")
+            conn.commit()
+
+    def _is_fresh(self, cached_at):
+        return time.time() - cached_at < self.ttl
+
+    def _write(self, sql, params=()):
+        try:
+            with self._write_lock:
+                conn = self._connect()
+                conn.execute(sql, params)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Metadata store write failed: {e}")
+
+    def _write_all(self, *statements):
+        try:
+            with self._write_lock:
+                conn = self._connect()
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        conn.executemany(sql, params)
+                    else:
+                        conn.execute(sql, params)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Metadata store write failed: {e}")
+
+    def _member_statements(self, cache_key, data):
+        file_ids = {f['id'] for f in data.get('files', []) if f.get('id')}
+        return (
+            ("DELETE FROM listing_members WHERE cache_key = ?", (cache_key,)),
+            ("INSERT OR IGNORE INTO listing_members (file_id, cache_key) VALUES (?, ?)",
+             [(file_id, cache_key) for file_id in file_ids]),
+        )
+
+    def get_file_info(self, file_id, profile=None):
+        try:
+            row = self._connect().execute(
+                "SELECT data, cached_at, profile FROM file_info WHERE file_id = ?", (file_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return None
+
+        if row and self._is_fresh(row[1]) and profile_satisfies(row[2], profile):
+            return json.loads(row[0])
+        return None
+
+    def put_file_info(self, file, profile=None):
+        if not file or not file.get('id'):
+            return
+        if profile is not None:
+            try:
+                row = self._connect().execute(
+                    "SELECT data, profile FROM file_info WHERE file_id = ?", (file['id'],)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and row[1] and row[1] != profile and profile_satisfies(row[1], profile):
+                file = {**json.loads(row[0]), **file}
+                profile = row[1]
+        self._write(
+            """
+            INSERT INTO file_info (file_id, data, modified_time, cached_at, profile) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(file_id) DO UPDATE SET
+                data = excluded.data,
+                modified_time = excluded.modified_time,
+                cached_at = excluded.cached_at,
+                profile = excluded.profile
+            WHERE file_info.modified_time IS NULL
+                OR excluded.modified_time IS NULL
+                OR excluded.modified_time >= file_info.modified_time
+            """,
+            (file['id'], json.dumps(file), file.get('modifiedTime'), time.time(), profile)
+        )
+
+    def get_listing(self, cache_key, profile=None):
+        try:
+            row = self._connect().execute(
+                "SELECT data, cached_at, profile FROM listings WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return None
+
+        if row and self._is_fresh(row[1]) and profile_satisfies(row[2], profile):
+            return json.loads(row[0])
+        return None
+
+    def put_listing(self, cache_key, folder_id, data, profile=None):
+        self._write_all(
+            ("INSERT OR REPLACE INTO listings (cache_key, folder_id, data, cached_at, profile) VALUES (?, ?, ?, ?, ?)",
+             (cache_key, folder_id, json.dumps(data), time.time(), profile)),
+            *self._member_statements(cache_key, data)
+        )
+
+    def patch_listings(self, folder_id, patch):
+        try:
+            rows = self._connect().execute(
+                "SELECT cache_key, data FROM listings WHERE folder_id = ?", (folder_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return
+        
+        for cache_key, data in rows:
+            patched = patch(json.loads(data), cache_key.endswith("_None"))
+            if patched is not None:
+                self._write_all(
+                    ("UPDATE listings SET data = ? WHERE cache_key = ?", (json.dumps(patched), cache_key)),
+                    *self._member_statements(cache_key, patched)
+                )
+
+    def get_meta(self, key):
+        try:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return None
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self._write("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def invalidate_folder(self, folder_id):
+        self.invalidate_listings(folder_id)
+        self.invalidate_file(folder_id)
+
+    def invalidate_listings(self, folder_id):
+        self._write_all(
+            ("DELETE FROM listing_members WHERE cache_key IN (SELECT cache_key FROM listings WHERE folder_id = ?)",
+             (folder_id,)),
+            ("DELETE FROM listings WHERE folder_id = ?", (folder_id,))
+        )
+
+    def folders_containing(self, file_id):
+        try:
+            rows = self._connect().execute(
+                """
+                SELECT DISTINCT listings.folder_id FROM listing_members
+                JOIN listings ON listings.cache_key = listing_members.cache_key
+                WHERE listing_members.file_id = ?
+                """,
+                (file_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return []
+        return [row[0] for row in rows]
+
+    def find_listing_entry(self, file_id):
+        try:
+            rows = self._connect().execute(
+                """
+                SELECT listings.data FROM listing_members
+                JOIN listings ON listings.cache_key = listing_members.cache_key
+                WHERE listing_members.file_id = ?
+                """,
+                (file_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Metadata store read failed: {e}")
+            return None
+        for (data,) in rows:
+            entry = next((f for f in json.loads(data).get('files', []) if f.get('id') == file_id), None)
+            if entry:
+                return entry
+        return None
+
+    def invalidate_listings_containing(self, file_id):
+        keys = "SELECT cache_key FROM listing_members WHERE file_id = ?"
+        self._write_all(
+            (f"DELETE FROM listings WHERE cache_key IN ({keys})", (file_id,)),
+            (f"DELETE FROM listing_members WHERE cache_key IN ({keys})", (file_id,))
+        )
+
+    def invalidate_file(self, file_id):
+        self._write("DELETE FROM file_info WHERE file_id = ?", (file_id,))
+
+    def clear(self):
+        self._write("DELETE FROM listing_members")
+        self._write("DELETE FROM listings")
+        self._write("DELETE FROM file_info")
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
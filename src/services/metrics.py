@@ -0,0 +1,160 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+HISTOGRAM_SAMPLES = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def operation_label(operation_name):
+    return re.split(r'[\s(]', operation_name, maxsplit=1)[0] or "operation"
+
+
+class Histogram:
+
+    def __init__(self, max_samples=HISTOGRAM_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=max_samples)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def quantile(self, q, ordered=None):
+        ordered = ordered or sorted(self._samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        ordered = sorted(self._samples)
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            **{f"p{int(q * 100)}": self.quantile(q, ordered) for q in QUANTILES},
+        }
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return sum(
+                value for (n, key_labels), value in self._counters.items()
+                if n == name and labels.items() <= dict(key_labels).items()
+            )
+
+    def hit_ratio(self, name, **labels):
+        hits = self.counter(name, result='hit', **labels)
+        misses = self.counter(name, result='miss', **labels)
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(labels), **histogram.summary()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+        return {
+            'started_at': self.started_at,
+            'uptime': time.time() - self.started_at,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        def fmt(name, labels, extra=None):
+            labels = {**labels, **(extra or {})}
+            if not labels:
+                return name
+            body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+            return f"{name}{{{body}}}"
+
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        for counter in snapshot['counters']:
+            if counter['name'] not in typed:
+                typed.add(counter['name'])
+                lines.append(f"# TYPE {counter['name']} counter")
+            lines.append(f"{fmt(counter['name'], counter['labels'])} {counter['value']}")
+
+        for histogram in snapshot['histograms']:
+            name = histogram['name']
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} summary")
+            for q in QUANTILES:
+                lines.append(f"{fmt(name, histogram['labels'], {'quantile': q})} {histogram[f'p{int(q * 100)}']}")
+            lines.append(f"{fmt(name + '_sum', histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{fmt(name + '_count', histogram['labels'])} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+
+_shared_metrics = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_metrics():
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = MetricsRegistry()
+        return _shared_metrics
@@ -0,0 +1,312 @@
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from googleapiclient.errors import HttpError
+from services.drive_fields import file_fields
+from services.rate_limiter import is_connection_error
+
+TEMP_ID_PREFIX = "local-"
+BATCHABLE_KINDS = ('rename', 'move', 'delete')
+MAX_BATCH_OPS = 100
+
+
+def is_temp_id(file_id):
+    return isinstance(file_id, str) and file_id.startswith(TEMP_ID_PREFIX)
+
+
+def new_temp_id():
+    return TEMP_ID_PREFIX + uuid.uuid4().hex
+
+
+class MutationQueue:
+
+    def __init__(self, path, on_conflict=None):
+        self.path = Path(path)
+        self.on_conflict = on_conflict
+        self.offline = False
+        self.conflicts = []
+        self._lock = threading.RLock()
+        self._replay_lock = threading.Lock()
+        self._local = threading.local()
+        self._ops = self._load()
+        self._seq = max((op['seq'] for op in self._ops), default=0)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('ops', [])
+        except (OSError, ValueError):
+            return []
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'ops': self._ops}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Mutation log write failed: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ops)
+
+    def pending(self):
+        with self._lock:
+            return [dict(op) for op in self._ops]
+
+    def set_offline(self, offline):
+        self.offline = offline
+
+    def should_queue(self):
+        if getattr(self._local, 'replaying', False):
+            return False
+        with self._lock:
+            return self.offline or bool(self._ops)
+
+    def enqueue(self, kind, file_id, **args):
+        with self._lock:
+            if not self._coalesce(kind, file_id, args):
+                self._seq += 1
+                self._ops.append({
+                    'seq': self._seq,
+                    'kind': kind,
+                    'file_id': file_id,
+                    'args': args,
+                    'queued_at': time.time(),
+                })
+            self._save()
+
+    def has_queued_upload(self, file_path):
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            return any(op['kind'] == 'upload' and op['args'].get('file_path') == file_path for op in self._ops)
+
+    def _find(self, file_id, kinds):
+        return next((op for op in reversed(self._ops) if op['file_id'] == file_id and op['kind'] in kinds), None)
+
+    def _coalesce(self, kind, file_id, args):
+        create = self._find(file_id, ('create_folder', 'upload'))
+
+        if kind == 'rename':
+            target = create or self._find(file_id, ('rename',))
+            if target:
+                target['args']['name'] = args['name']
+                return True
+
+        elif kind == 'move':
+            new_parent = args['new_parent_id']
+            parent_create = self._find(new_parent, ('create_folder',))
+            if create and not (parent_create and parent_create['seq'] > create['seq']):
+                create['args']['parent_id'] = new_parent
+                return True
+            move = self._find(file_id, ('move',))
+            if move and not (parent_create and parent_create['seq'] > move['seq']):
+                move['args']['new_parent_id'] = new_parent
+                return True
+
+        elif kind == 'delete':
+            if create:
+                self._drop_created(file_id)
+                return True
+            self._ops = [op for op in self._ops if not (op['file_id'] == file_id and op['kind'] in ('rename', 'move'))]
+            for op in [op for op in self._ops if op['kind'] in ('create_folder', 'upload')
+                       and op['args'].get('parent_id') == file_id]:
+                self._drop_created(op['file_id'])
+
+        return False
+
+    def _drop_created(self, temp_id):
+        children = [op['file_id'] for op in self._ops
+                    if op['kind'] in ('create_folder', 'upload') and op['args'].get('parent_id') == temp_id]
+        self._ops = [op for op in self._ops if op['file_id'] != temp_id]
+        for child_id in children:
+            self._drop_created(child_id)
+
+    def _resolve_temp_id(self, temp_id, real_id):
+        with self._lock:
+            for op in self._ops:
+                if op['file_id'] == temp_id:
+                    op['file_id'] = real_id
+                for key in ('parent_id', 'new_parent_id'):
+                    if op['args'].get(key) == temp_id:
+                        op['args'][key] = real_id
+            self._save()
+
+    def _finish(self, op, conflict=None):
+        with self._lock:
+            self._ops = [o for o in self._ops if o['seq'] != op['seq']]
+            if conflict and op['kind'] in ('create_folder', 'upload'):
+                self._drop_created(op['file_id'])
+            self._save()
+        if conflict:
+            record = {'kind': op['kind'], 'file_id': op['file_id'], 'args': op['args'], 'reason': conflict}
+            self.conflicts.append(record)
+            print(f"Queued {op['kind']} of {op['file_id']} not applied: {conflict}")
+            if self.on_conflict:
+                self.on_conflict(record)
+
+    def replay(self, drive):
+        if not self._replay_lock.acquire(blocking=False):
+            return None
+        self._local.replaying = True
+        summary = {'applied': 0, 'conflicts': 0, 'remaining': 0}
+        try:
+            while not self.offline:
+                with self._lock:
+                    ops = list(self._ops)
+                if not ops:
+                    break
+
+                group = []
+                for op in ops:
+                    if op['kind'] not in BATCHABLE_KINDS or is_temp_id(op['file_id']) or len(group) >= MAX_BATCH_OPS:
+                        break
+                    group.append(op)
+
+                if group:
+                    applied, conflicts = self._replay_batch(drive, group)
+                elif ops[0]['kind'] in BATCHABLE_KINDS:
+                    self._finish(ops[0], "file was never created on Drive")
+                    applied, conflicts = 0, 1
+                else:
+                    applied, conflicts = self._replay_create(drive, ops[0])
+                summary['applied'] += applied
+                summary['conflicts'] += conflicts
+                if applied + conflicts == 0:
+                    break
+        finally:
+            self._local.replaying = False
+            self._replay_lock.release()
+
+        summary['remaining'] = len(self)
+        if summary['applied'] or summary['conflicts']:
+            print(f"Replayed offline changes: {summary}")
+        return summary
+
+    def _replay_create(self, drive, op):
+        args = op['args']
+        if is_temp_id(args.get('parent_id')):
+            self._finish(op, "parent folder was never created")
+            return 0, 1
+
+        file_id = None if is_temp_id(op['file_id']) else op['file_id']
+        if op['kind'] == 'create_folder':
+            result = drive.create_folder(args['name'], args['parent_id'], file_id=file_id)
+        elif not os.path.exists(args['file_path']):
+            self._finish(op, "local file no longer exists")
+            return 0, 1
+        else:
+            result = drive.upload_file(args['file_path'], args['parent_id'], args['name'],
+                                       priority='bulk', dedupe=args.get('dedupe', False), file_id=file_id)
+
+        if result is None:
+            if self.offline:
+                return 0, 0
+            self._finish(op, "Drive rejected the change")
+            return 0, 1
+
+        if is_temp_id(op['file_id']):
+            drive._discard_temp_entry(op['file_id'], [args['parent_id']])
+        if op['kind'] == 'upload' and drive.upload_journal:
+            drive.upload_journal.discard(args['file_path'], args['parent_id'], args['name'])
+        self._finish(op)
+        self._resolve_temp_id(op['file_id'], result['id'])
+        return 1, 0
+
+    def _current_state(self, drive, group):
+        current = {}
+        errors = {}
+
+        def on_response(file_id, file, error):
+            if error is None:
+                current[file_id] = file
+            else:
+                errors[file_id] = error
+
+        with drive.batch() as batch:
+            for file_id in dict.fromkeys(op['file_id'] for op in group):
+                batch.add(
+                    drive.service.files().get(fileId=file_id, fields=file_fields('search')),
+                    callback=on_response,
+                    request_id=file_id
+                )
+
+        if any(is_connection_error(error) for error in errors.values()):
+            self.offline = True
+            return None
+        return current
+
+    def _remote_request(self, drive, op, file):
+        args = op['args']
+        files = drive.service.files()
+        if op['kind'] == 'rename':
+            return files.update(fileId=op['file_id'], body={'name': args['name']}, fields=file_fields('mutation'))
+        if op['kind'] == 'move':
+            previous = [p for p in file.get('parents', []) if p != args['new_parent_id']]
+            return files.update(
+                fileId=op['file_id'],
+                addParents=args['new_parent_id'],
+                removeParents=",".join(previous),
+                fields=file_fields('mutation')
+            )
+        return files.delete(fileId=op['file_id'])
+
+    def _replay_batch(self, drive, group):
+        current = self._current_state(drive, group)
+        if current is None:
+            return 0, 0
+
+        applied = conflicts = 0
+        to_send = []
+        for op in group:
+            file = current.get(op['file_id'])
+            changed = file and op['args'].get('base_modified') and \
+                file.get('modifiedTime', '') > op['args']['base_modified']
+
+            if file is None:
+                if op['kind'] == 'delete':
+                    self._finish(op)
+                    applied += 1
+                else:
+                    self._finish(op, "file was deleted on Drive")
+                    conflicts += 1
+            elif changed and op['kind'] == 'delete':
+                self._finish(op, "file changed on Drive after it was deleted offline; kept")
+                conflicts += 1
+            else:
+                if changed:
+                    print(f"{op['file_id']} changed on Drive since it was queued; applying {op['kind']} anyway")
+                to_send.append((op, file))
+
+        outcomes = {}
+
+        def on_response(request_id, response, error):
+            outcomes[request_id] = (response, error)
+
+        with drive.batch() as batch:
+            for op, file in to_send:
+                batch.add(self._remote_request(drive, op, file), callback=on_response, request_id=str(op['seq']))
+
+        for op, file in to_send:
+            response, error = outcomes.get(str(op['seq']), (None, None))
+            if error is not None and is_connection_error(error):
+                self.offline = True
+                continue
+            if error is not None:
+                reason = f"HTTP {error.resp.status}" if isinstance(error, HttpError) else str(error)
+                self._finish(op, f"Drive rejected the change ({reason})")
+                conflicts += 1
+                continue
+            if op['kind'] == 'delete':
+                drive._write_through_removal(op['file_id'], file)
+            elif response:
+                drive._write_through(response, file.get('parents', []))
+            self._finish(op)
+            applied += 1
+
+        return applied, conflicts
@@ -78,7 +78,7 @@ class NotificationService:
             return None
         
         try:
-            result = self.drive_service.list_files(folder_id=self.lms_root_id, use_cache=False)
+            result = self.drive_service.list_files(folder_id=self.lms_root_id)
             files = result.get('files', []) if result else []
             
             for f in files:
@@ -0,0 +1,146 @@
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import httplib2
+from googleapiclient.errors import HttpError
+
+DRIVE_QUERIES_PER_MINUTE = 12000
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+MAX_BACKOFF = 64
+TRANSPORT_ERRORS = (ConnectionError, TimeoutError, socket.timeout, socket.gaierror, httplib2.ServerNotFoundError)
+
+
+def _error_reasons(error):
+    details = getattr(error, 'error_details', None)
+    if isinstance(details, list):
+        return {d.get('reason') for d in details if isinstance(d, dict)}
+    return set()
+
+
+def is_rate_limited(error):
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    return error.resp.status == 403 and bool(_error_reasons(error) & set(RATE_LIMIT_REASONS))
+
+
+def is_connection_error(error):
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+def is_retryable(error):
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUSES or is_rate_limited(error)
+    return is_connection_error(error)
+
+
+def retry_after_seconds(error):
+    if not isinstance(error, HttpError):
+        return None
+    value = error.resp.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base_delay=1, error=None):
+    delay = random.uniform(0, min(MAX_BACKOFF, base_delay * (2 ** attempt)))
+    hint = retry_after_seconds(error)
+    if hint is not None:
+        delay = max(delay, min(hint, MAX_BACKOFF))
+    return delay
+
+
+class AdaptiveRateLimiter:
+
+    def __init__(self, rate=DRIVE_QUERIES_PER_MINUTE / 60, burst=50, min_rate=1.0, recovery=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.recovery = recovery
+        self.throttle_events = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        tokens = min(tokens, self.burst)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait = (tokens - self._tokens) / self.rate
+
+                if deadline is not None and now + wait > deadline:
+                    return False
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.recovery)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttle_events += 1
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': self.rate,
+                'max_rate': self.max_rate,
+                'tokens': self._tokens,
+                'queue_depth': self._waiting,
+                'throttle_events': self.throttle_events,
+            }
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter():
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
@@ -0,0 +1,410 @@
+import difflib
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from services.drive_fields import list_fields
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+CRAWL_KEY = "crawl_completed_at"
+
+TYPE_FILTERS = {
+    'folder': [FOLDER_MIME_TYPE],
+    'pdf': ['application/pdf'],
+    'doc': ['application/vnd.google-apps.document', 'application/msword',
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'],
+    'sheet': ['application/vnd.google-apps.spreadsheet', 'application/vnd.ms-excel',
+              'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'],
+    'slide': ['application/vnd.google-apps.presentation', 'application/vnd.ms-powerpoint',
+              'application/vnd.openxmlformats-officedocument.presentationml.presentation'],
+    'image': ['image/'],
+    'video': ['video/'],
+    'audio': ['audio/'],
+    'text': ['text/'],
+}
+TYPE_FILTERS['docx'] = TYPE_FILTERS['doc']
+TYPE_FILTERS['xlsx'] = TYPE_FILTERS['sheet']
+TYPE_FILTERS['pptx'] = TYPE_FILTERS['slide']
+
+FILTER_PATTERN = re.compile(r'(type|modified|owner):("[^"]*"|\S+)', re.IGNORECASE)
+DATE_PATTERN = re.compile(r'^(>=|<=|>|<)?(\d{4}-\d{2}-\d{2})$')
+
+
+def _valid_day(day):
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def _next_day(day):
+    return (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _date_range(op, day):
+    if op == '>':
+        return [('>=', _next_day(day))]
+    if op == '>=':
+        return [('>=', day)]
+    if op == '<':
+        return [('<', day)]
+    if op == '<=':
+        return [('<', _next_day(day))]
+    return [('>=', day), ('<', _next_day(day))]
+
+
+def parse_query(text):
+    filters = {'types': [], 'modified': [], 'owners': []}
+
+    for key, value in FILTER_PATTERN.findall(text):
+        key = key.lower()
+        value = value.strip('"')
+        if key == 'type':
+            filters['types'].extend(TYPE_FILTERS.get(value.lower(), [value.lower()]))
+        elif key == 'owner':
+            filters['owners'].append(value)
+        elif key == 'modified':
+            match = DATE_PATTERN.match(value)
+            if match and _valid_day(match.group(2)):
+                filters['modified'].extend(_date_range(match.group(1), match.group(2)))
+
+    remainder = FILTER_PATTERN.sub(' ', text)
+    terms = [t.lower() for t in re.findall(r'\w+', remainder, re.UNICODE)]
+    return terms, filters
+
+
+def escape_drive_query(value):
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def to_drive_query(text):
+    _, filters = parse_query(text)
+    words = FILTER_PATTERN.sub(' ', text).split()
+    clauses = [f"name contains '{escape_drive_query(word)}'" for word in words]
+
+    type_clauses = []
+    for mime in filters['types']:
+        if mime.endswith('/') or '/' not in mime:
+            type_clauses.append(f"mimeType contains '{escape_drive_query(mime)}'")
+        else:
+            type_clauses.append(f"mimeType = '{escape_drive_query(mime)}'")
+    if type_clauses:
+        clauses.append("(" + " or ".join(type_clauses) + ")")
+
+    for op, day in filters['modified']:
+        clauses.append(f"modifiedTime {op} '{day}T00:00:00'")
+
+    # Drive only matches owners by email address (or 'me'); display names are left to the local index.
+    for owner in filters['owners']:
+        if '@' in owner or owner.lower() == 'me':
+            clauses.append(f"'{escape_drive_query(owner)}' in owners")
+
+    return " and ".join(clauses)
+
+
+class SearchIndex:
+
+    def __init__(self, db_path, folder_index=None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.folder_index = folder_index
+        self.fts = True
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._crawl_lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        with self._write_lock:
+            conn = self._connect()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    rowid INTEGER PRIMARY KEY,
+                    file_id TEXT UNIQUE NOT NULL,
+                    name TEXT,
+                    mime_type TEXT,
+                    owners TEXT,
+                    path TEXT,
+                    modified_time TEXT,
+                    data TEXT NOT NULL,
+                    indexed_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            try:
+                conn.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                        name, mime_type, owners, path,
+                        content='files', content_rowid='rowid',
+                        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                    );
+                    CREATE VIRTUAL TABLE IF NOT EXISTS files_vocab USING fts5vocab(files_fts, 'row');
+                    CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                        INSERT INTO files_fts(rowid, name, mime_type, owners, path)
+                        VALUES (new.rowid, new.name, new.mime_type, new.owners, new.path);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                        INSERT INTO files_fts(files_fts, rowid, name, mime_type, owners, path)
+                        VALUES ('delete', old.rowid, old.name, old.mime_type, old.owners, old.path);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE ON files BEGIN
+                        INSERT INTO files_fts(files_fts, rowid, name, mime_type, owners, path)
+                        VALUES ('delete', old.rowid, old.name, old.mime_type, old.owners, old.path);
+                        INSERT INTO files_fts(rowid, name, mime_type, owners, path)
+                        VALUES (new.rowid, new.name, new.mime_type, new.owners, new.path);
+                    END;
+                """)
+            except sqlite3.OperationalError as e:
+                print(f"FTS5 unavailable, falling back to LIKE search: {e}")
+                self.fts = False
+            conn.commit()
+
+    def _path_for(self, file):
+        if not self.folder_index or not self.folder_index.is_warm():
+            return ""
+        parents = file.get('parents') or []
+        if not parents:
+            return ""
+        return "/".join(folder['name'] or '' for folder in self.folder_index.path(parents[0]))
+
+    def _owners_for(self, file):
+        return " ".join(
+            f"{o.get('displayName', '')} {o.get('emailAddress', '')}".strip()
+            for o in file.get('owners', [])
+        )
+
+    def add_files(self, files):
+        files = [f for f in files if f and f.get('id')]
+        if not files:
+            return
+
+        try:
+            with self._write_lock:
+                conn = self._connect()
+                now = time.time()
+                existing = {}
+                ids = [f['id'] for f in files]
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT file_id, data FROM files WHERE file_id IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    existing.update((row[0], json.loads(row[1])) for row in rows)
+
+                for file in files:
+                    merged = {**existing.get(file['id'], {}), **file}
+                    conn.execute(
+                        """
+                        INSERT INTO files (file_id, name, mime_type, owners, path, modified_time, data, indexed_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(file_id) DO UPDATE SET
+                            name = excluded.name,
+                            mime_type = excluded.mime_type,
+                            owners = excluded.owners,
+                            path = excluded.path,
+                            modified_time = excluded.modified_time,
+                            data = excluded.data,
+                            indexed_at = excluded.indexed_at
+                        """,
+                        (
+                            merged['id'],
+                            merged.get('name', ''),
+                            merged.get('mimeType', ''),
+                            self._owners_for(merged),
+                            self._path_for(merged),
+                            merged.get('modifiedTime'),
+                            json.dumps(merged),
+                            now
+                        )
+                    )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Search index write failed: {e}")
+
+    def remove(self, file_id):
+        try:
+            with self._write_lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Search index write failed: {e}")
+
+    def apply_change(self, change):
+        file_id = change.get('fileId')
+        file = change.get('file') or {}
+        if not file_id:
+            return
+        if change.get('removed') or file.get('trashed'):
+            self.remove(file_id)
+        elif file.get('id'):
+            self.add_files([{k: v for k, v in file.items() if k != 'trashed'}])
+
+    def get(self, file_id):
+        try:
+            row = self._connect().execute("SELECT data FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Search index query failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def children(self, folder_id, limit=1000):
+        resolved = folder_id
+        if folder_id == 'root' and self.folder_index and self.folder_index.root_id:
+            resolved = self.folder_index.root_id
+        try:
+            rows = self._connect().execute(
+                """
+                SELECT data FROM files
+                WHERE EXISTS (SELECT 1 FROM json_each(files.data, '$.parents') WHERE value IN (?, ?))
+                ORDER BY files.mime_type != ?, files.name COLLATE NOCASE LIMIT ?
+                """,
+                (folder_id, resolved, FOLDER_MIME_TYPE, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Search index query failed: {e}")
+            return []
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self):
+        try:
+            return self._connect().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def is_complete(self):
+        return self.crawled_at() is not None
+
+    def _match_expression(self, terms):
+        return " AND ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+    def _fuzzy_terms(self, term):
+        try:
+            rows = self._connect().execute(
+                "SELECT term FROM files_vocab WHERE term >= ? AND term < ?",
+                (term[:1], term[:1] + '￿')
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return difflib.get_close_matches(term, [row[0] for row in rows], n=5, cutoff=0.75)
+
+    def search(self, text, limit=50, fuzzy=True):
+        terms, filters = parse_query(text)
+
+        where = []
+        params = []
+        if terms and self.fts:
+            where.append("files.rowid IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)")
+            params.append(self._match_expression(terms))
+        elif terms:
+            for term in terms:
+                where.append("(files.name LIKE ? OR files.path LIKE ? OR files.owners LIKE ?)")
+                params.extend([f"%{term}%"] * 3)
+
+        if filters['types']:
+            type_clauses = []
+            for mime in filters['types']:
+                if mime.endswith('/') or '/' not in mime:
+                    type_clauses.append("files.mime_type LIKE ?")
+                    params.append(f"%{mime}%")
+                else:
+                    type_clauses.append("files.mime_type = ?")
+                    params.append(mime)
+            where.append("(" + " OR ".join(type_clauses) + ")")
+
+        for op, day in filters['modified']:
+            where.append(f"files.modified_time {op} ?")
+            params.append(day)
+
+        for owner in filters['owners']:
+            where.append("files.owners LIKE ?")
+            params.append(f"%{owner}%")
+
+        if not where:
+            return []
+
+        sql = f"SELECT data FROM files WHERE {' AND '.join(where)} ORDER BY files.mime_type != ?, files.name COLLATE NOCASE LIMIT ?"
+        try:
+            rows = self._connect().execute(sql, params + [FOLDER_MIME_TYPE, limit]).fetchall()
+        except sqlite3.Error as e:
+            print(f"Search index query failed: {e}")
+            return []
+
+        results = [json.loads(row[0]) for row in rows]
+
+        if fuzzy and self.fts and terms and len(results) < limit:
+            corrected = [(self._fuzzy_terms(term) or [term])[0] for term in terms]
+            if corrected != terms:
+                filter_text = " ".join(m.group(0) for m in FILTER_PATTERN.finditer(text))
+                seen = {f['id'] for f in results}
+                for file in self.search(" ".join(corrected) + " " + filter_text, limit, fuzzy=False):
+                    if file['id'] not in seen and len(results) < limit:
+                        results.append(file)
+
+        return results
+
+    def crawl(self, drive, page_size=1000):
+        if not self._crawl_lock.acquire(blocking=False):
+            return False
+        try:
+            started = time.time()
+            indexed = 0
+            page_token = None
+            while True:
+                result = drive._execute_file_list_query(
+                    "trashed=false", page_size, page_token,
+                    fields=list_fields('search'), order_by="modifiedTime desc"
+                )
+                if result is None:
+                    print(f"Search index crawl interrupted after {indexed} file(s)")
+                    return False
+
+                files = result.get('files', [])
+                self.add_files(files)
+                indexed += len(files)
+
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    break
+
+            with self._write_lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM files WHERE indexed_at < ?", (started,))
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (CRAWL_KEY, str(time.time())))
+                conn.commit()
+            print(f"Search index crawled {indexed} file(s)")
+            return True
+        except sqlite3.Error as e:
+            print(f"Search index crawl failed: {e}")
+            return False
+        finally:
+            self._crawl_lock.release()
+
+    def crawled_at(self):
+        try:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (CRAWL_KEY,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return float(row[0]) if row else None
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
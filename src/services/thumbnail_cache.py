@@ -0,0 +1,132 @@
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+THUMBNAIL_SIZE = 220
+THUMBNAIL_CACHE_BYTES = 64 * 1024 * 1024
+THUMBNAIL_WORKERS = 4
+
+
+class ThumbnailCache:
+
+    def __init__(self, cache_dir, service_factory, max_bytes=THUMBNAIL_CACHE_BYTES,
+                 max_workers=THUMBNAIL_WORKERS, size=THUMBNAIL_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.service_factory = service_factory
+        self.max_bytes = max_bytes
+        self.size = size
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._generation = 0
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.thumb"))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+
+    def _path(self, file):
+        key = f"{file['id']}:{file.get('modifiedTime', '')}:{self.size}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.thumb"
+
+    def get(self, file):
+        path = self._path(file)
+        if not path.exists():
+            return None
+        os.utime(path)
+        return str(path)
+
+    def request(self, file, callback):
+        if not file.get('thumbnailLink'):
+            return False
+
+        cached = self.get(file)
+        if cached:
+            callback(file, cached)
+            return True
+
+        with self._lock:
+            key = file['id']
+            if key in self._pending:
+                self._pending[key][1].append(callback)
+                return True
+            self._pending[key] = (self._generation, [callback])
+            self._executor.submit(self._fetch, file, self._generation)
+        return True
+
+    def cancel_pending(self):
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+
+    def _fetch(self, file, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+
+        link = re.sub(r'=s\d+$', f'=s{self.size}', file['thumbnailLink'])
+        path = None
+        try:
+            resp, content = self.service_factory()._http.request(link, method='GET')
+            if resp.status == 200 and content:
+                path = self._store(file, content)
+            else:
+                print(f"Thumbnail for {file['id']} unavailable: HTTP {resp.status}")
+        except Exception as e:
+            print(f"Error fetching thumbnail for {file['id']}: {e}")
+
+        with self._lock:
+            pending = self._pending.get(file['id'])
+            if not pending or pending[0] != generation:
+                return
+            del self._pending[file['id']]
+        for callback in pending[1]:
+            callback(file, path)
+
+    def _store(self, file, content):
+        path = self._path(file)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(content)
+        with self._lock:
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += len(content) - replaced
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self._evict()
+        return str(path)
+
+    def _evict(self):
+        entries = []
+        for p in self.cache_dir.glob("*.thumb"):
+            try:
+                stat = p.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.8
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+
+        with self._lock:
+            self._total_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {'bytes': self._total_bytes, 'max_bytes': self.max_bytes, 'pending': len(self._pending)}
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False, cancel_futures=True)
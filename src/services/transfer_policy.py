@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+from googleapiclient.http import MediaFileUpload
+
+INTERACTIVE = 0
+TRANSFER = 1
+BULK = 2
+PRIORITIES = {'interactive': INTERACTIVE, 'transfer': TRANSFER, 'bulk': BULK}
+
+CHUNK_ALIGNMENT = 256 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class TransferPolicy:
+
+    def __init__(self, bandwidth_limit=None, target_chunk_seconds=2.0, min_chunk=MIN_CHUNK_SIZE,
+                 max_chunk=MAX_CHUNK_SIZE, interactive_grace=0.3, max_yield=2.0, smoothing=0.3):
+        self.bandwidth_limit = bandwidth_limit
+        self.target_chunk_seconds = target_chunk_seconds
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.interactive_grace = interactive_grace
+        self.max_yield = max_yield
+        self.smoothing = smoothing
+        self.throughput = None
+        self.latency = None
+        self._active = {INTERACTIVE: 0, TRANSFER: 0, BULK: 0}
+        self._last_interactive = 0.0
+        self._tokens = float(bandwidth_limit or 0)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def set_bandwidth_limit(self, bytes_per_second):
+        with self._cond:
+            self.bandwidth_limit = bytes_per_second
+            self._tokens = min(self._tokens, float(bytes_per_second or 0))
+            self._cond.notify_all()
+
+    @contextmanager
+    def interactive(self):
+        with self._cond:
+            self._active[INTERACTIVE] += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._active[INTERACTIVE] -= 1
+                self._last_interactive = time.monotonic()
+                self.latency = self._smooth(self.latency, elapsed)
+                self._cond.notify_all()
+
+    @contextmanager
+    def transfer(self, nbytes, priority='transfer'):
+        level = PRIORITIES[priority]
+        self._yield_to_higher(level)
+        self._spend(nbytes)
+
+        with self._cond:
+            self._active[level] += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._active[level] -= 1
+                self._cond.notify_all()
+            self.record(nbytes, elapsed)
+
+    def _busy_above(self, level):
+        if level > INTERACTIVE and time.monotonic() - self._last_interactive < self.interactive_grace:
+            return True
+        return any(self._active[p] for p in self._active if p < level)
+
+    def _yield_to_higher(self, level):
+        deadline = time.monotonic() + self.max_yield
+        with self._cond:
+            while self._busy_above(level):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(min(remaining, self.interactive_grace))
+
+    def _spend(self, nbytes):
+        with self._cond:
+            rate = self.bandwidth_limit
+            if not rate:
+                return
+            now = time.monotonic()
+            self._tokens = min(float(rate), self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= nbytes
+            wait = -self._tokens / rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def _smooth(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
+
+    def record(self, nbytes, seconds):
+        if nbytes <= 0 or seconds <= 0:
+            return
+        with self._cond:
+            self.throughput = self._smooth(self.throughput, nbytes / seconds)
+
+    def chunk_size(self):
+        with self._cond:
+            throughput = self.throughput
+            latency = self.latency or 0
+            rate = self.bandwidth_limit
+
+        if throughput is None:
+            size = DEFAULT_CHUNK_SIZE
+        else:
+            if rate:
+                throughput = min(throughput, rate)
+            size = throughput * max(self.target_chunk_seconds, latency * 10)
+
+        size = max(self.min_chunk, min(self.max_chunk, int(size)))
+        return max(CHUNK_ALIGNMENT, size - size % CHUNK_ALIGNMENT)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'bandwidth_limit': self.bandwidth_limit,
+                'throughput': self.throughput,
+                'latency': self.latency,
+                'active': dict(self._active),
+            }
+
+
+class AdaptiveMediaFileUpload(MediaFileUpload):
+
+    def __init__(self, filename, policy, mimetype=None, resumable=True):
+        self.policy = policy
+        self._planned = policy.chunk_size()
+        super().__init__(filename, mimetype=mimetype, chunksize=self._planned, resumable=resumable)
+
+    def plan_chunk(self, offset=0):
+        self._planned = self.policy.chunk_size()
+        return min(self._planned, max(0, self.size() - offset))
+
+    def chunksize(self):
+        return self._planned
+
+
+_shared_policy = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_policy():
+    global _shared_policy
+    with _shared_lock:
+        if _shared_policy is None:
+            _shared_policy = TransferPolicy()
+        return _shared_policy
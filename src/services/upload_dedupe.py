@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+HASH_BLOCK_SIZE = 1024 * 1024
+PROCESS_HASH_THRESHOLD = 16 * 1024 * 1024
+
+
+def _process_pool_supported():
+    # Android's Python has no multiprocessing.synchronize, so process pools cannot start there.
+    try:
+        import multiprocessing.synchronize  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadDeduper:
+
+    def __init__(self, process_threshold=PROCESS_HASH_THRESHOLD, max_processes=2):
+        self.process_threshold = process_threshold
+        self.max_processes = max_processes
+        self._hashes = {}
+        self._pool = None
+        self._use_processes = _process_pool_supported()
+        self._lock = threading.Lock()
+        self._stats = {'checks': 0, 'hits': 0, 'copies': 0, 'bytes_saved': 0, 'hashed_bytes': 0}
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_processes)
+            return self._pool
+
+    def md5(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        with self._lock:
+            if key in self._hashes:
+                return self._hashes[key]
+
+        digest = None
+        if self._use_processes and stat.st_size >= self.process_threshold:
+            try:
+                digest = self._get_pool().submit(file_md5, path).result()
+            except NotImplementedError as e:
+                print(f"Hash workers not supported here, hashing in-process: {e}")
+                with self._lock:
+                    self._use_processes = False
+                    self._pool = None
+            except (BrokenProcessPool, OSError) as e:
+                print(f"Hash worker unavailable, hashing in-process: {e}")
+                with self._lock:
+                    self._pool = None
+        if digest is None:
+            digest = file_md5(path)
+
+        with self._lock:
+            self._hashes[key] = digest
+            self._stats['hashed_bytes'] += stat.st_size
+        return digest
+
+    def record(self, hit, nbytes=0, copied=False):
+        with self._lock:
+            self._stats['checks'] += 1
+            if hit:
+                self._stats['hits'] += 1
+                self._stats['bytes_saved'] += nbytes
+                if copied:
+                    self._stats['copies'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['hit_ratio'] = stats['hits'] / stats['checks'] if stats['checks'] else 0.0
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_deduper = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_deduper():
+    global _shared_deduper
+    with _shared_lock:
+        if _shared_deduper is None:
+            _shared_deduper = UploadDeduper()
+        return _shared_deduper
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+SESSION_LIFETIME = 7 * 24 * 3600
+
+
+class UploadJournal:
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('uploads', {})
+        except (OSError, ValueError):
+            return {}
+
+        now = time.time()
+        return {k: v for k, v in entries.items() if now - v.get('updated_at', 0) < SESSION_LIFETIME}
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'uploads': self._entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Upload journal write failed: {e}")
+
+    def _fingerprint(self, file_path):
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime
+
+    def begin(self, file_path, parent_id, file_name):
+        file_path = os.path.abspath(file_path)
+        size, mtime = self._fingerprint(file_path)
+
+        with self._lock:
+            for entry_id, entry in list(self._entries.items()):
+                if (entry['file_path'], entry['parent_id'], entry['file_name']) != (file_path, parent_id, file_name):
+                    continue
+                if (entry['size'], entry['mtime']) == (size, mtime):
+                    return entry_id, dict(entry)
+                del self._entries[entry_id]
+
+            entry_id = uuid.uuid4().hex
+            self._entries[entry_id] = {
+                'file_path': file_path,
+                'parent_id': parent_id,
+                'file_name': file_name,
+                'size': size,
+                'mtime': mtime,
+                'session_uri': None,
+                'offset': 0,
+                'updated_at': time.time(),
+            }
+            self._save()
+            return entry_id, dict(self._entries[entry_id])
+
+    def update(self, entry_id, session_uri, offset):
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return
+            if entry['session_uri'] == session_uri and entry['offset'] == offset:
+                return
+            entry.update(session_uri=session_uri, offset=offset, updated_at=time.time())
+            self._save()
+
+    def reset(self, entry_id):
+        self.update(entry_id, None, 0)
+
+    def complete(self, entry_id):
+        with self._lock:
+            if self._entries.pop(entry_id, None) is not None:
+                self._save()
+
+    def discard(self, file_path, parent_id, file_name):
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            matches = [entry_id for entry_id, entry in self._entries.items()
+                       if (entry['file_path'], entry['parent_id'], entry['file_name']) == (file_path, parent_id, file_name)]
+            for entry_id in matches:
+                del self._entries[entry_id]
+            if matches:
+                self._save()
+
+    def pending(self):
+        with self._lock:
+            return [dict(entry, id=entry_id) for entry_id, entry in self._entries.items()]
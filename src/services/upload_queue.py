@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from services.concurrent_drive_service import ConcurrentDriveService
+from services.rate_limiter import backoff_delay
+
+
+class UploadQueue:
+
+    def __init__(self, service_factory, drive, max_workers=3, max_retries=3, on_progress=None, on_complete=None):
+        self.max_retries = max_retries
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self._workers = ConcurrentDriveService(service_factory, max_workers=max_workers, drive=drive)
+        self._items = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def add(self, file_path, parent_id='root', file_name=None):
+        file_name = file_name or os.path.basename(file_path)
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+
+        with self._lock:
+            self._next_id += 1
+            item_id = self._next_id
+            self._items[item_id] = {
+                'id': item_id,
+                'file_path': file_path,
+                'file_name': file_name,
+                'parent_id': parent_id,
+                'size': size,
+                'sent': 0,
+                'status': 'queued',
+                'attempts': 0,
+                'result': None,
+            }
+
+        self._workers.submit_task(self._run, item_id)
+        self._notify_progress(item_id)
+        return item_id
+
+    def add_many(self, file_paths, parent_id='root'):
+        return [self.add(path, parent_id) for path in file_paths]
+
+    def _run(self, drive, item_id):
+        item = self._items[item_id]
+
+        def on_chunk(sent, total):
+            with self._lock:
+                item['sent'] = sent
+            self._notify_progress(item_id)
+
+        result = None
+        for attempt in range(self.max_retries):
+            with self._lock:
+                item['status'] = 'uploading'
+                item['attempts'] = attempt + 1
+            self._notify_progress(item_id)
+
+            result = drive.upload_file(item['file_path'], item['parent_id'], item['file_name'], on_chunk, priority='bulk', dedupe=True)
+            if result or attempt == self.max_retries - 1:
+                break
+
+            delay = backoff_delay(attempt, drive.retry_delay)
+            print(f"Upload of {item['file_name']} failed (attempt {attempt + 1}/{self.max_retries}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+        with self._lock:
+            item['result'] = result
+            item['status'] = 'done' if result else 'failed'
+            if result:
+                item['sent'] = item['size']
+        self._notify_progress(item_id)
+
+        if self.on_complete:
+            self.on_complete(dict(item))
+        return result
+
+    def _notify_progress(self, item_id):
+        if self.on_progress:
+            with self._lock:
+                item = dict(self._items.get(item_id, {}))
+            self.on_progress(item, self.progress())
+
+    def items(self):
+        with self._lock:
+            return [dict(item) for item in self._items.values()]
+
+    def progress(self):
+        with self._lock:
+            items = list(self._items.values())
+            return {
+                'count': len(items),
+                'done': sum(1 for i in items if i['status'] == 'done'),
+                'failed': sum(1 for i in items if i['status'] == 'failed'),
+                'active': sum(1 for i in items if i['status'] in ('queued', 'uploading')),
+                'sent': sum(i['sent'] for i in items),
+                'total': sum(i['size'] for i in items),
+            }
+
+    def clear_finished(self):
+        with self._lock:
+            for item_id in [k for k, v in self._items.items() if v['status'] in ('done', 'failed')]:
+                del self._items[item_id]
+
+    def shutdown(self):
+        self._workers.shutdown()
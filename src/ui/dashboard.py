@@ -1,13 +1,31 @@
 import flet as ft
+import re
+import threading
+import time
+from pathlib import Path
 from services.drive_service import DriveService
-from utils.common import show_snackbar
+from services.metadata_store import MetadataStore
+from services.change_tracker import ChangeTracker
+from services.concurrent_drive_service import ConcurrentDriveService
+from services.folder_prefetcher import FolderPrefetcher
+from services.drive_id_pool import DriveIdPool
+from services.upload_journal import UploadJournal
+from services.folder_index import FolderIndex
+from services.search_index import SearchIndex
+from services.thumbnail_cache import ThumbnailCache
+from services.mutation_queue import MutationQueue
+from utils.common import show_snackbar, load_json_file, save_json_file
 from ui.custom_control.custom_controls import ButtonWithMenu
 from ui.custom_control.gmail_profile_menu import GmailProfileMenu
 from ui.custom_control.multi_account_manager import MultiAccountManager
-from ui.todo_view import TodoView
+from ui.todo_view import TodoView, LMS_CONFIG_FILE
 from ui.dashboard_modules.file_manager import FileManager
 from ui.dashboard_modules.folder_navigator import FolderNavigator
 from ui.dashboard_modules.paste_links_manager import PasteLinksManager
+from ui.dashboard_modules.diagnostics_panel import DiagnosticsPanel
+
+SEARCH_RECRAWL_INTERVAL = 24 * 3600
+BANDWIDTH_LIMIT_KEY = "bandwidth_limit_kbps"
 
 
 class Dashboard:
@@ -17,18 +35,42 @@ class Dashboard:
         self.on_logout = on_logout
         self.on_add_account_callback = on_add_account
         self.on_switch_account_callback = on_switch_account
-        self.drive = DriveService(auth_service.get_service())
 
         self.current_folder_id = "root"
         self.current_folder_name = "My Drive"
         self.folder_stack = []
         self.current_view = "your_folders"
+        self.view_mode = "list"
 
         self.account_manager = MultiAccountManager()
 
         user_info = self.auth.get_user_info()
         self.user_email = user_info.get("emailAddress", "User") if user_info else "User"
         
+        self.mutation_queue = MutationQueue(
+            Path("lms_data") / "offline" / f"mutations_{self._safe_name(self.user_email)}.json",
+            on_conflict=self._on_mutation_conflict
+        )
+        self.drive = DriveService(
+            auth_service.get_service(),
+            metadata_store=self._open_metadata_store(self.user_email),
+            upload_journal=UploadJournal(Path("lms_data") / "uploads" / f"journal_{self._safe_name(self.user_email)}.json"),
+            mutation_queue=self.mutation_queue
+        )
+        self.set_bandwidth_limit(self._load_bandwidth_limit(), persist=False)
+        self.folder_index = FolderIndex(self.drive)
+        self.drive.folder_index = self.folder_index
+        self.search_index = self._open_search_index(self.user_email)
+        self.drive.search_index = self.search_index
+        self.id_pool = DriveIdPool(self.drive, auth_service.get_service)
+        self.drive.id_pool = self.id_pool
+        self.concurrent_drive = ConcurrentDriveService(auth_service.get_service, drive=self.drive)
+        self.thumbnail_cache = ThumbnailCache(Path("lms_data") / "cache" / "thumbnails" / self._safe_name(self.user_email), auth_service.get_service)
+        self.change_tracker = ChangeTracker(self.drive, on_reconnect=self.resume_pending_work)
+        self.change_tracker.start()
+        self.resume_pending_work()
+        threading.Thread(target=self._warm_indexes, daemon=True).start()
+        
         if user_info and not user_info.get("name") and not user_info.get("displayName"):
             user_info["name"] = self.user_email.split("@")[0]
         
@@ -41,6 +83,13 @@ class Dashboard:
         self.file_manager = FileManager(self)
         self.folder_navigator = FolderNavigator(self)
         self.paste_links_manager = PasteLinksManager(self)
+        self.prefetcher = FolderPrefetcher(
+            self.drive,
+            auth_service.get_service,
+            saved_ids=lambda: [link.get("id") for link in self.paste_links_manager.load_saved_links()]
+        )
+        self.id_pool.start()
+        self.diagnostics_panel = DiagnosticsPanel(self)
 
         self.search_field = ft.TextField(
             hint_text="Search",
@@ -70,6 +119,64 @@ class Dashboard:
 
         self.folder_navigator.load_your_folders()
 
+    def _safe_name(self, email):
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", email)
+
+    def _open_metadata_store(self, email):
+        try:
+            return MetadataStore(Path("lms_data") / "cache" / f"drive_{self._safe_name(email)}.db")
+        except Exception as e:
+            print(f"Metadata cache disabled: {e}")
+            return None
+
+    def _open_search_index(self, email):
+        try:
+            return SearchIndex(Path("lms_data") / "cache" / f"search_{self._safe_name(email)}.db", self.folder_index)
+        except Exception as e:
+            print(f"Search index disabled: {e}")
+            return None
+
+    def _load_bandwidth_limit(self):
+        value = load_json_file(LMS_CONFIG_FILE, {}).get(BANDWIDTH_LIMIT_KEY)
+        try:
+            return int(value) if value else None
+        except (TypeError, ValueError):
+            print(f"Ignoring invalid {BANDWIDTH_LIMIT_KEY} in {LMS_CONFIG_FILE}: {value!r}")
+            return None
+
+    def set_bandwidth_limit(self, kbps, persist=True):
+        self.drive.transfer_policy.set_bandwidth_limit(kbps * 1024 if kbps else None)
+        if persist:
+            config = load_json_file(LMS_CONFIG_FILE, {})
+            config[BANDWIDTH_LIMIT_KEY] = kbps or None
+            save_json_file(LMS_CONFIG_FILE, config)
+
+    def _warm_indexes(self):
+        self.folder_index.ensure()
+        if self.search_index:
+            crawled_at = self.search_index.crawled_at()
+            if crawled_at is None or time.time() - crawled_at > SEARCH_RECRAWL_INTERVAL:
+                self.search_index.crawl(self.drive)
+
+    def resume_pending_work(self):
+        if len(self.mutation_queue) or (self.drive.upload_journal and self.drive.upload_journal.pending()):
+            self.concurrent_drive.submit_task(self._resume_pending)
+
+    def _resume_pending(self, drive):
+        if len(self.mutation_queue):
+            self._replay_mutations(drive)
+        if drive.upload_journal and drive.upload_journal.pending():
+            drive.resume_pending_uploads()
+
+    def _replay_mutations(self, drive):
+        summary = self.mutation_queue.replay(drive)
+        if summary and summary['applied']:
+            show_snackbar(self.page, f"Synced {summary['applied']} offline change(s) to Drive", ft.Colors.GREEN)
+
+    def _on_mutation_conflict(self, record):
+        name = record['args'].get('name') or record['file_id']
+        show_snackbar(self.page, f"Offline {record['kind'].replace('_', ' ')} of '{name}' was not applied: {record['reason']}", ft.Colors.ORANGE)
+
     def toggle_menu(self, e):
         self.menu_open = not self.menu_open
         self.sidebar_container.visible = self.menu_open or self.page.width > 700
@@ -86,8 +193,8 @@ class Dashboard:
     def show_folder_contents(self, folder_id, folder_name=None, is_shared_drive=False, push_to_stack=True):
         self.folder_navigator.show_folder_contents(folder_id, folder_name, is_shared_drive, push_to_stack)
 
-    def refresh_folder_contents(self):
-        self.folder_navigator.refresh_folder_contents()
+    def refresh_folder_contents(self, refetch=True):
+        self.folder_navigator.refresh_folder_contents(refetch)
 
     def close_dialog(self, dialog):
         dialog.open = False
@@ -96,28 +203,47 @@ class Dashboard:
     def show_todo_view(self, e):
         self.current_view = "todo"
         self.folder_list.controls.clear()
-        todo_view = TodoView(self.page, on_back=self.folder_navigator.load_your_folders, drive_service=self.drive)
+        todo_view = TodoView(
+            self.page,
+            on_back=self.folder_navigator.load_your_folders,
+            drive_service=self.drive,
+            concurrent_drive=self.concurrent_drive
+        )
         self.folder_list.controls.append(todo_view.get_view())
         self.page.update()
 
+    def _shutdown_services(self):
+        # Only once this dashboard is being replaced; a failed switch keeps it on screen and working.
+        self.change_tracker.stop()
+        self.concurrent_drive.shutdown()
+        self.prefetcher.shutdown()
+        self.id_pool.shutdown()
+        self.file_manager.shutdown()
+        self.thumbnail_cache.shutdown()
+        self.drive.deduper.shutdown()
+        if self.search_index:
+            self.search_index.close()
+        if self.drive.metadata_store:
+            self.drive.metadata_store.close()
+
     def handle_logout(self, e):
         self.auth.logout()
         self.on_logout()
+        self._shutdown_services()
 
     def handle_add_account(self, e):
         if self.on_add_account_callback:
             self.on_add_account_callback()
-            show_snackbar(self.page, "Redirecting to add account...", ft.Colors.PRIMARY)
-        else:
-            show_snackbar(self.page, "Redirecting to add account...", ft.Colors.PRIMARY)
+            self._shutdown_services()
+        show_snackbar(self.page, "Redirecting to add account...", ft.Colors.PRIMARY)
 
     def handle_switch_account(self, email):
         if self.on_switch_account_callback:
-            self.on_switch_account_callback(email)
+            if self.on_switch_account_callback(email):
+                self._shutdown_services()
         else:
             show_snackbar(self.page, f"Switching to {email}...", ft.Colors.PRIMARY)
 
-
     def handle_action(self, selected_item):
         if selected_item == "Create Folder":
             self.file_manager.create_new_folder_dialog()
@@ -139,6 +265,7 @@ class Dashboard:
                     page=self.page
                 ),
                 ft.ElevatedButton("TO-DO", on_click=self.show_todo_view),
+                ft.TextButton("Diagnostics", icon=ft.Icons.INSIGHTS, on_click=lambda e: self.diagnostics_panel.show()),
             ], spacing=15)
         )
 
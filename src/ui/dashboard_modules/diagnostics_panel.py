@@ -0,0 +1,167 @@
+import time
+import flet as ft
+from pathlib import Path
+from utils.common import format_file_size, show_snackbar
+
+EXPORT_DIR = Path("lms_data") / "diagnostics"
+
+
+class DiagnosticsPanel:
+    def __init__(self, dashboard):
+        self.dash = dashboard
+        self.dialog_container = None
+        self.body = ft.Column(spacing=10, scroll=ft.ScrollMode.AUTO, expand=True)
+        self.bandwidth_field = ft.TextField(label="Bandwidth limit (KB/s)", hint_text="Unlimited", width=200, dense=True)
+
+    @property
+    def metrics(self):
+        return self.dash.drive.metrics
+
+    def _ms(self, seconds):
+        return f"{seconds * 1000:.0f}"
+
+    def _summary_rows(self):
+        metrics = self.metrics
+        limiter = self.dash.drive.rate_limiter.stats()
+        bandwidth = self.dash.drive.transfer_policy.bandwidth_limit
+        return [
+            ("Uptime", f"{(time.time() - metrics.started_at) / 60:.1f} min"),
+            ("API calls", f"{metrics.counter('drive_requests_total')}"),
+            ("Failed calls", f"{metrics.counter('drive_requests_total', outcome='error')}"),
+            ("Retries", f"{metrics.counter('drive_retries_total')}"),
+            ("Throttled", f"{metrics.counter('drive_throttled_total')}"),
+            ("Memory cache hit ratio", f"{metrics.hit_ratio('drive_cache_lookups_total', layer='memory'):.0%}"),
+            ("Disk cache hit ratio", f"{metrics.hit_ratio('drive_cache_lookups_total', layer='disk'):.0%}"),
+            ("Uploaded", format_file_size(metrics.counter('drive_bytes_total', direction='upload'))),
+            ("Downloaded", format_file_size(metrics.counter('drive_bytes_total', direction='download'))),
+            ("Saved by dedupe", format_file_size(metrics.counter('upload_dedupe_bytes_saved_total'))),
+            ("Folders prefetched", f"{metrics.counter('folder_prefetch_total', result='fetched')}"),
+            ("Folders created optimistically", f"{metrics.counter('optimistic_creates_total', result='confirmed')}"),
+            ("Request rate", f"{limiter['rate']:.1f}/s ({limiter['queue_depth']} waiting)"),
+            ("Bandwidth limit", f"{format_file_size(bandwidth)}/s" if bandwidth else "Unlimited"),
+        ]
+
+    def _operation_table(self):
+        snapshot = self.metrics.snapshot()
+        counts = {}
+        for counter in snapshot['counters']:
+            operation = counter['labels'].get('operation')
+            if not operation:
+                continue
+            row = counts.setdefault(operation, {'ok': 0, 'error': 0, 'retries': 0})
+            if counter['name'] == 'drive_requests_total':
+                row[counter['labels'].get('outcome', 'ok')] += counter['value']
+            elif counter['name'] == 'drive_retries_total':
+                row['retries'] += counter['value']
+
+        latencies = {
+            h['labels']['operation']: h for h in snapshot['histograms']
+            if h['name'] == 'drive_request_seconds'
+        }
+        operations = sorted(latencies, key=lambda op: latencies[op]['sum'], reverse=True)
+
+        rows = []
+        for operation in operations:
+            latency = latencies[operation]
+            row = counts.get(operation, {'ok': 0, 'error': 0, 'retries': 0})
+            rows.append(ft.DataRow(cells=[
+                ft.DataCell(ft.Text(operation)),
+                ft.DataCell(ft.Text(str(latency['count']))),
+                ft.DataCell(ft.Text(str(row['error']))),
+                ft.DataCell(ft.Text(str(row['retries']))),
+                ft.DataCell(ft.Text(self._ms(latency['p50']))),
+                ft.DataCell(ft.Text(self._ms(latency['p95']))),
+                ft.DataCell(ft.Text(self._ms(latency['p99']))),
+                ft.DataCell(ft.Text(f"{latency['sum']:.1f}")),
+            ]))
+
+        return ft.DataTable(
+            columns=[ft.DataColumn(ft.Text(label)) for label in
+                     ("Operation", "Calls", "Errors", "Retries", "p50 ms", "p95 ms", "p99 ms", "Total s")],
+            rows=rows,
+            column_spacing=16,
+        )
+
+    def refresh(self):
+        self.body.controls = [
+            ft.Column([
+                ft.Row([ft.Text(label, expand=True), ft.Text(value, weight=ft.FontWeight.BOLD)])
+                for label, value in self._summary_rows()
+            ], spacing=4),
+            ft.Divider(),
+            ft.Text("Time by operation", weight=ft.FontWeight.BOLD),
+            ft.Row([self._operation_table()], scroll=ft.ScrollMode.AUTO),
+        ]
+        self.dash.page.update()
+
+    def export(self, fmt):
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if fmt == "json":
+            path = EXPORT_DIR / f"metrics_{stamp}.json"
+            content = self.metrics.to_json()
+        else:
+            path = EXPORT_DIR / f"metrics_{stamp}.prom"
+            content = self.metrics.to_prometheus()
+
+        try:
+            path.write_text(content, encoding='utf-8')
+            show_snackbar(self.dash.page, f"Metrics exported to {path}", ft.Colors.GREEN)
+        except OSError as e:
+            show_snackbar(self.dash.page, f"Export failed: {e}", ft.Colors.RED)
+
+    def apply_bandwidth_limit(self):
+        text = (self.bandwidth_field.value or "").strip()
+        if text and not text.isdigit():
+            show_snackbar(self.dash.page, "Enter the limit as a whole number of KB/s", ft.Colors.RED)
+            return
+        kbps = int(text) if text else None
+        self.dash.set_bandwidth_limit(kbps)
+        show_snackbar(self.dash.page, f"Bandwidth limited to {kbps} KB/s" if kbps else "Bandwidth limit removed",
+                      ft.Colors.GREEN)
+        self.refresh()
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def close(self):
+        if self.dialog_container in self.dash.page.overlay:
+            self.dash.page.overlay.remove(self.dialog_container)
+            self.dash.page.update()
+
+    def show(self):
+        if self.dialog_container in self.dash.page.overlay:
+            self.refresh()
+            return
+        self.dialog_container = ft.Container(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Text("Diagnostics", size=20, weight=ft.FontWeight.BOLD),
+                    self.body,
+                    ft.Row([
+                        self.bandwidth_field,
+                        ft.TextButton("Apply limit", on_click=lambda e: self.apply_bandwidth_limit()),
+                    ]),
+                    ft.Row([
+                        ft.TextButton("Reset", on_click=lambda e: self.reset()),
+                        ft.TextButton("Export JSON", on_click=lambda e: self.export("json")),
+                        ft.TextButton("Export Prometheus", on_click=lambda e: self.export("prometheus")),
+                        ft.ElevatedButton("Refresh", icon=ft.Icons.REFRESH, on_click=lambda e: self.refresh()),
+                        ft.TextButton("Close", on_click=lambda e: self.close()),
+                    ], alignment=ft.MainAxisAlignment.END, wrap=True),
+                ], spacing=10),
+                padding=20,
+                bgcolor=ft.Colors.WHITE,
+                border_radius=10,
+                width=720,
+                height=560,
+            ),
+            alignment=ft.alignment.center,
+            bgcolor=ft.Colors.with_opacity(0.5, ft.Colors.BLACK),
+        )
+
+        limit = self.dash.drive.transfer_policy.bandwidth_limit
+        self.bandwidth_field.value = str(limit // 1024) if limit else ""
+        self.dash.page.overlay.append(self.dialog_container)
+        self.refresh()
@@ -1,10 +1,16 @@
 import flet as ft
-from utils.common import format_file_size, create_icon_button, open_drive_file
+from services.upload_queue import UploadQueue
+from services.folder_mirror import FolderMirror
+from utils.common import format_file_size, create_icon_button, open_drive_file, show_snackbar
 
 
 class FileManager:
     def __init__(self, dashboard):
         self.dash = dashboard
+        self.upload_queue = None
+        self.upload_panel = None
+        self.upload_rows = {}
+        self.already_on_drive = set()
         
         try:
             from services.file_preview_service import FilePreviewService
@@ -23,8 +29,12 @@ class FileManager:
         def on_info(e):
             self.show_file_info(item)
         
+        def on_sync(e):
+            self.select_sync_directory(item)
+        
         menu_items = [
             ft.PopupMenuItem(text="Info", icon=ft.Icons.INFO, on_click=on_info),
+            ft.PopupMenuItem(text="Sync to computer", icon=ft.Icons.SYNC, on_click=on_sync) if is_folder else None,
             ft.PopupMenuItem(text="Rename", icon=ft.Icons.EDIT, on_click=on_rename),
             ft.PopupMenuItem(text="Delete", icon=ft.Icons.DELETE, on_click=on_delete),
         ]
@@ -86,8 +96,13 @@ class FileManager:
             border=ft.border.all(1, ft.Colors.GREY_300),
             border_radius=8,
             margin=ft.margin.only(bottom=10),
+            data=file.get("id"),
         )
     
+    def _notify_if_queued(self):
+        if len(self.dash.mutation_queue):
+            show_snackbar(self.dash.page, "You're offline - the change was saved and will sync when you reconnect", ft.Colors.ORANGE)
+    
     def preview_file(self, file):
         if self.file_preview and file.get("mimeType") != "application/vnd.google-apps.folder":
             self.file_preview.show_preview(
@@ -114,7 +129,8 @@ class FileManager:
             new_name = name_field.value.strip()
             if new_name and new_name != file["name"]:
                 self.dash.drive.rename_file(file["id"], new_name)
-                self.dash.refresh_folder_contents()
+                self._notify_if_queued()
+                self.dash.refresh_folder_contents(refetch=False)
             dialog_container.visible = False
             self.dash.page.update()
 
@@ -147,7 +163,8 @@ class FileManager:
     def _delete_file_dialog(self, file):
         def delete(e):
             self.dash.drive.delete_file(file["id"])
-            self.dash.refresh_folder_contents()
+            self._notify_if_queued()
+            self.dash.refresh_folder_contents(refetch=False)
             dialog_container.visible = False
             self.dash.page.update()
 
@@ -180,7 +197,7 @@ class FileManager:
 
     
     def show_file_info(self, file):
-        info = self.dash.drive.get_file_info(file["id"]) if isinstance(file, dict) and "id" in file else file
+        info = self.dash.drive.get_file_info(file["id"], profile='preview') if isinstance(file, dict) and "id" in file else file
         if not info:
             return
         
@@ -247,8 +264,21 @@ class FileManager:
             loading_text.value = "Creating folder..."
             self.dash.page.update()
 
-            folder = self.dash.drive.create_folder(folder_name, parent_id=self.dash.current_folder_id)
+            new_folder_item = None
+
+            def on_confirmed(confirmed):
+                if confirmed is None and new_folder_item is not None:
+                    if new_folder_item in self.dash.folder_list.controls:
+                        self.dash.folder_list.controls.remove(new_folder_item)
+                    show_snackbar(self.dash.page, f"Failed to create folder '{folder_name}'", ft.Colors.RED)
+
+            folder = self.dash.drive.create_folder_optimistic(
+                folder_name,
+                parent_id=self.dash.current_folder_id,
+                on_confirmed=on_confirmed
+            )
             if folder:
+                self._notify_if_queued()
                 self.dash.page.overlay.pop()
                 new_folder_item = self.create_folder_item({
                     'id': folder['id'],
@@ -261,7 +291,6 @@ class FileManager:
                 else:
                     self.dash.folder_list.controls.append(new_folder_item)
 
-                self.dash.drive._invalidate_cache(self.dash.current_folder_id)
                 self.dash.page.update()
             else:
                 loading_text.value = "Failed to create folder."
@@ -291,11 +320,163 @@ class FileManager:
         def on_result(e: ft.FilePickerResultEvent):
             if not e.files:
                 return
-            for f in e.files:
-                self.dash.drive.upload_file(f.path, parent_id=self.dash.current_folder_id)
-            self.dash.refresh_folder_contents()
+            queue = self._get_upload_queue()
+            self._show_upload_panel()
+            queue.add_many([f.path for f in e.files], parent_id=self.dash.current_folder_id)
 
         file_picker = ft.FilePicker(on_result=on_result)
         self.dash.page.overlay.append(file_picker)
         self.dash.page.update()
-        file_picker.pick_files()
\ No newline at end of file
+        file_picker.pick_files(allow_multiple=True)
+
+    def select_sync_directory(self, folder):
+        def on_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                self.sync_folder(folder, e.path)
+
+        dir_picker = ft.FilePicker(on_result=on_result)
+        self.dash.page.overlay.append(dir_picker)
+        self.dash.page.update()
+        dir_picker.get_directory_path(dialog_title=f"Sync '{folder.get('name', 'folder')}' to...")
+
+    def sync_folder(self, folder, local_dir):
+        name = folder.get('name', 'folder')
+        show_snackbar(self.dash.page, f"Syncing '{name}'...", ft.Colors.BLUE)
+        
+        mirror = FolderMirror(self.dash.auth.get_service, self.dash.drive, folder['id'], local_dir)
+        try:
+            summary = mirror.sync()
+        finally:
+            mirror.shutdown()
+        
+        if summary is None:
+            show_snackbar(self.dash.page, f"Sync of '{name}' failed", ft.Colors.RED)
+            return
+        
+        message = f"'{name}' synced: {summary['downloaded']} downloaded, {summary['uploaded']} uploaded"
+        if summary['conflict']:
+            message += f", {summary['conflict']} conflict(s) saved as Drive copies"
+        if summary['error']:
+            message += f", {summary['error']} failed"
+        show_snackbar(self.dash.page, message, ft.Colors.ORANGE if summary['error'] or summary['conflict'] else ft.Colors.GREEN)
+
+    def _get_upload_queue(self):
+        if self.upload_queue is None:
+            self.upload_queue = UploadQueue(
+                self.dash.auth.get_service,
+                self.dash.drive,
+                on_progress=self._on_upload_progress,
+                on_complete=self._on_upload_complete
+            )
+        return self.upload_queue
+
+    def _show_upload_panel(self):
+        if self.upload_panel is None:
+            self.upload_summary = ft.Text("", size=12, color=ft.Colors.GREY_700)
+            self.upload_total_bar = ft.ProgressBar(value=0)
+            self.upload_list = ft.Column([], spacing=6, scroll="auto", height=160)
+            self.upload_panel = ft.Container(
+                content=ft.Column([
+                    ft.Row([
+                        ft.Text("Uploads", size=16, weight=ft.FontWeight.BOLD),
+                        ft.IconButton(icon=ft.Icons.CLOSE, tooltip="Hide", on_click=lambda e: self._hide_upload_panel())
+                    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                    self.upload_summary,
+                    self.upload_total_bar,
+                    ft.Divider(height=1),
+                    self.upload_list,
+                ], tight=True, spacing=8),
+                right=20,
+                bottom=20,
+                width=340,
+                padding=15,
+                bgcolor=ft.Colors.WHITE,
+                border_radius=10,
+                shadow=ft.BoxShadow(blur_radius=12, color=ft.Colors.with_opacity(0.3, ft.Colors.BLACK)),
+            )
+        
+        if self.upload_panel not in self.dash.page.overlay:
+            self.dash.page.overlay.append(self.upload_panel)
+        self.dash.page.update()
+
+    def _hide_upload_panel(self):
+        if self.upload_panel in self.dash.page.overlay:
+            self.dash.page.overlay.remove(self.upload_panel)
+        if self.upload_queue:
+            self.upload_queue.clear_finished()
+            for item_id in [k for k in self.upload_rows if k not in {i['id'] for i in self.upload_queue.items()}]:
+                self.upload_list.controls.remove(self.upload_rows.pop(item_id)[0])
+        self.dash.page.update()
+
+    def _on_upload_progress(self, item, totals):
+        if not item or self.upload_panel is None:
+            return
+        
+        row = self.upload_rows.get(item['id'])
+        if row is None:
+            status_text = ft.Text("", size=11, color=ft.Colors.GREY_600)
+            bar = ft.ProgressBar(value=0)
+            container = ft.Column([
+                ft.Row([ft.Text(item['file_name'], size=12, expand=True, no_wrap=True), status_text]),
+                bar
+            ], spacing=2)
+            row = (container, status_text, bar)
+            self.upload_rows[item['id']] = row
+            self.upload_list.controls.append(container)
+        
+        _, status_text, bar = row
+        if item['status'] == 'done':
+            status_text.value = "Done"
+            bar.value = 1
+        elif item['status'] == 'failed':
+            status_text.value = "Failed"
+            bar.color = ft.Colors.RED
+        elif item['status'] == 'uploading':
+            status_text.value = f"{format_file_size(item['sent'])} / {format_file_size(item['size'])}"
+            if item['attempts'] > 1:
+                status_text.value += f" (retry {item['attempts'] - 1})"
+            bar.value = item['sent'] / item['size'] if item['size'] else None
+        else:
+            status_text.value = "Queued"
+        
+        finished = totals['done'] + totals['failed']
+        self.upload_summary.value = f"{finished}/{totals['count']} files · {format_file_size(totals['sent'])} of {format_file_size(totals['total'])}"
+        self.upload_total_bar.value = totals['sent'] / totals['total'] if totals['total'] else None
+        self.dash.page.update()
+
+    def _is_listed(self, file_id):
+        for control in self.dash.folder_list.controls:
+            if getattr(control, 'data', None) == file_id:
+                return True
+            if isinstance(control, ft.Row) and any(getattr(c, 'data', None) == file_id for c in control.controls):
+                return True
+        return False
+    
+    def _on_upload_complete(self, item):
+        result = item['result']
+        if not result:
+            show_snackbar(self.dash.page, f"Failed to upload {item['file_name']}", ft.Colors.RED)
+            return
+        
+        if item['parent_id'] == self.dash.current_folder_id and self.dash.current_view != "paste_links":
+            if self._is_listed(result['id']):
+                self.already_on_drive.add(item['id'])
+            else:
+                controls = self.dash.folder_list.controls
+                for control in list(controls):
+                    if isinstance(control, ft.Text) and control.value == "Folder is empty":
+                        controls.remove(control)
+                controls.append(self.create_file_item(result))
+        
+        totals = self.upload_queue.progress()
+        if totals['active'] == 0:
+            existing = sum(1 for i in self.upload_queue.items() if i['id'] in self.already_on_drive)
+            message = f"Uploaded {totals['done'] - existing} of {totals['count']} file(s)"
+            if existing:
+                message += f", {existing} already on Drive"
+            show_snackbar(self.dash.page, message, ft.Colors.GREEN)
+        self.dash.page.update()
+
+    def shutdown(self):
+        if self.upload_queue:
+            self.upload_queue.shutdown()
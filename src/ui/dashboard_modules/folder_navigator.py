@@ -1,20 +1,62 @@
 import flet as ft
+from services.drive_service import IncompleteListingError
+from services.search_index import to_drive_query
+from utils.common import show_snackbar
+from ui.dashboard_modules.thumbnail_grid import ThumbnailGrid
+
+FOLDER_PAGE_SIZE = 200
+SEARCH_MAX_RESULTS = 200
 
 
 class FolderNavigator:
     def __init__(self, dashboard):
         self.dash = dashboard
+        self._search_generation = 0
+    
+    def _cancel_pending_loads(self):
+        self._search_generation += 1
+        self.dash.thumbnail_cache.cancel_pending()
+        self.dash.prefetcher.cancel()
+        self.dash.folder_list.on_scroll = None
+    
+    def _listing_profile(self):
+        return 'thumbnail' if self.dash.view_mode == "grid" else 'listing'
+    
+    def toggle_view_mode(self):
+        self.dash.view_mode = "list" if self.dash.view_mode == "grid" else "grid"
+        self.show_folder_contents(self.dash.current_folder_id, self.dash.current_folder_name, push_to_stack=False)
+    
+    def _show_local_contents(self, folder_id, grid=None):
+        search_index = self.dash.search_index
+        if not search_index:
+            return False
+        
+        files = search_index.children(folder_id)
+        self.dash.folder_list.controls.append(
+            ft.Text("Offline - showing saved copy. Changes will sync when you reconnect.", size=12, color=ft.Colors.ORANGE)
+        )
+        if not files:
+            self.dash.folder_list.controls.append(ft.Text("No saved items for this folder"))
+        elif grid:
+            self.dash.folder_list.controls.append(grid.control)
+            grid.add_files(files)
+        else:
+            for f in files:
+                self.dash.folder_list.controls.append(self.dash.file_manager.create_file_item(f))
+        return True
     
     def load_your_folders(self):
         self.dash.current_view = "your_folders"
         self.dash.current_folder_id = "root"
         self.dash.current_folder_name = "My Drive"
+        self._cancel_pending_loads()
         self.dash.folder_list.controls.clear()
 
         try:
-            result = self.dash.drive.list_files("root", page_size=100)
+            result = None if self.dash.drive.is_offline() else self.dash.drive.list_files("root", page_size=100)
             if result is None:
-                self.dash.folder_list.controls.append(ft.Text("Failed to load folders."))
+                if not self._show_local_contents("root"):
+                    self.dash.folder_list.controls.append(ft.Text("Failed to load folders."))
             else:
                 files = result.get("files", [])
                 
@@ -23,13 +65,9 @@ class FolderNavigator:
                 else:
                     
                     folders = [f for f in files if f.get("mimeType") == "application/vnd.google-apps.folder"]
-                    for folder in folders:
-                        sub_result = self.dash.drive.list_files(folder["id"], page_size=100)
-                        sub_count = 0 if sub_result is None else len([
-                            f for f in sub_result.get("files", [])
-                            if f.get("mimeType") == "application/vnd.google-apps.folder"
-                        ])
+                    for folder, sub_count in zip(folders, self._subfolder_counts(folders)):
                         self.dash.folder_list.controls.append(self.dash.file_manager.create_folder_item(folder, sub_count))
+                    self.dash.prefetcher.prefetch(folders, FOLDER_PAGE_SIZE, self._listing_profile())
                     
                     regular_files = [f for f in files if f.get("mimeType") != "application/vnd.google-apps.folder"]
                     for file in regular_files:
@@ -39,6 +77,20 @@ class FolderNavigator:
 
         self.dash.page.update()
     
+    def _subfolder_counts(self, folders):
+        if self.dash.folder_index.is_warm():
+            return [self.dash.folder_index.child_count(folder["id"]) for folder in folders]
+        
+        sub_futures = [self.dash.concurrent_drive.list_files(folder["id"], page_size=100) for folder in folders]
+        counts = []
+        for sub_future in sub_futures:
+            sub_result = sub_future.result()
+            counts.append(0 if sub_result is None else len([
+                f for f in sub_result.get("files", [])
+                if f.get("mimeType") == "application/vnd.google-apps.folder"
+            ]))
+        return counts
+    
     def show_folder_contents(self, folder_id, folder_name=None, is_shared_drive=False, push_to_stack=True):
         display_name = folder_name or folder_id
 
@@ -48,7 +100,10 @@ class FolderNavigator:
         self.dash.current_folder_id = folder_id
         self.dash.current_folder_name = display_name
 
+        self._cancel_pending_loads()
+        self.dash.prefetcher.record_visit(folder_id)
         self.dash.folder_list.controls.clear()
+        grid = ThumbnailGrid(self.dash, folder_id) if self.dash.view_mode == "grid" else None
 
         back_controls = []
 
@@ -61,6 +116,11 @@ class FolderNavigator:
             [
                 *back_controls,
                 ft.Text(display_name, size=18, weight=ft.FontWeight.BOLD),
+                ft.IconButton(
+                    icon=ft.Icons.VIEW_LIST if grid else ft.Icons.GRID_VIEW,
+                    tooltip="List view" if grid else "Grid view",
+                    on_click=lambda e: self.toggle_view_mode()
+                ),
                 ft.ElevatedButton("Refresh", icon=ft.Icons.REFRESH, on_click=lambda e: self.refresh_folder_contents()),
             ],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
@@ -75,26 +135,59 @@ class FolderNavigator:
         self.dash.folder_list.controls.append(loading_indicator)
         self.dash.page.update()
 
-        try:
-            result = self.dash.drive.list_files(folder_id, page_size=200, use_cache=False)
+        if grid:
+            self.dash.folder_list.on_scroll_interval = 100
+            self.dash.folder_list.on_scroll = grid.on_scroll
+
+        if self.dash.drive.is_offline():
             self.dash.folder_list.controls.remove(loading_indicator)
+            if self._show_local_contents(folder_id, grid):
+                self.dash.page.update()
+                return
+            self.dash.folder_list.controls.append(loading_indicator)
 
-            if result is None:
-                self.dash.folder_list.controls.append(ft.Text("Network error", color=ft.Colors.ORANGE))
-            else:
-                files = result.get("files", [])
-                if not files:
-                    self.dash.folder_list.controls.append(ft.Text("Folder is empty"))
-                else:
-                    for f in files:
-                        self.dash.folder_list.controls.append(self.dash.file_manager.create_file_item(f))
+        try:
+            pages_loaded = 0
+            subfolders = []
+            profile = self._listing_profile()
+            try:
+                for files in self.dash.drive.iter_pages(folder_id, page_size=FOLDER_PAGE_SIZE, profile=profile, use_cache=True):
+                    if self.dash.current_folder_id != folder_id:
+                        return
+                    if pages_loaded == 0:
+                        self.dash.folder_list.controls.remove(loading_indicator)
+                        if not files:
+                            self.dash.folder_list.controls.append(ft.Text("Folder is empty"))
+                        elif grid:
+                            self.dash.folder_list.controls.append(grid.control)
+                    pages_loaded += 1
+                    subfolders.extend(f for f in files if f.get("mimeType") == "application/vnd.google-apps.folder")
+                    if grid:
+                        grid.add_files(files)
+                    else:
+                        for f in files:
+                            self.dash.folder_list.controls.append(self.dash.file_manager.create_file_item(f))
+                    self.dash.page.update()
+            except IncompleteListingError:
+                if pages_loaded:
+                    self.dash.folder_list.controls.append(
+                        ft.Text("Couldn't load the rest of this folder", color=ft.Colors.ORANGE)
+                    )
+
+            if pages_loaded == 0:
+                self.dash.folder_list.controls.remove(loading_indicator)
+                if not self._show_local_contents(folder_id, grid):
+                    self.dash.folder_list.controls.append(ft.Text("Network error", color=ft.Colors.ORANGE))
+            elif subfolders:
+                self.dash.prefetcher.prefetch(subfolders, FOLDER_PAGE_SIZE, profile)
         except:
             self.dash.folder_list.controls.append(ft.Text("Error loading folder contents", color=ft.Colors.RED))
 
         self.dash.page.update()
     
-    def refresh_folder_contents(self):
-        self.dash.drive._invalidate_cache(self.dash.current_folder_id)
+    def refresh_folder_contents(self, refetch=True):
+        if refetch:
+            self.dash.drive._invalidate_cache(self.dash.current_folder_id)
         self.show_folder_contents(self.dash.current_folder_id, self.dash.current_folder_name, push_to_stack=False)
     
     def go_back(self):
@@ -123,14 +216,61 @@ class FolderNavigator:
         if not query:
             self.load_your_folders()
             return
-        results = self.dash.drive.search_files(query)
+        self._cancel_pending_loads()
+        generation = self._search_generation
         self.dash.folder_list.controls.clear()
-        if not results:
+        shown = set()
+        
+        def show(r):
+            if r["id"] in shown:
+                return
+            shown.add(r["id"])
+            if r.get("mimeType") == "application/vnd.google-apps.folder":
+                self.dash.folder_list.controls.append(self.dash.file_manager.create_folder_item(r, 0))
+            else:
+                self.dash.folder_list.controls.append(self.dash.file_manager.create_file_item(r))
+        
+        search_index = self.dash.search_index
+        if search_index:
+            for r in search_index.search(query, limit=SEARCH_MAX_RESULTS):
+                show(r)
+            self.dash.page.update()
+        
+        if not search_index or not search_index.is_complete() or not shown:
+            drive_query = to_drive_query(query)
+            if drive_query:
+                searching = ft.Text("Searching Drive...", size=12, color=ft.Colors.GREY_600)
+                self.dash.folder_list.controls.append(searching)
+                self.dash.page.update()
+                self.dash.concurrent_drive.submit_task(
+                    self._search_remote, drive_query, generation, show, shown, searching
+                )
+                return
+        
+        self._finish_search(shown)
+    
+    def _search_remote(self, drive, drive_query, generation, show, shown, searching):
+        results = []
+        incomplete = False
+        try:
+            for r in drive.iter_files(None, drive_query, page_size=100):
+                results.append(r)
+                if len(results) >= SEARCH_MAX_RESULTS:
+                    break
+        except IncompleteListingError:
+            incomplete = True
+        
+        if generation != self._search_generation:
+            return
+        if searching in self.dash.folder_list.controls:
+            self.dash.folder_list.controls.remove(searching)
+        for r in results:
+            show(r)
+        if incomplete:
+            show_snackbar(self.dash.page, "Some search results couldn't be loaded", ft.Colors.ORANGE)
+        self._finish_search(shown)
+    
+    def _finish_search(self, shown):
+        if not shown:
             self.dash.folder_list.controls.append(ft.Text("No results"))
-        else:
-            for r in results:
-                if r.get("mimeType") == "application/vnd.google-apps.folder":
-                    self.dash.folder_list.controls.append(self.dash.file_manager.create_folder_item(r, 0))
-                else:
-                    self.dash.folder_list.controls.append(self.dash.file_manager.create_file_item(r))
-        self.dash.page.update()
\ No newline at end of file
+        self.dash.page.update()
@@ -66,7 +66,7 @@ class PasteLinksManager:
                     file_name=item.get("name", "File")
                 )
             else:
-                info = self.dash.drive.get_file_info(item["id"])
+                info = self.dash.drive.get_file_info(item["id"], profile='preview')
                 if info:
                     self.dash.file_manager.show_file_info(info)
                 else:
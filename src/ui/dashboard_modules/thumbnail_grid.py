@@ -0,0 +1,100 @@
+import flet as ft
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+TILE_WIDTH = 150
+TILE_HEIGHT = 170
+IMAGE_HEIGHT = 120
+TILE_SPACING = 10
+OVERSCAN_ROWS = 2
+SIDEBAR_WIDTH = 190
+
+
+class ThumbnailGrid:
+    def __init__(self, dashboard, folder_id):
+        self.dash = dashboard
+        self.folder_id = folder_id
+        self.files = []
+        self.holders = []
+        self.requested = set()
+        self.scroll_offset = 0.0
+        self.viewport_height = None
+        self.control = ft.Row(wrap=True, spacing=TILE_SPACING, run_spacing=TILE_SPACING)
+
+    def add_files(self, files):
+        for file in files:
+            tile, holder = self._create_tile(file)
+            self.files.append(file)
+            self.holders.append(holder)
+            self.control.controls.append(tile)
+        self.load_visible()
+
+    def _create_tile(self, file):
+        is_folder = file.get("mimeType") == FOLDER_MIME_TYPE
+        icon = ft.Icons.FOLDER if is_folder else ft.Icons.INSERT_DRIVE_FILE
+
+        holder = ft.Container(
+            content=ft.Icon(icon, size=48, color=ft.Colors.GREY_500),
+            width=TILE_WIDTH,
+            height=IMAGE_HEIGHT,
+            alignment=ft.alignment.center,
+            bgcolor=ft.Colors.GREY_100,
+            border_radius=6,
+        )
+
+        tile = ft.Container(
+            content=ft.Column([
+                holder,
+                ft.Row([
+                    ft.Text(file.get("name", "Untitled"), size=12, max_lines=1,
+                            overflow=ft.TextOverflow.ELLIPSIS, expand=True),
+                    ft.PopupMenuButton(items=self.dash.file_manager.show_menu(file, is_folder=is_folder)),
+                ], spacing=0),
+            ], spacing=4, tight=True),
+            width=TILE_WIDTH,
+            height=TILE_HEIGHT,
+            ink=True,
+            on_click=lambda e, f=file: self.dash.file_manager.handle_file_click(f),
+            border=ft.border.all(1, ft.Colors.GREY_300),
+            border_radius=8,
+            data=file.get("id"),
+        )
+        return tile, holder
+
+    def on_scroll(self, e):
+        if self.control not in self.dash.folder_list.controls:
+            return
+        self.scroll_offset = e.pixels
+        self.viewport_height = e.viewport_dimension
+        self.load_visible()
+
+    def _columns(self):
+        sidebar = getattr(self.dash, "sidebar_container", None)
+        width = (self.dash.page.width or 800) - 40
+        if sidebar and sidebar.visible:
+            width -= SIDEBAR_WIDTH
+        return max(1, int((width + TILE_SPACING) // (TILE_WIDTH + TILE_SPACING)))
+
+    def load_visible(self):
+        row_height = TILE_HEIGHT + TILE_SPACING
+        viewport = self.viewport_height or self.dash.page.height or 800
+        first_row = max(0, int(self.scroll_offset // row_height) - OVERSCAN_ROWS)
+        last_row = int((self.scroll_offset + viewport) // row_height) + OVERSCAN_ROWS
+        columns = self._columns()
+
+        for index in range(first_row * columns, min(len(self.files), (last_row + 1) * columns)):
+            if index in self.requested:
+                continue
+            self.requested.add(index)
+            self.dash.thumbnail_cache.request(
+                self.files[index],
+                lambda file, path, i=index: self._show_thumbnail(i, path)
+            )
+
+    def _show_thumbnail(self, index, path):
+        if not path or self.dash.current_folder_id != self.folder_id:
+            return
+        holder = self.holders[index]
+        holder.content = ft.Image(src=path, width=TILE_WIDTH, height=IMAGE_HEIGHT,
+                                  fit=ft.ImageFit.COVER, border_radius=6)
+        if holder.page:
+            holder.update()
@@ -118,7 +118,10 @@ class AssignmentManager:
                 if result:
                     new_assignment['attachment_file_id'] = result.get('id')
                     new_assignment['attachment_file_link'] = result.get('webViewLink')
-                    show_snackbar(self.todo.page, "Attachment uploaded successfully!", ft.Colors.GREEN)
+                    if result.get('pending'):
+                        show_snackbar(self.todo.page, "You're offline - the attachment will upload when you reconnect", ft.Colors.ORANGE)
+                    else:
+                        show_snackbar(self.todo.page, "Attachment uploaded successfully!", ft.Colors.GREEN)
                 else:
                     show_snackbar(self.todo.page, "Warning: Attachment upload failed", ft.Colors.ORANGE)
             except Exception as ex:
@@ -752,7 +755,10 @@ class AssignmentManager:
                         assignment['attachment'] = current_attachment['name']
                         assignment['attachment_file_id'] = result.get('id')
                         assignment['attachment_file_link'] = result.get('webViewLink')
-                        show_snackbar(self.todo.page, "Attachment uploaded!", ft.Colors.GREEN)
+                        if result.get('pending'):
+                            show_snackbar(self.todo.page, "You're offline - the attachment will upload when you reconnect", ft.Colors.ORANGE)
+                        else:
+                            show_snackbar(self.todo.page, "Attachment uploaded!", ft.Colors.GREEN)
                 except Exception as ex:
                     show_snackbar(self.todo.page, f"Attachment upload error: {str(ex)}", ft.Colors.ORANGE)
             
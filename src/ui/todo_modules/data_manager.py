@@ -6,9 +6,10 @@ import json
 
 class DataManager:
     
-    def __init__(self, data_dir, drive_service=None):
+    def __init__(self, data_dir, drive_service=None, concurrent_drive=None):
         self.data_dir = Path(data_dir) if isinstance(data_dir, str) else data_dir
         self.drive_service = drive_service
+        self.concurrent_drive = concurrent_drive
         self.lms_root_id = self._load_lms_root_id()
         
         self.assignments_file = self.data_dir / "assignments.json"
@@ -28,7 +29,7 @@ class DataManager:
             return None
         
         try:
-            result = self.drive_service.list_files(folder_id=self.lms_root_id, use_cache=False)
+            result = self.drive_service.list_files(folder_id=self.lms_root_id)
             files = result.get('files', []) if result else []
             
             for f in files:
@@ -108,6 +109,13 @@ class DataManager:
                     except:
                         pass
     
+    def _download_many(self, file_ids):
+        if self.concurrent_drive:
+            futures = [self.concurrent_drive.download_file_content(fid) if fid else None for fid in file_ids]
+            return [future.result() if future else None for future in futures]
+        
+        return [self.drive_service.download_file_content(fid) if fid else None for fid in file_ids]
+    
     def sync_from_drive(self):
         synced = False
         
@@ -117,25 +125,17 @@ class DataManager:
                 self.students_drive_id = self._get_drive_file_id('students.json')
                 self.submissions_drive_id = self._get_drive_file_id('submissions.json')
                 
-                if self.assignments_drive_id:
-                    content = self.drive_service.download_file_content(self.assignments_drive_id)
-                    if content:
-                        data = json.loads(content)
-                        save_json_file(self.assignments_file, data)
-                        synced = True
-                
-                if self.students_drive_id:
-                    content = self.drive_service.download_file_content(self.students_drive_id)
-                    if content:
-                        data = json.loads(content)
-                        save_json_file(self.students_file, data)
-                        synced = True
+                targets = [
+                    (self.assignments_drive_id, self.assignments_file),
+                    (self.students_drive_id, self.students_file),
+                    (self.submissions_drive_id, self.submissions_file),
+                ]
+                contents = self._download_many([file_id for file_id, _ in targets])
                 
-                if self.submissions_drive_id:
-                    content = self.drive_service.download_file_content(self.submissions_drive_id)
+                for (_, local_file), content in zip(targets, contents):
                     if content:
                         data = json.loads(content)
-                        save_json_file(self.submissions_file, data)
+                        save_json_file(local_file, data)
                         synced = True
                 
                 if synced:
@@ -2,6 +2,7 @@ import flet as ft
 import json
 import os
 
+from services.mutation_queue import is_temp_id
 from utils.common import show_snackbar
 
 
@@ -19,7 +20,7 @@ class StorageManager:
         if cache_key in self.subject_folders_cache:
             folder_id = self.subject_folders_cache[cache_key]
             try:
-                info = self.drive_service.get_file_info(folder_id)
+                info = self.drive_service.get_file_info(folder_id, profile='minimal')
                 if info:
                     return folder_id
             except:
@@ -36,7 +37,11 @@ class StorageManager:
                     self.subject_folders_cache[cache_key] = f['id']
                     return f['id']
             
-            new_folder = self.drive_service.create_folder(subject, parent_id=lms_root)
+            new_folder = self.drive_service.create_folder_optimistic(
+                subject,
+                parent_id=lms_root,
+                on_confirmed=lambda folder: self._forget_failed_folder(cache_key, folder)
+            )
             if new_folder:
                 self.subject_folders_cache[cache_key] = new_folder['id']
                 return new_folder['id']
@@ -45,6 +50,18 @@ class StorageManager:
         
         return None
     
+    def _forget_failed_folder(self, cache_key, folder):
+        if folder is None:
+            self.subject_folders_cache.pop(cache_key, None)
+    
+    def _settle_upload(self, result):
+        if result and result.get('pending') and is_temp_id(result['id']):
+            # No Drive id could be reserved offline, so a saved record could never point at the file.
+            self.drive_service.delete_file(result['id'])
+            print(f"Upload of {result.get('name')} dropped: offline and no Drive id available")
+            return None
+        return result
+    
     def upload_assignment_attachment(self, file_path, file_name, subject, assignment_id):
         if not self.drive_service or not self.todo.data_manager.lms_root_id:
             return None
@@ -63,10 +80,11 @@ class StorageManager:
             result = self.drive_service.upload_file(
                 file_path,
                 parent_id=attachments_folder_id,
-                file_name=prefixed_name
+                file_name=prefixed_name,
+                dedupe=True
             )
             
-            return result
+            return self._settle_upload(result)
         except Exception as e:
             print(f"Error uploading attachment: {e}")
             return None
@@ -80,7 +98,7 @@ class StorageManager:
                 if f.get('name') == 'Attachments' and f.get('mimeType') == 'application/vnd.google-apps.folder':
                     return f['id']
             
-            new_folder = self.drive_service.create_folder('Attachments', parent_id=subject_folder_id)
+            new_folder = self.drive_service.create_folder_optimistic('Attachments', parent_id=subject_folder_id)
             if new_folder:
                 return new_folder['id']
         except Exception as e:
@@ -98,10 +116,11 @@ class StorageManager:
             result = self.drive_service.upload_file(
                 file_path,
                 parent_id=link_drive_id,
-                file_name=prefixed_name
+                file_name=prefixed_name,
+                dedupe=True
             )
             
-            return result
+            return self._settle_upload(result)
         except Exception as e:
             print(f"Error uploading submission: {e}")
             return None
@@ -116,7 +135,7 @@ class StorageManager:
         
         if lms_root_id:
             try:
-                info = self.drive_service.get_file_info(lms_root_id)
+                info = self.drive_service.get_file_info(lms_root_id, profile='minimal')
                 if info:
                     current_folder_name = info.get('name', 'Unknown')
             except:
@@ -255,7 +274,7 @@ class StorageManager:
                 return
             
             try:
-                info = self.drive_service.get_file_info(file_id)
+                info = self.drive_service.get_file_info(file_id, profile='minimal')
                 if info and info.get('mimeType') == 'application/vnd.google-apps.folder':
                     on_select({'id': file_id, 'name': info.get('name', 'Unknown')})
                 else:
@@ -310,7 +329,9 @@ class StorageManager:
             current_folder['name'] = 'My Drive'
         elif self.drive_service:
             try:
-                info = self.drive_service.get_file_info(initial_parent_id)
+                folder_index = self.drive_service.folder_index
+                info = folder_index.get(initial_parent_id) if folder_index and folder_index.is_warm() else None
+                info = info or self.drive_service.get_file_info(initial_parent_id, profile='minimal')
                 if info:
                     current_folder = info
             except:
@@ -326,9 +347,13 @@ class StorageManager:
             self.todo.page.update()
             
             try:
-                results = self.drive_service.list_files(folder_id=folder_id, use_cache=True)
-                files = results.get('files', []) if results else []
-                folders = [f for f in files if f['mimeType'] == 'application/vnd.google-apps.folder']
+                folder_index = self.drive_service.folder_index
+                if folder_index and folder_index.ensure():
+                    folders = folder_index.children(folder_id)
+                else:
+                    results = self.drive_service.list_files(folder_id=folder_id, use_cache=True)
+                    files = results.get('files', []) if results else []
+                    folders = [f for f in files if f['mimeType'] == 'application/vnd.google-apps.folder']
                 
                 if (folder_id == 'root' or folder_id == initial_parent_id) and self.todo.saved_links:
                     file_list.controls.append(ft.Container(
@@ -384,6 +409,14 @@ class StorageManager:
             load_folder(fid)
         
         def load_parent(current_id):
+            folder_index = self.drive_service.folder_index
+            path = folder_index.path(current_id) if folder_index and folder_index.is_warm() else []
+            if len(path) > 1:
+                enter_folder(path[-2]['id'], path[-2]['name'])
+                return
+            if path and folder_index.root_id in folder_index.get(current_id).get('parents', []):
+                enter_folder('root', 'My Drive')
+                return
             current_path_text.value = f"Current: {current_folder['name']}"
             load_folder(initial_parent_id)
         
@@ -417,7 +450,7 @@ class StorageManager:
         
         if name == "Linked Folder" and self.drive_service:
             try:
-                info = self.drive_service.get_file_info(fid)
+                info = self.drive_service.get_file_info(fid, profile='minimal')
                 if info:
                     name = info.get('name', name)
             except:
@@ -88,7 +88,7 @@ class SubmissionManager:
             
             if folder_name == "Linked Folder" and self.todo.drive_service:
                 try:
-                    info = self.todo.drive_service.get_file_info(fid)
+                    info = self.todo.drive_service.get_file_info(fid, profile='minimal')
                     if info:
                         folder_name = info.get('name', 'Selected Folder')
                 except:
@@ -128,8 +128,12 @@ class SubmissionManager:
                 )
                 
                 if result:
-                    upload_status.value = f"✓ Uploaded to link drive"
-                    show_snackbar(self.todo.page, f"File uploaded to link drive folder!", ft.Colors.GREEN)
+                    if result.get('pending'):
+                        upload_status.value = "✓ Saved offline - will upload when you reconnect"
+                        show_snackbar(self.todo.page, "You're offline - the file will upload when you reconnect", ft.Colors.ORANGE)
+                    else:
+                        upload_status.value = f"✓ Uploaded to link drive"
+                        show_snackbar(self.todo.page, f"File uploaded to link drive folder!", ft.Colors.GREEN)
                     
                     existing = self.get_submission_status(assignment['id'], self.todo.current_student_email)
                     submitted_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
@@ -9,10 +9,11 @@ LMS_CONFIG_FILE = "lms_config.json"
 
 class TodoView:
     
-    def __init__(self, page: ft.Page, on_back=None, drive_service=None):
+    def __init__(self, page: ft.Page, on_back=None, drive_service=None, concurrent_drive=None):
         self.page = page
         self.on_back = on_back
         self.drive_service = drive_service
+        self.concurrent_drive = concurrent_drive
         
         self.data_dir = Path("lms_data")
         self.data_dir.mkdir(exist_ok=True)
@@ -23,7 +24,7 @@ class TodoView:
         from ui.todo_modules.student_manager import StudentManager
         from ui.todo_modules.submission_manager import SubmissionManager
         
-        self.data_manager = DataManager(self.data_dir, drive_service)
+        self.data_manager = DataManager(self.data_dir, drive_service, concurrent_drive)
         self.storage_manager = StorageManager(self, drive_service)
         self.assignment_manager = AssignmentManager(self)
         self.student_manager = StudentManager(self)
@@ -220,7 +221,7 @@ class TodoView:
         
         if self.drive_service:
             try:
-                info = self.drive_service.get_file_info(folder_id)
+                info = self.drive_service.get_file_info(folder_id, profile='minimal')
                 if info:
                     return info.get('name', 'Linked Folder')
             except:
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.drive_emulator import DriveEmulator  # noqa: E402
+from services.drive_service import DriveService  # noqa: E402
+from services.metrics import MetricsRegistry  # noqa: E402
+from services.mutation_queue import MutationQueue  # noqa: E402
+from services.upload_journal import UploadJournal  # noqa: E402
+
+
+@pytest.fixture
+def emulator():
+    return DriveEmulator(seed=1)
+
+
+@pytest.fixture
+def make_drive(emulator):
+    def make(**kwargs):
+        drive = DriveService(emulator.build_service(), metrics=MetricsRegistry(), **kwargs)
+        drive.retry_delay = 0.01
+        return drive
+    return make
+
+
+@pytest.fixture
+def offline_drive(make_drive, tmp_path):
+    return make_drive(
+        mutation_queue=MutationQueue(tmp_path / "queue.json"),
+        upload_journal=UploadJournal(tmp_path / "journal.json"),
+    )
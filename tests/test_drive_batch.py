@@ -0,0 +1,32 @@
+def test_batch_retries_transient_item_failures(emulator, make_drive):
+    folder = emulator.add_folder("Docs")
+    files = [emulator.add_file(f"f{i}.txt", b"x", folder['id']) for i in range(3)]
+    drive = make_drive()
+
+    emulator.fail_next(503, count=2, operation='files.get')
+    infos = drive.get_file_info_many([f['id'] for f in files], use_cache=False, profile='minimal')
+
+    assert {file_id: info['name'] for file_id, info in infos.items()} == {f['id']: f['name'] for f in files}
+    assert drive.metrics.counter('drive_retries_total', operation='batch') == 2
+    assert emulator.stats()['calls']['batch'] == 2
+
+
+def test_batch_gives_up_after_max_retries(emulator, make_drive):
+    folder = emulator.add_folder("Docs")
+    file = emulator.add_file("a.txt", b"x", folder['id'])
+    drive = make_drive(max_retries=2)
+
+    emulator.fail_next(503, count=5, operation='files.get')
+    infos = drive.get_file_info_many([file['id']], use_cache=False, profile='minimal')
+
+    assert infos == {file['id']: None}
+    assert emulator.stats()['calls']['batch'] == 2
+
+
+def test_batch_does_not_retry_client_errors(emulator, make_drive):
+    drive = make_drive()
+
+    infos = drive.get_file_info_many(['missing-id'], use_cache=False, profile='minimal')
+
+    assert infos == {'missing-id': None}
+    assert emulator.stats()['calls']['batch'] == 1
@@ -0,0 +1,44 @@
+import os
+
+from services.folder_mirror import FolderMirror
+
+
+def test_mirror_round_trip(emulator, make_drive, tmp_path):
+    folder = emulator.add_folder("A")
+    remote = emulator.add_file("remote.txt", b"from drive", folder['id'], 'text/plain')
+    drive = make_drive()
+    local_dir = tmp_path / "mirror"
+    mirror = FolderMirror(emulator.build_service, drive, folder['id'], str(local_dir))
+
+    first = mirror.sync()
+    assert first['downloaded'] == 1
+    assert (local_dir / "remote.txt").read_bytes() == b"from drive"
+
+    (local_dir / "local.txt").write_bytes(b"from disk")
+    second = mirror.sync()
+    assert second['uploaded'] == 1
+    uploaded = next(f for f in emulator._files.values() if f['name'] == "local.txt")
+    assert emulator._content[uploaded['id']] == b"from disk"
+
+    emulator._update(remote['id'], {}, content=b"changed on drive")
+    third = mirror.sync()
+    assert third['downloaded'] == 1
+    assert (local_dir / "remote.txt").read_bytes() == b"changed on drive"
+
+    emulator.reset_stats()
+    idle = mirror.sync()
+    assert idle['downloaded'] == idle['uploaded'] == idle['conflict'] == 0
+    assert 'files.get_media' not in emulator.stats()['calls']
+
+
+def test_mirror_keeps_duplicate_names_apart(emulator, make_drive, tmp_path):
+    folder = emulator.add_folder("A")
+    emulator.add_file("x.txt", b"one", folder['id'], 'text/plain')
+    emulator.add_file("x.txt", b"two", folder['id'], 'text/plain')
+    drive = make_drive()
+
+    FolderMirror(emulator.build_service, drive, folder['id'], str(tmp_path)).sync()
+
+    contents = sorted(open(os.path.join(tmp_path, name), 'rb').read()
+                      for name in os.listdir(tmp_path) if name.startswith("x"))
+    assert contents == [b"one", b"two"]
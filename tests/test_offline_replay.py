@@ -0,0 +1,84 @@
+import os
+
+from services.mutation_queue import is_temp_id
+from services.transfer_policy import TransferPolicy, MIN_CHUNK_SIZE
+
+
+def names_in(emulator, parent_id):
+    return sorted(f['name'] for f in emulator._files.values()
+                  if parent_id in f.get('parents', []) and not f.get('trashed'))
+
+
+def go_online(emulator, drive):
+    emulator.set_offline(False)
+    drive.mutation_queue.set_offline(False)
+
+
+def test_offline_mutations_replay_in_order(emulator, offline_drive):
+    folder = emulator.add_folder("A")
+    file = emulator.add_file("old.txt", b"x", folder['id'])
+    emulator.set_offline(True)
+    offline_drive.mutation_queue.set_offline(True)
+
+    sub = offline_drive.create_folder("Sub", folder['id'])
+    offline_drive.rename_file(file['id'], "new.txt")
+    offline_drive.move_file(file['id'], sub['id'])
+
+    assert len(offline_drive.mutation_queue) == 3
+    go_online(emulator, offline_drive)
+    result = offline_drive.mutation_queue.replay(offline_drive)
+
+    assert result == {'applied': 3, 'conflicts': 0, 'remaining': 0}
+    assert names_in(emulator, folder['id']) == ["Sub"]
+    new_sub = next(f for f in emulator._files.values() if f['name'] == "Sub")
+    assert emulator._files[file['id']]['name'] == "new.txt"
+    assert emulator._files[file['id']]['parents'] == [new_sub['id']]
+
+
+def test_offline_upload_into_offline_folder(emulator, offline_drive, tmp_path):
+    folder = emulator.add_folder("A")
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"hello")
+    emulator.set_offline(True)
+    offline_drive.mutation_queue.set_offline(True)
+
+    sub = offline_drive.create_folder("Sub", folder['id'])
+    upload = offline_drive.upload_file(str(path), sub['id'])
+
+    assert upload['pending'] and is_temp_id(sub['id'])
+    go_online(emulator, offline_drive)
+    offline_drive.mutation_queue.replay(offline_drive)
+
+    new_sub = next(f for f in emulator._files.values() if f['name'] == "Sub")
+    assert names_in(emulator, new_sub['id']) == ["notes.txt"]
+    assert len(offline_drive.mutation_queue) == 0
+
+
+def test_interrupted_upload_is_not_uploaded_twice(emulator, tmp_path, make_drive):
+    from services.mutation_queue import MutationQueue
+    from services.upload_journal import UploadJournal
+
+    folder = emulator.add_folder("A")
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(MIN_CHUNK_SIZE * 4))
+    drive = make_drive(
+        mutation_queue=MutationQueue(tmp_path / "queue.json"),
+        upload_journal=UploadJournal(tmp_path / "journal.json"),
+        transfer_policy=TransferPolicy(max_chunk=MIN_CHUNK_SIZE),
+        max_retries=1,
+    )
+
+    def cut_connection(sent, total):
+        emulator.set_offline(True)
+
+    assert drive.upload_file(str(path), folder['id'], progress_callback=cut_connection, dedupe=True) is None
+    queued = drive.upload_file(str(path), folder['id'], dedupe=True)
+    assert queued['pending']
+
+    go_online(emulator, drive)
+    drive.resume_pending_uploads()
+    drive.mutation_queue.replay(drive)
+    drive.resume_pending_uploads()
+
+    assert names_in(emulator, folder['id']) == ["big.bin"]
+    assert drive.upload_journal.pending() == []
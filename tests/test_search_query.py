@@ -0,0 +1,46 @@
+import pytest
+
+from services.search_index import parse_query, to_drive_query
+
+
+def test_plain_terms_are_lowercased():
+    assert parse_query("Lab Report") == (['lab', 'report'], {'types': [], 'modified': [], 'owners': []})
+
+
+def test_type_aliases_expand():
+    _, filters = parse_query("type:pdf type:image")
+    assert filters['types'] == ['application/pdf', 'image/']
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-02-28", [('>=', '2025-02-28'), ('<', '2025-03-01')]),
+    (">2024-12-31", [('>=', '2025-01-01')]),
+    ("<=2024-02-28", [('<', '2024-02-29')]),
+    (">=2025-01-01", [('>=', '2025-01-01')]),
+    ("<2025-01-01", [('<', '2025-01-01')]),
+])
+def test_modified_ranges(value, expected):
+    _, filters = parse_query(f"modified:{value}")
+    assert filters['modified'] == expected
+
+
+@pytest.mark.parametrize("value", ["2025-02-30", ">2025-13-01", "yesterday", "2025-1-1"])
+def test_invalid_dates_are_dropped(value):
+    terms, filters = parse_query(f"essay modified:{value}")
+    assert terms == ['essay']
+    assert filters['modified'] == []
+    assert to_drive_query(f"essay modified:{value}") == "name contains 'essay'"
+
+
+def test_quoted_owner_and_filters_only():
+    terms, filters = parse_query('owner:"Ana Cruz" type:doc')
+    assert terms == []
+    assert filters['owners'] == ['Ana Cruz']
+
+
+def test_drive_query_translates_filters():
+    query = to_drive_query("it's type:pdf modified:>=2025-01-01 owner:teacher@example.com owner:Ana")
+    assert query == (
+        "name contains 'it\\'s' and (mimeType = 'application/pdf') "
+        "and modifiedTime >= '2025-01-01T00:00:00' and 'teacher@example.com' in owners"
+    )